@@ -7,64 +7,150 @@ Log Parser for UE Size Analysis (Advanced v3)
 - Hide UE ID from filename and chart title
 - Auto-detect and trim stable regions (constant size=5) at start/end
 - Keep the main data section for consistent visualization
+- Batch mode: parse many measurements in parallel and compare across throughputs
 """
 
+import os
 import sys
 import re
+import glob
 import argparse
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property, partial
 from pathlib import Path
-import matplotlib.pyplot as plt
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from nfapi_common.cache import add_cache_arguments, cache_from_args
+from nfapi_common.compressed import SUFFIXES as COMPRESSED_SUFFIXES, strip_compression_suffix
+from nfapi_common.downsample import DEFAULT_MAX_POINTS, downsample_indices
+from nfapi_common.framelog import compile_frame_slot_pattern, scan
+from nfapi_common.profiling import add_profile_arguments, profiler_from_args
+from nfapi_common.rolling import DEFAULT_WINDOWS, parse_windows, rolling_mean, rolling_means
+from nfapi_common.slot_index import DEFAULT_MU, check_slot_range, slot_duration, unwrap_slots
+from nfapi_common.stats import StreamingStats
+
+# Bump when parse_log_file output changes so cached results are not reused
+PARSER_VERSION = 1
+
+# [timestamp] frame=X slot=Y UE xxxx: Size Z
+SIZE_LINE_PATTERN = compile_frame_slot_pattern(
+    rb'UE[^\S\r\n]+([a-fA-F0-9]+):[^\S\r\n]+Size[^\S\r\n]+(\d+)'
+)
+
+class UEColumns:
+    """
+    Typed per-UE columns backed by NumPy arrays
+
+    Attributes:
+        timestamp_ns: int64 timestamps in nanoseconds
+        frame: int16 frame numbers
+        slot: int8 slot numbers
+        size: int32 sizes in bytes
+    """
+
+    FIELDS = ('timestamp_ns', 'frame', 'slot', 'size')
+
+    def __init__(self, timestamp_ns, frame, slot, size):
+        self.timestamp_ns = timestamp_ns
+        self.frame = frame
+        self.slot = slot
+        self.size = size
+
+    def __len__(self):
+        return len(self.size)
+
+    def __getitem__(self, index):
+        return UEColumns(self.timestamp_ns[index], self.frame[index],
+                         self.slot[index], self.size[index])
+
+    @property
+    def timestamps(self):
+        """Timestamps in seconds (float64)"""
+        return self.timestamp_ns / 1e9
+
+    def relative_times(self):
+        """Seconds since the earliest sample, computed in ns to keep precision"""
+        return (self.timestamp_ns - self.timestamp_ns.min()) / 1e9
+
+    def duration(self):
+        """Time span covered by the samples in seconds"""
+        return (self.timestamp_ns.max() - self.timestamp_ns.min()) / 1e9
+
+class _UEColumnBuilder:
+    """Growable typed columns filled while parsing, converted to NumPy without copying"""
+
+    def __init__(self):
+        self.timestamp_ns = array('q')
+        self.frame = array('h')
+        self.slot = array('b')
+        self.size = array('i')
+
+    def append(self, timestamp_ns, frame, slot, size):
+        self.timestamp_ns.append(timestamp_ns)
+        self.frame.append(frame)
+        self.slot.append(slot)
+        self.size.append(size)
+
+    def finish(self):
+        return UEColumns(
+            np.frombuffer(self.timestamp_ns, dtype=np.int64),
+            np.frombuffer(self.frame, dtype=np.int16),
+            np.frombuffer(self.slot, dtype=np.int8),
+            np.frombuffer(self.size, dtype=np.int32),
+        )
+
+def parse_timestamp_ns(timestamp):
+    """Convert a b'seconds.fraction' timestamp to integer nanoseconds"""
+    seconds, _, fraction = timestamp.partition(b'.')
+    return int(seconds) * 1_000_000_000 + int(fraction[:9].ljust(9, b'0'))
+
 def parse_log_file(filepath):
     """
     Parse log file and extract timestamp, UE ID, and Size
     
+    Scans the memory-mapped file with one bytes regex; no str is created per line.
+    
     Returns:
-        dict: {ue_id: [(timestamp, frame, slot, size), ...]}
+        dict: {ue_id: UEColumns}
+    
+    Raises:
+        ValueError: The file is missing, unreadable or has no matching lines
     """
-    ue_data = defaultdict(list)
+    builders = defaultdict(_UEColumnBuilder)
     
     try:
-        with open(filepath, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Regex pattern: [timestamp] frame=X slot=Y UE xxxx: Size Z
-                match = re.match(
-                    r'\[(\d+\.\d+)\]\s+frame=(\d+)\s+slot=(\d+)\s+UE\s+([a-fA-F0-9]+):\s+Size\s+(\d+)',
-                    line
-                )
-                
-                if match:
-                    timestamp = float(match.group(1))
-                    frame = int(match.group(2))
-                    slot = int(match.group(3))
-                    ue_id = match.group(4)
-                    size = int(match.group(5))
-                    
-                    ue_data[ue_id].append({
-                        'timestamp': timestamp,
-                        'frame': frame,
-                        'slot': slot,
-                        'size': size
-                    })
+        for timestamp, frame, slot, ue_id, size in scan(filepath, SIZE_LINE_PATTERN):
+            builders[ue_id].append(
+                parse_timestamp_ns(timestamp),
+                int(frame),
+                int(slot),
+                int(size)
+            )
     
-    except FileNotFoundError:
-        print(f"ERROR: File not found {filepath}")
-        sys.exit(1)
+    except FileNotFoundError as e:
+        raise ValueError(f"File not found {filepath}") from e
     except Exception as e:
-        print(f"ERROR: Problem reading file: {e}")
-        sys.exit(1)
+        raise ValueError(f"Problem reading file: {e}") from e
     
-    if not ue_data:
-        print("ERROR: No matching log format found")
-        sys.exit(1)
+    if not builders:
+        raise ValueError("No matching log format found")
     
-    return ue_data
+    return {ue_id.decode('ascii'): builder.finish() for ue_id, builder in builders.items()}
+
+def encode_ue_data(ue_data):
+    """Flatten {ue_id: UEColumns} into named arrays for the parse cache"""
+    return {f'{ue_id}__{field}': getattr(columns, field)
+            for ue_id, columns in ue_data.items()
+            for field in UEColumns.FIELDS}
+
+def decode_ue_data(arrays):
+    """Inverse of encode_ue_data"""
+    ue_ids = sorted({name.split('__', 1)[0] for name in arrays})
+    return {ue_id: UEColumns(*(arrays[f'{ue_id}__{field}'] for field in UEColumns.FIELDS))
+            for ue_id in ue_ids}
 
 def detect_and_trim_stable_regions(data, stable_threshold=5, min_stable_length=10):
     """
@@ -74,17 +160,14 @@ def detect_and_trim_stable_regions(data, stable_threshold=5, min_stable_length=1
     This removes the boring setup/teardown phases before and after actual transmission.
     
     Args:
-        data: List of dicts with 'size' key
+        data: UEColumns for one UE
         stable_threshold: Threshold for detecting stable region (default: size=5)
         min_stable_length: Minimum consecutive samples to consider a region stable
     
     Returns:
         tuple: (trimmed_data, start_idx, end_idx, trim_info_str)
     """
-    if len(data) < min_stable_length:
-        return data, 0, len(data), "Data too short, no trimming applied"
-    
-    sizes = np.array([d['size'] for d in data])
+    sizes = data.size
     
     # Find where data differs from stable_threshold using difference detection
     # This identifies where the interesting part starts/ends
@@ -93,43 +176,62 @@ def detect_and_trim_stable_regions(data, stable_threshold=5, min_stable_length=1
     # Find significant changes (> 0, meaning size changed from previous)
     change_indices = np.where(changes > 0)[0]
     
-    if len(change_indices) == 0:
+    if len(change_indices):
+        first_change_idx, last_change_idx = change_indices[0], change_indices[-1]
+    else:
+        first_change_idx = last_change_idx = None
+    
+    start_trim, end_trim, trim_info = compute_trim_bounds(
+        len(data), first_change_idx, last_change_idx, min_stable_length)
+    
+    return data[start_trim:end_trim], start_trim, end_trim, trim_info
+
+def compute_trim_bounds(length, first_change_idx, last_change_idx, min_stable_length=10):
+    """
+    Trim window from the sample count and the first/last index where size changes
+    
+    Shared by detect_and_trim_stable_regions and the streaming --summary-only path,
+    which only knows the change positions after a first pass over the log.
+    
+    Returns:
+        tuple: (start_idx, end_idx, trim_info_str)
+    """
+    if length < min_stable_length:
+        return 0, length, "Data too short, no trimming applied"
+    
+    if first_change_idx is None:
         # All data is the same value, no trimming needed
-        return data, 0, len(data), "All data is constant"
+        return 0, length, "All data is constant"
     
     # The first significant change marks the start of interesting data
-    first_change_idx = change_indices[0]
-    
     # The last significant change marks around the end of interesting data
-    last_change_idx = change_indices[-1]
-    
     # Add buffer after last change to include post-change stable region
     start_trim = max(0, first_change_idx - 2)  # Start from a bit before first change
-    end_trim = min(len(data), last_change_idx + 20)  # Include some data after last change
+    end_trim = min(length, last_change_idx + 20)  # Include some data after last change
     
     # But ensure we're not trimming too much
     if end_trim - start_trim < 20:  # Minimum keep 20 samples
         # Try to keep at least 50% of data if changes are minimal
-        margin = max(len(data) // 4, 10)
+        margin = max(length // 4, 10)
         start_trim = max(0, first_change_idx - margin)
-        end_trim = min(len(data), last_change_idx + margin)
-    
-    trimmed_data = data[start_trim:end_trim]
+        end_trim = min(length, last_change_idx + margin)
     
-    trim_info = f"Trimmed: {start_trim} to {end_trim} (removed {start_trim} from start, {len(data)-end_trim} from end, kept {len(trimmed_data)} samples)"
+    start_trim, end_trim = int(start_trim), int(end_trim)
+    trim_info = f"Trimmed: {start_trim} to {end_trim} (removed {start_trim} from start, {length-end_trim} from end, kept {end_trim-start_trim} samples)"
     
     print(f"   TRIM: {trim_info}")
     
-    return trimmed_data, start_trim, end_trim, trim_info
+    return start_trim, end_trim, trim_info
 
 def extract_throughput_from_filename(log_file):
     """
     Extract throughput from filename pattern like 'measure-PRB-500M.txt'
+    (or 'measure-PRB-500M.txt.gz')
     
     Returns:
         float or None: throughput value in Mbps
     """
-    filename = Path(log_file).stem
+    filename = Path(strip_compression_suffix(str(log_file))).stem
     
     # Try to match patterns like: 500M, 1000M, 125.5M, etc.
     match = re.search(r'-(\d+(?:\.\d+)?)(M|Mbps)?(?:\.txt)?$', filename)
@@ -181,7 +283,7 @@ def generate_output_filename(log_file, throughput_override=None, output_prefix=N
     if output_prefix:
         return output_prefix
     
-    base_name = Path(log_file).stem
+    base_name = Path(strip_compression_suffix(str(log_file))).stem
     
     # Auto-extract throughput from filename if not overridden
     throughput = throughput_override if throughput_override is not None else extract_throughput_from_filename(log_file)
@@ -208,55 +310,116 @@ def calculate_moving_average(data, window=5):
     Returns:
         np.array: Smoothed data
     """
-    if len(data) < window:
-        return np.array(data)
+    return np.asarray(rolling_mean(np.arange(len(data)), data, str(window))[1])
+
+# Line colors for the rolling means, in --window order
+SMOOTHING_COLORS = ['#1976D2', '#E65100', '#2E7D32', '#6A1B9A', '#C2185B']
+
+class UEAnalysis:
+    """
+    Per-UE analysis shared by the summary and the plots
+    
+    Trimming, statistics and smoothing are computed on first access and
+    cached, so printing the summary and plotting the same UE does the work once.
     
-    return np.convolve(data, np.ones(window)/window, mode='valid')
+    Args:
+        ue_id: UE identifier
+        data: UEColumns for the UE
+        windows: Rolling window specs, sample counts ('5') or durations ('10ms', '1s')
+    """
+    
+    def __init__(self, ue_id, data, windows=DEFAULT_WINDOWS):
+        self.ue_id = ue_id
+        self.data = data
+        self.windows = parse_windows(windows)
+    
+    @cached_property
+    def _trim(self):
+        return detect_and_trim_stable_regions(self.data)
+    
+    @property
+    def trimmed(self):
+        """UEColumns after removing the stable start/end regions"""
+        return self._trim[0]
+    
+    @property
+    def trim_info(self):
+        return self._trim[3]
+    
+    @cached_property
+    def sizes(self):
+        return self.trimmed.size
+    
+    @cached_property
+    def relative_times(self):
+        return self.trimmed.relative_times()
+    
+    @cached_property
+    def duration(self):
+        return self.trimmed.duration()
+    
+    @cached_property
+    def stats(self):
+        """StreamingStats over the trimmed sizes (exact median)"""
+        return StreamingStats.from_array(self.sizes)
+    
+    @cached_property
+    def smoothed(self):
+        """
+        [(Window, times, sizes)] rolling means, aligned to each window's last
+        sample; all windows come from one cumulative sum over time-sorted samples
+        """
+        times, sizes = self.relative_times, self.sizes
+        if np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind='stable')
+            times, sizes = times[order], sizes[order]
+        return [(window, smoothed_times, smoothed_sizes) for window, (smoothed_times, smoothed_sizes)
+                in zip(self.windows, rolling_means(times, sizes, self.windows))]
+
+def analyze_ues(ue_data, ue_ids, windows=DEFAULT_WINDOWS):
+    """UEAnalysis for each selected UE, keyed by UE ID"""
+    return {ue_id: UEAnalysis(ue_id, ue_data[ue_id], windows) for ue_id in ue_ids}
 
-def plot_single_ue(ue_id, data, throughput=None, filename_prefix=None, separate=False):
+def plot_single_ue(analysis, throughput=None, filename_prefix=None, separate=False,
+                   max_points=DEFAULT_MAX_POINTS):
     """
     Plot chart for single UE with moving average overlay
-    Auto-trims stable regions at start/end
+    Auto-trims stable regions at start/end; each series is downsampled to
+    about max_points points (spikes kept), statistics use every sample
+    
+    Args:
+        analysis: UEAnalysis of the UE (trimming and statistics are reused)
     
     Returns:
         str: Saved filename
     """
+    import matplotlib.pyplot as plt
     # Suppress matplotlib font warnings
     import warnings
     warnings.filterwarnings('ignore', category=UserWarning)
     
-    # Auto-detect and trim stable regions
-    trimmed_data, start_idx, end_idx, trim_info = detect_and_trim_stable_regions(data)
-    
-    if len(trimmed_data) < 5:
+    if len(analysis.trimmed) < 5:
         print(f"   ERROR: Not enough data after trimming")
         return None
     
     fig, ax = plt.subplots(figsize=(14, 7))
     
-    # Prepare data
-    timestamps = [d['timestamp'] for d in trimmed_data]
-    sizes = [d['size'] for d in trimmed_data]
+    # Prepare data (normalize timestamps to start from 0)
+    relative_times = analysis.relative_times
+    sizes = analysis.sizes
     
-    # Normalize timestamps (start from 0)
-    min_timestamp = min(timestamps)
-    relative_times = np.array([t - min_timestamp for t in timestamps])
-    sizes = np.array(sizes)
-    
-    # Calculate moving average for smoothing (window = 5)
-    window_size = 5
-    if len(sizes) >= window_size:
-        smoothed_sizes = calculate_moving_average(sizes, window=window_size)
-        smoothed_times = relative_times[window_size-1:]
-    else:
-        smoothed_sizes = sizes
-        smoothed_times = relative_times
+    # Downsample for drawing: min/max per time bucket keeps spikes, LTTB keeps the trend shape
+    raw_shown = downsample_indices(relative_times, sizes, max_points)
     
     # Plot original data (light, transparent)
-    ax.scatter(relative_times, sizes, alpha=0.3, s=20, color='#90CAF9', label='Raw Data', zorder=1)
+    ax.scatter(relative_times[raw_shown], sizes[raw_shown], alpha=0.3, s=20, color='#90CAF9', label='Raw Data', zorder=1)
     
-    # Plot moving average trend line
-    ax.plot(smoothed_times, smoothed_sizes, linewidth=2.5, color='#1976D2', label='Moving Average (5-point)', zorder=2)
+    # Plot one trend line per rolling window
+    for i, (window, smoothed_times, smoothed_sizes) in enumerate(analysis.smoothed):
+        smoothed_shown = downsample_indices(smoothed_times, smoothed_sizes, max_points, method='lttb')
+        ax.plot(smoothed_times[smoothed_shown], smoothed_sizes[smoothed_shown], linewidth=2.5,
+                color=SMOOTHING_COLORS[i % len(SMOOTHING_COLORS)],
+                label=f'Moving Average ({window.label})', zorder=2)
     
     # Set labels (English only)
     ax.set_xlabel('Time (seconds)', fontsize=12, fontweight='bold')
@@ -273,21 +436,16 @@ def plot_single_ue(ue_id, data, throughput=None, filename_prefix=None, separate=
     ax.legend(loc='upper right', fontsize=10)
     
     # Add statistics box (English only)
-    mean_size = np.mean(sizes)
-    max_size = np.max(sizes)
-    min_size = np.min(sizes)
-    count = len(sizes)
-    duration = max(timestamps) - min(timestamps)
-    std_size = np.std(sizes)
+    stats = analysis.stats
     
     stats_text = (f'Statistics\n'
                   f'─────────────\n'
-                  f'Samples: {count}\n'
-                  f'Mean: {mean_size:.2f} B\n'
-                  f'Std Dev: {std_size:.2f} B\n'
-                  f'Max: {max_size} B\n'
-                  f'Min: {min_size} B\n'
-                  f'Duration: {duration:.3f} s')
+                  f'Samples: {stats.count}\n'
+                  f'Mean: {stats.mean:.2f} B\n'
+                  f'Std Dev: {stats.std:.2f} B\n'
+                  f'Max: {stats.max} B\n'
+                  f'Min: {stats.min} B\n'
+                  f'Duration: {analysis.duration:.3f} s')
     
     ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, 
             fontsize=9, verticalalignment='top', horizontalalignment='left',
@@ -307,16 +465,21 @@ def plot_single_ue(ue_id, data, throughput=None, filename_prefix=None, separate=
     
     return output_file
 
-def plot_all_ues_combined(ue_data, ues_to_plot, throughput=None, filename_prefix=None):
+def plot_all_ues_combined(analyses, throughput=None, filename_prefix=None,
+                          max_points=DEFAULT_MAX_POINTS):
     """
     Plot multiple UEs in subplots with moving average overlay
-    Auto-trims stable regions
+    Auto-trims stable regions; series are downsampled to about max_points points
+    
+    Args:
+        analyses: UEAnalysis objects, one per subplot
     """
+    import matplotlib.pyplot as plt
     # Suppress warnings
     import warnings
     warnings.filterwarnings('ignore', category=UserWarning)
     
-    num_ues = len(ues_to_plot)
+    num_ues = len(analyses)
     
     cols = 3
     rows = (num_ues + cols - 1) // cols
@@ -338,54 +501,40 @@ def plot_all_ues_combined(ue_data, ues_to_plot, throughput=None, filename_prefix
     else:
         fig.suptitle('Size Analysis', fontsize=16, fontweight='bold')
     
-    for idx, ue_id in enumerate(ues_to_plot):
-        data = ue_data[ue_id]
-        
-        # Auto-trim stable regions
-        trimmed_data, _, _, _ = detect_and_trim_stable_regions(data)
-        
-        if len(trimmed_data) < 5:
-            print(f"   WARNING: Skipping UE {ue_id}, not enough data after trimming")
+    for idx, analysis in enumerate(analyses):
+        if len(analysis.trimmed) < 5:
+            print(f"   WARNING: Skipping UE {analysis.ue_id}, not enough data after trimming")
             continue
         
         row = idx // cols
         col = idx % cols
         ax = axes[row, col]
         
-        # Prepare data
-        timestamps = [d['timestamp'] for d in trimmed_data]
-        sizes = np.array([d['size'] for d in trimmed_data])
+        # Prepare data (normalized timestamps)
+        relative_times = analysis.relative_times
+        sizes = analysis.sizes
         
-        # Normalize timestamps
-        min_timestamp = min(timestamps)
-        relative_times = np.array([t - min_timestamp for t in timestamps])
-        
-        # Calculate moving average
-        window_size = 5
-        if len(sizes) >= window_size:
-            smoothed_sizes = calculate_moving_average(sizes, window=window_size)
-            smoothed_times = relative_times[window_size-1:]
-        else:
-            smoothed_sizes = sizes
-            smoothed_times = relative_times
-        
-        # Plot
-        ax.scatter(relative_times, sizes, alpha=0.3, s=15, color='#90CAF9', zorder=1)
-        ax.plot(smoothed_times, smoothed_sizes, linewidth=2, color='#1976D2', zorder=2)
+        # Plot (downsampled, spikes kept)
+        raw_shown = downsample_indices(relative_times, sizes, max_points)
+        ax.scatter(relative_times[raw_shown], sizes[raw_shown], alpha=0.3, s=15, color='#90CAF9', zorder=1)
+        for i, (window, smoothed_times, smoothed_sizes) in enumerate(analysis.smoothed):
+            smoothed_shown = downsample_indices(smoothed_times, smoothed_sizes, max_points, method='lttb')
+            ax.plot(smoothed_times[smoothed_shown], smoothed_sizes[smoothed_shown], linewidth=2,
+                    color=SMOOTHING_COLORS[i % len(SMOOTHING_COLORS)],
+                    label=window.label if len(analysis.smoothed) > 1 else None, zorder=2)
+        if len(analysis.smoothed) > 1:
+            ax.legend(loc='lower right', fontsize=7)
         
         # Labels (English only)
         ax.set_xlabel('Time (s)', fontsize=9)
         ax.set_ylabel('Size (B)', fontsize=9)
-        ax.set_title(f'UE {ue_id}', fontsize=11, fontweight='bold')
+        ax.set_title(f'UE {analysis.ue_id}', fontsize=11, fontweight='bold')
         ax.grid(True, alpha=0.3, linestyle='--', zorder=0)
         
         # Small stats (English only)
-        mean_size = np.mean(sizes)
-        max_size = np.max(sizes)
-        min_size = np.min(sizes)
-        count = len(sizes)
+        stats = analysis.stats
         
-        stats_text = f'N: {count}\nMean: {mean_size:.1f}\nMax: {max_size}\nMin: {min_size}'
+        stats_text = f'N: {stats.count}\nMean: {stats.mean:.1f}\nMax: {stats.max}\nMin: {stats.min}'
         ax.text(0.98, 0.97, stats_text, transform=ax.transAxes, 
                 fontsize=8, verticalalignment='top', horizontalalignment='right',
                 bbox=dict(boxstyle='round', facecolor='#FFFDE7', alpha=0.85, pad=0.5),
@@ -410,32 +559,465 @@ def plot_all_ues_combined(ue_data, ues_to_plot, throughput=None, filename_prefix
     
     return output_file
 
-def print_summary(ue_data, ues_to_plot):
+# Achieved throughput: time bin size, bits per logged size unit (bytes) and
+# how many UEs get their own line
+DEFAULT_THROUGHPUT_BIN = 0.1
+DEFAULT_BITS_PER_UNIT = 8
+THROUGHPUT_PLOT_TOP_UES = 8
+
+class ThroughputSeries:
+    """
+    Achieved throughput reconstructed from the per-slot grant sizes
+    
+    Attributes:
+        ue_ids: UE IDs, heaviest first
+        first_slot: Absolute slot of the first grant
+        slot_bits: Cell bits per absolute slot (float64, dense from first_slot)
+        bin_seconds: Time bin width (a whole number of slots)
+        mu: Numerology (slot duration)
+        times: Start of each bin in seconds since the first grant
+        ue_bps: (n_ues, n_bins) achieved bits/s per UE
+        cell_bps: (n_bins,) achieved bits/s for the cell
     """
-    Print UE data summary (before trimming)
+    
+    def __init__(self, ue_ids, first_slot, slot_bits, bin_seconds, times, ue_bps, mu=DEFAULT_MU):
+        self.ue_ids = ue_ids
+        self.first_slot = first_slot
+        self.slot_bits = slot_bits
+        self.bin_seconds = bin_seconds
+        self.times = times
+        self.ue_bps = ue_bps
+        self.cell_bps = ue_bps.sum(axis=0)
+        self.mu = mu
+    
+    @property
+    def duration(self):
+        """Seconds spanned by the slots from the first to the last grant"""
+        return len(self.slot_bits) * slot_duration(self.mu)
+    
+    def mean_bps(self):
+        """Cell bits over the whole span divided by its duration"""
+        return float(self.slot_bits.sum() / self.duration) if self.duration else 0.0
+
+def achieved_throughput(ue_data, bin_seconds=DEFAULT_THROUGHPUT_BIN, mu=DEFAULT_MU,
+                        bits_per_unit=DEFAULT_BITS_PER_UNIT):
+    """
+    Bin every grant by absolute slot and by time window (vectorized bincount)
+    
+    The slot clock, not the log timestamp, places each grant: (frame, slot) is
+    unwrapped across SFN wraparound into an absolute slot, and a time bin is a
+    whole number of slots, so bins line up with the air interface.
+    
+    Args:
+        ue_data: {ue_id: UEColumns}
+        bin_seconds: Time bin width in seconds (rounded to whole slots)
+        mu: Numerology (slot duration)
+        bits_per_unit: Bits per logged size unit (8 for bytes; use a
+            calibrated bits-per-PRB value when Size counts PRBs)
+    
+    Returns:
+        ThroughputSeries, or None when there are no grants
+    
+    Raises:
+        ValueError: A logged slot does not fit in a frame at this mu
+    """
+    ue_ids = sorted(ue_data, key=lambda ue_id: -int(ue_data[ue_id].size.sum(dtype=np.int64)))
+    columns = [ue_data[ue_id] for ue_id in ue_ids]
+    if not sum(len(c) for c in columns):
+        return None
+    
+    ue_code = np.concatenate([np.full(len(c), i, dtype=np.int64) for i, c in enumerate(columns)])
+    bits = np.concatenate([c.size for c in columns]).astype(np.float64) * bits_per_unit
+    slots = np.concatenate([c.slot for c in columns])
+    check_slot_range(slots, mu)
+    abs_slot = unwrap_slots(np.concatenate([c.timestamp_ns for c in columns]) / 1e9,
+                            np.concatenate([c.frame for c in columns]), slots, mu)
+    
+    first_slot = int(abs_slot.min())
+    offset = abs_slot - first_slot
+    slot_bits = np.bincount(offset, weights=bits)
+    
+    slots_per_bin = max(1, int(round(bin_seconds / slot_duration(mu))))
+    bin_seconds = slots_per_bin * slot_duration(mu)
+    n_bins = len(slot_bits) // slots_per_bin + (len(slot_bits) % slots_per_bin > 0)
+    ue_bits = np.bincount(ue_code * n_bins + offset // slots_per_bin, weights=bits,
+                          minlength=len(ue_ids) * n_bins).reshape(len(ue_ids), n_bins)
+    
+    return ThroughputSeries(ue_ids, first_slot, slot_bits, bin_seconds,
+                            np.arange(n_bins) * bin_seconds, ue_bits / bin_seconds, mu)
+
+def print_throughput_summary(series, offered=None):
+    """Print achieved cell/UE throughput, compared with the offered load if known"""
+    print("\n" + "="*70)
+    print(f"ACHIEVED THROUGHPUT ({series.bin_seconds*1000:g} ms bins)")
+    print("="*70)
+    mean_mbps = series.mean_bps() / 1e6
+    print(f"   Cell mean: {mean_mbps:.2f} Mbps over {series.duration:.3f} s")
+    print(f"   Cell peak bin: {series.cell_bps.max() / 1e6:.2f} Mbps")
+    print(f"   Cell median bin: {np.median(series.cell_bps) / 1e6:.2f} Mbps")
+    print(f"   Peak slot: {series.slot_bits.max() / 1e3:.1f} kbit")
+    if offered:
+        print(f"   Offered: {offered} Mbps (achieved {mean_mbps / offered * 100:.1f}%)")
+    for ue_id, bps in zip(series.ue_ids[:THROUGHPUT_PLOT_TOP_UES], series.ue_bps):
+        print(f"   UE {ue_id}: mean {bps.mean() / 1e6:.2f} Mbps, peak {bps.max() / 1e6:.2f} Mbps")
+
+def write_throughput_table(series, output_file):
+    """CSV with one row per time bin: cell and per-UE achieved Mbps"""
+    columns = np.column_stack([series.times, series.cell_bps / 1e6, (series.ue_bps / 1e6).T])
+    header = ','.join(['time_s', 'cell_mbps'] + [f'ue_{ue_id}_mbps' for ue_id in series.ue_ids])
+    np.savetxt(output_file, columns, delimiter=',', header=header, comments='', fmt='%.6f')
+    return output_file
+
+def plot_achieved_throughput(series, offered=None, output_file='achieved_throughput.png'):
+    """
+    Achieved cell throughput per time bin (and the heaviest UEs) against the
+    offered throughput from the filename
+    """
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(14, 7))
+    
+    ax.plot(series.times, series.cell_bps / 1e6, linewidth=2.5, color='#1976D2',
+            label='Cell (achieved)', zorder=3)
+    if len(series.ue_ids) > 1:
+        for i, (ue_id, bps) in enumerate(zip(series.ue_ids[:THROUGHPUT_PLOT_TOP_UES], series.ue_bps)):
+            ax.plot(series.times, bps / 1e6, linewidth=1, alpha=0.7,
+                    color=plt.cm.tab10(i % 10), label=f'UE {ue_id}', zorder=2)
+    if offered:
+        ax.axhline(y=offered, color='#D32F2F', linestyle='--', linewidth=2,
+                   label=f'Offered: {offered} Mbps', zorder=1)
+    
+    ax.set_xlabel('Time (seconds)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Throughput (Mbps)', fontsize=12, fontweight='bold')
+    ax.set_title(f'Achieved Throughput ({series.bin_seconds*1000:g} ms bins)',
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.grid(True, alpha=0.3, linestyle='--', zorder=0)
+    ax.legend(loc='upper right', fontsize=9)
+    
+    mean_mbps = series.mean_bps() / 1e6
+    stats_text = (f'Mean: {mean_mbps:.2f} Mbps\n'
+                  f'Peak: {series.cell_bps.max() / 1e6:.2f} Mbps\n'
+                  f'Median: {np.median(series.cell_bps) / 1e6:.2f} Mbps')
+    if offered:
+        stats_text += f'\nAchieved: {mean_mbps / offered * 100:.1f}%'
+    ax.text(0.02, 0.98, stats_text, transform=ax.transAxes,
+            fontsize=9, verticalalignment='top', horizontalalignment='left',
+            bbox=dict(boxstyle='round', facecolor='#FFFDE7', alpha=0.85, pad=0.8),
+            family='monospace')
+    
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
+    plt.close()
+    
+    return output_file
+
+def print_summary(analyses):
+    """
+    Print UE data summary (after trimming)
+    
+    Args:
+        analyses: UEAnalysis objects; their cached trimming is reused by the plots
     """
     print("\n" + "="*70)
     print("SUMMARY (After Trimming)")
     print("="*70)
     
-    for ue_id in ues_to_plot:
-        data = ue_data[ue_id]
-        
-        # Show trimming info
-        trimmed_data, _, _, trim_info = detect_and_trim_stable_regions(data)
-        
-        sizes = [d['size'] for d in trimmed_data]
-        timestamps = [d['timestamp'] for d in trimmed_data]
-        
-        print(f"\nUE {ue_id}:")
-        print(f"   Original: {len(data)} samples")
-        print(f"   {trim_info}")
-        print(f"   Samples: {len(sizes)}")
-        print(f"   Mean Size: {np.mean(sizes):.2f} bytes")
-        print(f"   Max Size: {np.max(sizes)} bytes")
-        print(f"   Min Size: {np.min(sizes)} bytes")
-        print(f"   Std Dev: {np.std(sizes):.2f} bytes")
-        print(f"   Duration: {max(timestamps) - min(timestamps):.6f} sec")
+    for analysis in analyses:
+        _print_ue_summary(analysis.ue_id, len(analysis.data), analysis.trim_info,
+                          analysis.stats, analysis.duration)
+
+def _print_ue_summary(ue_id, original_count, trim_info, stats, duration):
+    print(f"\nUE {ue_id}:")
+    print(f"   Original: {original_count} samples")
+    print(f"   {trim_info}")
+    print(f"   Samples: {stats.count}")
+    print(f"   Mean Size: {stats.mean:.2f} bytes")
+    print(f"   Median Size: {stats.median:.2f} bytes")
+    print(f"   Max Size: {stats.max} bytes")
+    print(f"   Min Size: {stats.min} bytes")
+    print(f"   Std Dev: {stats.std:.2f} bytes")
+    print(f"   Duration: {duration:.6f} sec")
+
+class _UETrimScan:
+    """--summary-only pass 1: sample count and first/last size change of one UE"""
+
+    def __init__(self):
+        self.count = 0
+        self.previous = None
+        self.first_change_idx = None
+        self.last_change_idx = None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, size):
+        if self.previous is not None and size != self.previous:
+            if self.first_change_idx is None:
+                self.first_change_idx = self.count - 1
+            self.last_change_idx = self.count - 1
+        self.previous = size
+        self.count += 1
+
+class _UESummaryScan:
+    """--summary-only pass 2: streaming stats over the trimmed window of one UE"""
+
+    def __init__(self, start_idx, end_idx):
+        self.start_idx = start_idx
+        self.end_idx = end_idx
+        self.index = 0
+        self.stats = StreamingStats()
+        self.first_ns = None
+        self.last_ns = None
+
+    def add(self, timestamp_ns, size):
+        if self.start_idx <= self.index < self.end_idx:
+            self.stats.add(size)
+            self.first_ns = timestamp_ns if self.first_ns is None else min(self.first_ns, timestamp_ns)
+            self.last_ns = timestamp_ns if self.last_ns is None else max(self.last_ns, timestamp_ns)
+        self.index += 1
+
+    def duration(self):
+        return (self.last_ns - self.first_ns) / 1e9 if self.first_ns is not None else 0.0
+
+def summarize_log_file(filepath, top_only=True, all_ues=False):
+    """
+    Print the trimmed summary in constant memory, without building per-UE arrays
+    
+    The log is scanned twice: the first pass finds each UE's sample count and
+    where its size starts/stops changing (the trim window), the second feeds
+    only the samples inside that window into StreamingStats.
+    """
+    scans = defaultdict(_UETrimScan)
+    try:
+        for _, _, _, ue_id, size in scan(filepath, SIZE_LINE_PATTERN):
+            scans[ue_id].add(int(size))
+    except FileNotFoundError:
+        print(f"ERROR: File not found {filepath}")
+        sys.exit(1)
+    
+    if not scans:
+        print("ERROR: No matching log format found")
+        sys.exit(1)
+    
+    scans = {ue_id.decode('ascii'): trim_scan for ue_id, trim_scan in scans.items()}
+    print(f"Found {len(scans)} UE(s)")
+    ues = get_ues_to_plot(scans, top_only=top_only, all_ues=all_ues)
+    
+    print("\n" + "="*70)
+    print("SUMMARY (After Trimming)")
+    print("="*70)
+    
+    summaries = {}
+    trim_infos = {}
+    for ue_id in ues:
+        trim_scan = scans[ue_id]
+        start_idx, end_idx, trim_infos[ue_id] = compute_trim_bounds(
+            trim_scan.count, trim_scan.first_change_idx, trim_scan.last_change_idx)
+        summaries[ue_id.encode('ascii')] = _UESummaryScan(start_idx, end_idx)
+    
+    for timestamp, _, _, ue_id, size in scan(filepath, SIZE_LINE_PATTERN):
+        summary = summaries.get(ue_id)
+        if summary is not None:
+            summary.add(parse_timestamp_ns(timestamp), int(size))
+    
+    for ue_id in ues:
+        summary = summaries[ue_id.encode('ascii')]
+        _print_ue_summary(ue_id, scans[ue_id].count, trim_infos[ue_id],
+                          summary.stats, summary.duration())
+
+BATCH_PERCENTILES = (5, 25, 50, 75, 95)
+
+def expand_batch_inputs(patterns):
+    """
+    Resolve --batch arguments to log files
+    
+    Each argument may be a glob pattern, a directory (all *.txt inside,
+    compressed ones included) or a file.
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [match for suffix in ('',) + COMPRESSED_SUFFIXES
+                       for match in glob.glob(os.path.join(pattern, '*.txt' + suffix))]
+        else:
+            matches = glob.glob(pattern)
+        files.extend(match for match in sorted(matches) if match not in files)
+    return files
+
+def analyze_batch_file(log_file, cache, bin_seconds=DEFAULT_THROUGHPUT_BIN, mu=DEFAULT_MU,
+                       bits_per_unit=DEFAULT_BITS_PER_UNIT):
+    """
+    Batch worker: parse one measurement and reduce its top UE to a summary row
+    
+    Only the summary (a few numbers per file) is sent back to the parent, so
+    memory in the parent does not grow with the size of the logs. A file that
+    cannot be parsed yields {'file', 'throughput_mbps', 'error'} instead, so
+    one bad file does not end the batch. The size statistics do not depend on
+    mu; when the achieved throughput cannot be computed (slots that do not fit
+    mu) only achieved_mbps is None, with the reason in 'achieved_error'.
+    """
+    try:
+        ue_data = cache.cached(log_file, 'prb-size', PARSER_VERSION,
+                               lambda: parse_log_file(log_file),
+                               encode_ue_data, decode_ue_data)
+    except ValueError as e:
+        return {'file': Path(log_file).name,
+                'throughput_mbps': extract_throughput_from_filename(log_file),
+                'error': str(e)}
+    top_ue = max(ue_data, key=lambda ue_id: len(ue_data[ue_id]))
+    analysis = UEAnalysis(top_ue, ue_data[top_ue])
+    sizes = analysis.sizes
+    
+    row = {
+        'file': Path(log_file).name,
+        'throughput_mbps': extract_throughput_from_filename(log_file),
+        'ue': top_ue,
+        'samples': len(analysis.data),
+        'trimmed_samples': len(sizes),
+        'mean': float(analysis.stats.mean),
+        'std': float(analysis.stats.std),
+        'min': int(analysis.stats.min),
+        'max': int(analysis.stats.max),
+        'duration_s': analysis.duration,
+        'achieved_mbps': None,
+    }
+    for p, value in zip(BATCH_PERCENTILES, np.percentile(sizes, BATCH_PERCENTILES)):
+        row[f'p{p}'] = float(value)
+    
+    try:
+        series = achieved_throughput(ue_data, bin_seconds, mu, bits_per_unit)
+    except ValueError as e:
+        row['achieved_error'] = str(e)
+    else:
+        if series is not None:
+            row['achieved_mbps'] = series.mean_bps() / 1e6
+    return row
+
+def run_batch(log_files, cache, jobs=None, bin_seconds=DEFAULT_THROUGHPUT_BIN, mu=DEFAULT_MU,
+              bits_per_unit=DEFAULT_BITS_PER_UNIT):
+    """
+    Parse all measurements in a process pool (one task per file)
+    
+    Returns:
+        list: Summary rows sorted by offered throughput (unlabelled files last)
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(log_files))
+    worker = partial(analyze_batch_file, cache=cache, bin_seconds=bin_seconds, mu=mu,
+                     bits_per_unit=bits_per_unit)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        rows = list(pool.map(worker, log_files))
+    
+    rows.sort(key=lambda row: (row['throughput_mbps'] is None,
+                               row['throughput_mbps'] or 0, row['file']))
+    return rows
+
+def write_batch_table(rows, output_file):
+    """Write the consolidated per-run table as CSV (failed files are skipped)"""
+    rows = [row for row in rows if 'error' not in row]
+    columns = (['file', 'throughput_mbps', 'ue', 'samples', 'trimmed_samples',
+                'mean', 'std', 'min'] + [f'p{p}' for p in BATCH_PERCENTILES]
+               + ['max', 'duration_s', 'achieved_mbps'])
+    with open(output_file, 'w') as f:
+        f.write(','.join(columns) + '\n')
+        for row in rows:
+            f.write(','.join('' if row[c] is None else str(row[c]) for c in columns) + '\n')
+    return output_file
+
+def plot_batch_comparison(rows, output_file):
+    """
+    Cross-run comparison: size distribution per run (box = p25..p75,
+    whiskers = p5..p95) and mean/median against offered throughput;
+    failed files are skipped
+    """
+    import matplotlib.pyplot as plt
+    rows = [row for row in rows if 'error' not in row]
+    import warnings
+    warnings.filterwarnings('ignore', category=UserWarning)
+    
+    labels = [f"{row['throughput_mbps']:g}M" if row['throughput_mbps'] is not None
+              else Path(row['file']).stem for row in rows]
+    
+    fig, (ax_box, ax_trend) = plt.subplots(1, 2, figsize=(16, 7))
+    fig.suptitle('Size Analysis Comparison - Batch', fontsize=16, fontweight='bold')
+    
+    boxes = [{
+        'label': label,
+        'whislo': row['p5'], 'q1': row['p25'], 'med': row['p50'],
+        'q3': row['p75'], 'whishi': row['p95'], 'mean': row['mean'],
+        'fliers': [],
+    } for label, row in zip(labels, rows)]
+    ax_box.bxp(boxes, showmeans=True, patch_artist=True,
+               boxprops=dict(facecolor='#90CAF9'), medianprops=dict(color='#1976D2', linewidth=2))
+    ax_box.set_xlabel('Offered Throughput', fontsize=12, fontweight='bold')
+    ax_box.set_ylabel('Size (bytes)', fontsize=12, fontweight='bold')
+    ax_box.set_title('Size Distribution per Run (p5/p25/p50/p75/p95, mean)', fontsize=12)
+    ax_box.grid(True, axis='y', alpha=0.3, linestyle='--')
+    ax_box.tick_params(axis='x', rotation=45)
+    
+    labelled = [row for row in rows if row['throughput_mbps'] is not None]
+    if labelled:
+        throughputs = [row['throughput_mbps'] for row in labelled]
+        ax_trend.fill_between(throughputs, [row['p25'] for row in labelled],
+                              [row['p75'] for row in labelled],
+                              color='#90CAF9', alpha=0.4, label='p25-p75')
+        ax_trend.plot(throughputs, [row['mean'] for row in labelled], 'o-',
+                      color='#1976D2', linewidth=2, label='Mean')
+        ax_trend.plot(throughputs, [row['p50'] for row in labelled], 's--',
+                      color='#E65100', linewidth=1.5, label='Median')
+        ax_trend.legend(loc='best', fontsize=10)
+    ax_trend.set_xlabel('Offered Throughput (Mbps)', fontsize=12, fontweight='bold')
+    ax_trend.set_ylabel('Size (bytes)', fontsize=12, fontweight='bold')
+    ax_trend.set_title('Size vs Offered Throughput', fontsize=12)
+    ax_trend.grid(True, alpha=0.3, linestyle='--')
+    
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
+    plt.close()
+    return output_file
+
+def main_batch(args, cache, profiler, throughput_bin=DEFAULT_THROUGHPUT_BIN):
+    """--batch: parse every matching file in parallel and compare the runs"""
+    log_files = expand_batch_inputs(args.batch)
+    if not log_files:
+        print(f"ERROR: No log files match {' '.join(args.batch)}")
+        sys.exit(1)
+    
+    print(f"Batch: {len(log_files)} file(s), {min(args.jobs or os.cpu_count() or 1, len(log_files))} worker(s)")
+    with profiler.stage('run_batch', items=len(log_files)):
+        rows = run_batch(log_files, cache, args.jobs, throughput_bin, args.mu, args.bits_per_unit)
+    
+    print("\n" + "="*70)
+    print("BATCH SUMMARY (top UE per file, after trimming)")
+    print("="*70)
+    print(f"{'File':<28}{'Mbps':>8}{'Achieved':>10}{'Samples':>10}{'Mean':>10}{'Median':>10}{'p95':>10}{'Max':>8}")
+    for row in rows:
+        throughput = f"{row['throughput_mbps']:g}" if row['throughput_mbps'] is not None else '-'
+        if 'error' in row:
+            print(f"{row['file']:<28}{throughput:>8}  ERROR: {row['error']}")
+            continue
+        achieved = f"{row['achieved_mbps']:.2f}" if row['achieved_mbps'] is not None else '-'
+        print(f"{row['file']:<28}{throughput:>8}{achieved:>10}{row['trimmed_samples']:>10}"
+              f"{row['mean']:>10.2f}{row['p50']:>10.1f}{row['p95']:>10.1f}{row['max']:>8}")
+    
+    for row in rows:
+        if 'achieved_error' in row:
+            print(f"   {row['file']}: achieved throughput skipped: {row['achieved_error']}")
+    
+    failed = sum('error' in row for row in rows)
+    if failed == len(rows):
+        print(f"\nERROR: None of the {len(rows)} file(s) could be parsed")
+        sys.exit(1)
+    if failed:
+        print(f"\n{failed} file(s) skipped")
+    
+    prefix = args.output or 'batch_comparison'
+    with profiler.stage('write_batch_table', items=len(rows)):
+        table_file = write_batch_table(rows, f"{prefix}.csv")
+    print(f"\nTable saved: {table_file}")
+    if not args.no_plot:
+        with profiler.stage('plot_batch_comparison', items=len(rows)):
+            chart_file = plot_batch_comparison(rows, f"{prefix}.png")
+        print(f"Chart saved: {chart_file}")
+    print(f"\n{'='*70}\n")
 
 def main():
     """
@@ -450,12 +1032,21 @@ Usage Examples:
   python3 log_parser.py ./measure-PRB-500M.txt --all-ues
   python3 log_parser.py ./measure-PRB.txt -t 125.5
   python3 log_parser.py ./measure-PRB.txt --separate
+  python3 log_parser.py ./measure-PRB.txt --window 10ms 100ms 1s
+  python3 log_parser.py ./measure-PRB-500M.txt --achieved --throughput-bin 10ms
   python3 log_parser.py ./measure-PRB.txt -o custom_name
+  python3 log_parser.py ./measure-PRB.txt --summary-only
+  python3 log_parser.py ./measure-PRB-500M.txt --achieved --no-plot
+  python3 log_parser.py --batch './measure-PRB-*M.txt'
+  python3 log_parser.py --batch ./campaign/ -j 8 -o campaign
+  python3 log_parser.py ./measure-PRB-500M.txt.zst
 
 Features:
   - Auto-detect throughput from filename (e.g., 500M)
   - Auto-trim stable regions at start/end
   - Generate consistent visualizations
+  - Cache parsed results on disk (re-runs skip parsing)
+  - Read .gz/.xz/.zst logs directly (streamed, no decompressed copy)
 
 Automatic throughput extraction:
   measure-PRB-500M.txt  -> 500 Mbps
@@ -468,10 +1059,28 @@ Options:
   -t, --throughput  Override auto-detected throughput (Mbps)
   --separate      Output separate PNG for each UE
   -o, --output    Custom output filename (without extension)
+  --no-cache      Re-parse instead of loading the cached result
+  --clear-cache   Delete all cached results first
+  --summary-only  Print the summary in constant memory (no charts, no cache)
+  --no-plot       Skip charts (matplotlib is never imported); the summary
+                  and CSV tables are still written
+  --batch         Glob(s)/directory: parse all files in parallel, write
+                  <output>.csv and <output>.png (default: batch_comparison)
+  -j, --jobs      Worker processes for --batch (default: CPU count)
+  --max-points    Points drawn per series, spikes kept (0 = all, default: 5000)
+  -w, --window    Rolling mean windows: sample counts (5) or durations
+                  (500us, 10ms, 1s); several allowed (default: 5)
+  --achieved      Reconstruct achieved throughput per slot/time bin for
+                  the cell and each UE; writes <output>_achieved.csv/.png
+  --throughput-bin  Time bin for --achieved (default: 100ms)
+  --bits-per-unit   Bits per logged Size unit for --achieved (default: 8, bytes)
+  --mu            Numerology for the slot clock (default: 1)
+  --profile       Time each stage (wall/CPU, items, peak memory) and write
+                  a JSON trace; --profile-chrome adds a chrome://tracing file
         '''
     )
     
-    parser.add_argument('log_file', help='Path to log file')
+    parser.add_argument('log_file', nargs='?', help='Path to log file')
     parser.add_argument('--top-only', action='store_true', default=True,
                        help='Output only UE with most data (default)')
     parser.add_argument('--all-ues', action='store_true',
@@ -482,23 +1091,79 @@ Options:
                        help='Output separate PNG for each UE')
     parser.add_argument('-o', '--output', type=str, default=None,
                        help='Custom output filename prefix')
+    parser.add_argument('--summary-only', action='store_true',
+                       help='Stream the log twice and print the summary only (constant memory)')
+    parser.add_argument('--no-plot', action='store_true',
+                       help='Skip charts and the matplotlib import; print the summary and write CSV tables only')
+    parser.add_argument('--batch', nargs='+', metavar='PATTERN', default=None,
+                       help='Glob patterns, directories or files to compare across runs')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                       help='Worker processes for --batch (default: CPU count)')
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS,
+                       help=f'Downsample each plotted series to about this many points (0 = no limit, default: {DEFAULT_MAX_POINTS})')
+    parser.add_argument('-w', '--window', nargs='+', default=list(DEFAULT_WINDOWS), metavar='WINDOW',
+                       help='Rolling mean windows, sample counts (5) or durations (10ms, 1s) (default: 5)')
+    parser.add_argument('--achieved', action='store_true',
+                       help='Reconstruct achieved throughput from the grant sizes and plot it against the offered load')
+    parser.add_argument('--throughput-bin', default='100ms', metavar='DURATION',
+                       help='Time bin for --achieved, e.g. 10ms or 1s (default: 100ms)')
+    parser.add_argument('--bits-per-unit', type=float, default=DEFAULT_BITS_PER_UNIT,
+                       help=f'Bits per logged Size unit for --achieved (default: {DEFAULT_BITS_PER_UNIT}, i.e. bytes)')
+    parser.add_argument('--mu', type=int, default=DEFAULT_MU,
+                       help=f'Numerology: slots per frame and slot duration (default: {DEFAULT_MU})')
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
+    try:
+        parse_windows(args.window)
+        throughput_bin = parse_windows([args.throughput_bin])[0].seconds
+    except ValueError as e:
+        parser.error(str(e))
+    if throughput_bin is None:
+        parser.error('--throughput-bin must be a duration, e.g. 100ms')
+    
+    if args.batch is None and args.log_file is None:
+        parser.error('log_file is required unless --batch is given')
+    
+    profiler = profiler_from_args(args, 'log_parser.py')
+    
     print(f"\n{'='*70}")
     print("Log Parser for UE Size Analysis v3")
     print(f"{'='*70}")
+    
+    if args.batch is not None:
+        main_batch(args, cache_from_args(args), profiler, throughput_bin)
+        return
+    
     print(f"Log file: {args.log_file}")
     
+    if args.all_ues:
+        args.top_only = False
+    
+    if args.summary_only:
+        print("\nSummarizing log file (streaming)...")
+        with profiler.stage('summarize_log_file'):
+            summarize_log_file(args.log_file, top_only=args.top_only, all_ues=args.all_ues)
+        print(f"\n{'='*70}\n")
+        return
+    
     # Parse log file
     print(f"\nParsing log file...")
-    ue_data = parse_log_file(args.log_file)
+    cache = cache_from_args(args)
+    with profiler.stage('parse_log_file') as stage:
+        try:
+            ue_data = cache.cached(args.log_file, 'prb-size', PARSER_VERSION,
+                                   lambda: parse_log_file(args.log_file),
+                                   encode_ue_data, decode_ue_data)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        stage.items = sum(len(columns) for columns in ue_data.values())
     print(f"Found {len(ue_data)} UE(s)")
     
     # Determine which UEs to plot
-    if args.all_ues:
-        args.top_only = False
-    
     ues_to_plot = get_ues_to_plot(ue_data, top_only=args.top_only, all_ues=args.all_ues)
     
     # Auto-extract throughput if not provided
@@ -507,42 +1172,67 @@ Options:
     if throughput is not None:
         print(f"Throughput: {throughput} Mbps (from {'command' if args.throughput else 'filename'})")
     
-    # Print summary (with trimming info)
-    print_summary(ue_data, ues_to_plot)
+    # Trimming, statistics and smoothing are computed once per UE and
+    # shared by the summary and the charts (lazily, so the first use pays)
+    with profiler.stage('analyze_ues', items=len(ues_to_plot)):
+        analyses = analyze_ues(ue_data, ues_to_plot, args.window)
+        
+        # Print summary (with trimming info)
+        print_summary(analyses.values())
     
     # Generate output filename
     filename_prefix = generate_output_filename(args.log_file, args.throughput, args.output)
     
     # Plot
-    print(f"\nGenerating chart...")
-    
-    if args.separate or len(ues_to_plot) == 1:
-        # Single UE or separate mode
-        output_files = []
-        for ue_id in ues_to_plot:
-            output_file = plot_single_ue(
-                ue_id, 
-                ue_data[ue_id],
-                throughput=throughput,
-                filename_prefix=filename_prefix,
-                separate=True
-            )
-            if output_file:
-                output_files.append(output_file)
+    if not args.no_plot:
+        print(f"\nGenerating chart...")
         
-        if output_files:
-            print(f"\nChart saved:")
-            for f in output_files:
-                print(f"   {f}")
-    else:
-        # Multiple UEs combined
-        output_file = plot_all_ues_combined(
-            ue_data,
-            ues_to_plot,
-            throughput=throughput,
-            filename_prefix=filename_prefix
-        )
-        print(f"\nChart saved: {output_file}")
+        if args.separate or len(ues_to_plot) == 1:
+            # Single UE or separate mode
+            output_files = []
+            with profiler.stage('plot_single_ue', items=len(analyses)):
+                for analysis in analyses.values():
+                    output_file = plot_single_ue(
+                        analysis,
+                        throughput=throughput,
+                        filename_prefix=filename_prefix,
+                        separate=True,
+                        max_points=args.max_points
+                    )
+                    if output_file:
+                        output_files.append(output_file)
+        
+            if output_files:
+                print(f"\nChart saved:")
+                for f in output_files:
+                    print(f"   {f}")
+        else:
+            # Multiple UEs combined
+            with profiler.stage('plot_all_ues_combined', items=len(analyses)):
+                output_file = plot_all_ues_combined(
+                    list(analyses.values()),
+                    throughput=throughput,
+                    filename_prefix=filename_prefix,
+                    max_points=args.max_points
+                )
+            print(f"\nChart saved: {output_file}")
+    
+    if args.achieved:
+        with profiler.stage('achieved_throughput') as stage:
+            try:
+                series = achieved_throughput(ue_data, throughput_bin, args.mu, args.bits_per_unit)
+            except ValueError as e:
+                print(f"ERROR: {e}")
+                sys.exit(1)
+            stage.items = len(series.slot_bits) if series is not None else 0
+        print_throughput_summary(series, throughput)
+        with profiler.stage('write_throughput_table'):
+            table_file = write_throughput_table(series, f"{filename_prefix}_achieved.csv")
+        print(f"\nThroughput table saved: {table_file}")
+        if not args.no_plot:
+            with profiler.stage('plot_achieved_throughput'):
+                chart_file = plot_achieved_throughput(series, throughput, f"{filename_prefix}_achieved.png")
+            print(f"Throughput chart saved: {chart_file}")
     
     print(f"\n{'='*70}\n")
 
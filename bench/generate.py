@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic logs for the parser benchmarks
+
+Formats (one generator per log format the scripts parse):
+  prb     [ts] frame=X slot=Y UE xxxx: Size N            (PRB/log_parser.py)
+  events  [ts] frame=X slot=Y t1..t5 / t4-<category>     (t1-t4/script.py, t1-t5/merge.py)
+  vnf     VNF Jitter/Delays, VNF-TICK sync and noise lines (t1-t5/vnf_pnf_log_parser.py)
+  pnf     gdb-wrapped PHY [PNF-DELAY] lines with ANSI codes (t1-t5/vnf_pnf_log_parser.py)
+
+Lines are produced in chunks of CHUNK_LINES, each from its own generator
+seeded with (seed, chunk number), so a file is identical across runs and
+machines and a smaller size is a prefix of a larger one (apart from the
+fixed header). Every slot emits a fixed number of lines, which keeps the
+slot numbering independent of the chunking.
+
+Usage:
+  python bench/generate.py prb 1M /tmp/prb-1M.txt
+  python bench/generate.py pnf 100k pnf.log --seed 3
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+
+CHUNK_LINES = 120_000
+SLOTS_PER_FRAME = 20
+SFN_PERIOD = 1024
+SLOT_SECONDS = 0.0005
+
+_SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000, 'g': 1_000_000_000}
+
+def parse_size(text):
+    """'10k' / '1M' / '100M' / '2500' -> line count"""
+    text = text.strip()
+    scale = _SIZE_SUFFIXES.get(text[-1:].lower())
+    value = float(text[:-1]) if scale else float(text)
+    n = int(value * (scale or 1))
+    if n <= 0:
+        raise ValueError(f'Invalid size: {text}')
+    return n
+
+def format_size(n):
+    """Inverse of parse_size for round numbers (1000000 -> '1M')"""
+    for suffix, scale in (('G', 1_000_000_000), ('M', 1_000_000), ('k', 1_000)):
+        if n >= scale and n % scale == 0:
+            return f'{n // scale}{suffix}'
+    return str(n)
+
+def _frame_slot(abs_slot):
+    return (abs_slot // SLOTS_PER_FRAME) % SFN_PERIOD, abs_slot % SLOTS_PER_FRAME
+
+def _prb_chunk(rng, first_slot, n_slots):
+    """One scheduling grant per slot, a handful of UEs, sizes up to 273 PRBs"""
+    abs_slot = np.arange(first_slot, first_slot + n_slots)
+    frame, slot = _frame_slot(abs_slot)
+    ns = 1_763_534_981_000_000_000 + abs_slot * 500_000 + rng.integers(0, 200, n_slots)
+    ue = rng.choice(np.array(['1044', '1020', '103c', '2f1a']), n_slots, p=[0.55, 0.25, 0.15, 0.05])
+    size = np.where(rng.random(n_slots) < 0.1, 5, rng.integers(1, 274, n_slots))
+    return [f'[{t // 1_000_000_000}.{t % 1_000_000_000:09d}] frame={f} slot={s} UE {u}: Size {z}'
+            for t, f, s, u, z in zip(ns.tolist(), frame.tolist(), slot.tolist(), ue.tolist(), size.tolist())]
+
+EVENT_LINES_PER_SLOT = 6
+
+def _events_chunk(rng, first_slot, n_slots):
+    """
+    t1, t2, t3, two t4-<category> and t5 per slot; slot % 5 == 4 is an UL
+    slot (DDDSU) and logs t4-ultti/t4-uldci, the others t4-dltti/t4-txdata
+    """
+    abs_slot = np.arange(first_slot, first_slot + n_slots)
+    frame, slot = _frame_slot(abs_slot)
+    start = 1000.0 + abs_slot * SLOT_SECONDS
+    steps = np.cumsum(rng.gamma(2.0, 8e-6, (n_slots, EVENT_LINES_PER_SLOT)), axis=1)
+    lines = []
+    for base, f, s, ul, offsets in zip(start.tolist(), frame.tolist(), slot.tolist(),
+                                       (abs_slot % 5 == 4).tolist(), steps.tolist()):
+        names = ('t1', 't2', 't3', 't4-ultti', 't4-uldci', 't5') if ul else \
+                ('t1', 't2', 't3', 't4-dltti', 't4-txdata', 't5')
+        lines.extend(f'[{base + offset:.6f}] frame={f} slot={s} {name}'
+                     for name, offset in zip(names, offsets))
+    return lines
+
+VNF_LINES_PER_SLOT = 2
+
+def _vnf_chunk(rng, first_slot, n_slots):
+    """A Jitter/Delays line per slot, then a VNF-TICK sync line every 20 slots or a noise line"""
+    abs_slot = np.arange(first_slot, first_slot + n_slots)
+    frame, slot = _frame_slot(abs_slot)
+    ts = 135014.0 + abs_slot * SLOT_SECONDS
+    jitter = rng.integers(0, 250, (n_slots, 4))
+    delay = rng.integers(-400, 400, (n_slots, 4))
+    lines = []
+    for i, (t, f, s) in enumerate(zip(ts.tolist(), frame.tolist(), slot.tolist())):
+        j, d = jitter[i].tolist(), delay[i].tolist()
+        lines.append(f'{t:.6f} [W] 3623876160: vnf_delay_handle_timing_info: [VNF-TIMING] High latency: '
+                     f'Jitter(DL={j[0]} UL={j[1]} ULDCI={j[2]} TxData={j[3]} µs) '
+                     f'Delays(DL={d[0]} UL={d[1]} ULDCI={d[2]} TxData={d[3]} µs)')
+        if s == 0:
+            lines.append(f'{t + 0.00001:.6f} [I] 3615483456: vnf_tick_thread: [VNF-TICK] '
+                         f'Applying slot synchronization adjustment: 0 (from {f}.{s})')
+        else:
+            lines.append(f'{t + 0.00002:.6f} [I] 3623876160: vnf_nr_p7_message_pump: '
+                         f'P7 message received for {f}.{s}')
+    return lines
+
+PNF_LINES_PER_SLOT = 3
+PNF_HEADER = [
+    'GNU gdb (GDB) Red Hat Enterprise Linux 10.2-10.el9',
+    'Copyright (C) 2021 Free Software Foundation, Inc.',
+    'This GDB was configured as "x86_64-redhat-linux-gnu".',
+    '[Thread debugging using libthread_db enabled]',
+    'Using host libthread_db library "/lib64/libthread_db.so.1".',
+]
+
+def _pnf_chunk(rng, first_slot, n_slots):
+    """DL_TTI and TX_Data [PNF-DELAY] lines per slot (no timestamp, ANSI colours) and a PHY/HW noise line"""
+    abs_slot = np.arange(first_slot, first_slot + n_slots)
+    frame, slot = _frame_slot(abs_slot)
+    delta = rng.integers(-4000, 4000, (n_slots, 2))
+    noise = rng.integers(0, 3, n_slots)
+    lines = []
+    for i, (f, s) in enumerate(zip(frame.tolist(), slot.tolist())):
+        d = delta[i].tolist()
+        dl = 'TOO EARLY' if d[0] < 0 else 'TOO LATE'
+        tx = 'TOO EARLY' if d[1] < 0 else 'TOO LATE'
+        lines.append(f'\x1b[0m\x1b[93m[PHY]   [PNF-DELAY] DL_TTI for {f}.{s} arrived {dl} (delta={d[0]} µs).')
+        lines.append(f'\x1b[0m\x1b[93m[PHY]   [PNF-DELAY] TX_Data for {f}.{s} arrived {tx} '
+                     f'(delta={d[1]} µs). VNF timing may need adjustment.')
+        if noise[i] == 0:
+            lines.append(f'\x1b[0m\x1b[93m[PHY]   {f:4d}. {s} No valid PDSCHs to generate (all missing PDUs)')
+        elif noise[i] == 1:
+            lines.append(f'\x1b[0m\x1b[1;31m[PHY]   PRACH slot exhaustion at {f}.{s}! All 8 slots occupied. '
+                         f'Searching for stale entries to free')
+        else:
+            lines.append(f'\x1b[0m[HW]   [o_du0][pusch0  {s} prach0   0]')
+    return lines
+
+# format -> (chunk generator, lines per slot, header lines)
+FORMATS = {
+    'prb': (_prb_chunk, 1, []),
+    'events': (_events_chunk, EVENT_LINES_PER_SLOT, []),
+    'vnf': (_vnf_chunk, VNF_LINES_PER_SLOT, []),
+    'pnf': (_pnf_chunk, PNF_LINES_PER_SLOT, PNF_HEADER),
+}
+
+def iter_chunks(fmt, n_lines, seed=0):
+    """Yield lists of lines, n_lines in total including the header"""
+    chunk, per_slot, header = FORMATS[fmt]
+    if CHUNK_LINES % per_slot:
+        raise ValueError(f'CHUNK_LINES must be a multiple of {per_slot}')
+    header = header[:n_lines]
+    if header:
+        yield header
+    remaining = n_lines - len(header)
+    index = 0
+    while remaining > 0:
+        rng = np.random.default_rng([seed, index])
+        lines = chunk(rng, index * CHUNK_LINES // per_slot, CHUNK_LINES // per_slot)
+        yield lines[:remaining]
+        remaining -= min(remaining, len(lines))
+        index += 1
+
+def generate(fmt, n_lines, path, seed=0):
+    """
+    Write n_lines of fmt to path (atomically, via a temporary file)
+
+    Returns:
+        int: File size in bytes
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for lines in iter_chunks(fmt, n_lines, seed):
+            f.write('\n'.join(lines))
+            f.write('\n')
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+def ensure(fmt, n_lines, data_dir, seed=0):
+    """Path of the cached synthetic file, generating it on first use"""
+    path = Path(data_dir) / f'{fmt}-{format_size(n_lines)}-s{seed}.log'
+    if not path.exists():
+        print(f'Generating {path} ...', flush=True)
+        generate(fmt, n_lines, path, seed)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a deterministic synthetic log')
+    parser.add_argument('format', choices=sorted(FORMATS))
+    parser.add_argument('size', help='Number of lines, e.g. 10k, 1M, 100M')
+    parser.add_argument('output', help='Output file')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    try:
+        n_lines = parse_size(args.size)
+    except ValueError as e:
+        parser.error(str(e))
+    size = generate(args.format, n_lines, args.output, args.seed)
+    print(f'{args.output}: {n_lines} lines, {size / 1e6:.1f} MB')
+
+if __name__ == '__main__':
+    main()
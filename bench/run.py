@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark suite
+
+Runs each parser entry point on synthetic logs (bench/generate.py) of every
+requested size and records lines/s, MB/s and peak RSS. Each measurement runs
+in a fresh interpreter so peak RSS belongs to that run alone. Inputs are read
+once by the parent first, so every run starts with the file in the OS cache,
+and pandas is imported before the clock starts: the numbers are parser
+throughput, not disk speed or the (lazy) import cost.
+
+Targets:
+  prb      PRB/log_parser.py parse_log_file
+  events   t1-t4/script.py parse_log_file + organize_by_frame_slot
+           + calculate_time_differences (phases are reported separately)
+  vnf      t1-t5/vnf_pnf_log_parser.py VNFPNFLogParser.parse on a VNF log
+  pnf      t1-t5/vnf_pnf_log_parser.py VNFPNFLogParser.parse on a PNF log
+  merge    t1-t5/merge.py merge_and_sort_files on two event logs of size/2
+
+Results are written as JSON (meta: commit, Python, NumPy, host; results:
+one record per target and size) and can be compared across commits:
+
+  python bench/run.py --sizes 10k,100k,1M --output before.json
+  python bench/run.py --sizes 10k,100k,1M --output after.json --baseline before.json
+  python bench/run.py --compare before.json after.json
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+from generate import ensure, format_size, parse_size
+
+DEFAULT_SIZES = '10k,100k,1M'
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / 'nfapi-bench'
+
+# Imported before timing when installed (the scripts load them lazily)
+PRELOAD = ('numpy', 'pandas')
+
+# target -> (input format, script path relative to the repo root)
+TARGETS = {
+    'prb': ('prb', 'PRB/log_parser.py'),
+    'events': ('events', 't1-t4/script.py'),
+    'vnf': ('vnf', 't1-t5/vnf_pnf_log_parser.py'),
+    'pnf': ('pnf', 't1-t5/vnf_pnf_log_parser.py'),
+    'merge': ('events', 't1-t5/merge.py'),
+}
+
+def load_script(relative_path):
+    """Import a repo script by path, with its directory on sys.path for sibling imports"""
+    path = ROOT / relative_path
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def _run_prb(module, paths):
+    module.parse_log_file(str(paths[0]))
+
+def _run_events(module, paths):
+    phases = {}
+    start = time.perf_counter()
+    entries = module.parse_log_file(str(paths[0]))
+    phases['parse'] = time.perf_counter() - start
+    start = time.perf_counter()
+    data = module.organize_by_frame_slot(entries)
+    phases['organize'] = time.perf_counter() - start
+    start = time.perf_counter()
+    module.calculate_time_differences(data)
+    phases['calculate'] = time.perf_counter() - start
+    return phases
+
+def _run_vnf_pnf(module, paths):
+    module.VNFPNFLogParser(str(paths[0])).parse()
+
+def _run_merge(module, paths):
+    with tempfile.TemporaryDirectory() as tmp:
+        module.merge_and_sort_files(str(paths[0]), str(paths[1]), os.path.join(tmp, 'merged.txt'))
+
+RUNNERS = {
+    'prb': _run_prb,
+    'events': _run_events,
+    'vnf': _run_vnf_pnf,
+    'pnf': _run_vnf_pnf,
+    'merge': _run_merge,
+}
+
+def child(target, paths):
+    """Measure one run in this process and print the record as JSON"""
+    module = load_script(TARGETS[target][1])
+    for name in PRELOAD:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(name)
+    baseline_rss = peak_rss_mb()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        phases = RUNNERS[target](module, paths)
+        seconds = time.perf_counter() - start
+
+    json.dump({'seconds': seconds, 'peak_rss_mb': peak_rss_mb(),
+               'startup_rss_mb': baseline_rss, 'phases': phases or {}}, sys.stdout)
+
+def input_paths(target, n_lines, data_dir, seed=0):
+    fmt = TARGETS[target][0]
+    if target == 'merge':
+        half = max(1, n_lines // 2)
+        return [ensure(fmt, half, data_dir, seed), ensure(fmt, n_lines - half, data_dir, seed + 1)]
+    return [ensure(fmt, n_lines, data_dir, seed)]
+
+def warm_page_cache(paths):
+    """Read the inputs once so the timed runs do not depend on the disk"""
+    buffer = bytearray(1 << 20)
+    for path in paths:
+        with open(path, 'rb', buffering=0) as f:
+            while f.readinto(buffer):
+                pass
+
+def measure(target, n_lines, data_dir, repeat=1, seed=0):
+    """Best of repeat runs, each in its own interpreter"""
+    paths = input_paths(target, n_lines, data_dir, seed)
+    warm_page_cache(paths)
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, __file__, '--child', target] + [str(p) for p in paths],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f'{target} {format_size(n_lines)} failed:\n{proc.stderr}')
+        runs.append(json.loads(proc.stdout))
+    best = min(runs, key=lambda run: run['seconds'])
+
+    size = sum(path.stat().st_size for path in paths)
+    return {
+        'target': target,
+        'size': format_size(n_lines),
+        'lines': n_lines,
+        'bytes': size,
+        'seconds': round(best['seconds'], 6),
+        'lines_per_s': round(n_lines / best['seconds']),
+        'mb_per_s': round(size / 1e6 / best['seconds'], 2),
+        'peak_rss_mb': round(max(run['peak_rss_mb'] for run in runs), 1),
+        'startup_rss_mb': round(best['startup_rss_mb'], 1),
+        'phases': {name: round(value, 6) for name, value in best['phases'].items()},
+        'repeat': repeat,
+    }
+
+def run_metadata():
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    import numpy as np
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def print_results(results):
+    print(f"\n{'target':<8}{'size':>7}{'lines':>12}{'MB':>9}{'seconds':>10}"
+          f"{'lines/s':>13}{'MB/s':>9}{'peak MB':>9}")
+    for row in results:
+        print(f"{row['target']:<8}{row['size']:>7}{row['lines']:>12}{row['bytes'] / 1e6:>9.1f}"
+              f"{row['seconds']:>10.3f}{row['lines_per_s']:>13,}{row['mb_per_s']:>9.1f}{row['peak_rss_mb']:>9.1f}")
+
+def compare(baseline, current):
+    """Print lines/s and peak RSS of current relative to baseline (matching target and size)"""
+    before = {(row['target'], row['size']): row for row in baseline['results']}
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('date')})")
+    print(f"{'target':<8}{'size':>7}{'lines/s before':>16}{'after':>13}{'speedup':>9}{'peak MB':>16}")
+    for row in current['results']:
+        old = before.get((row['target'], row['size']))
+        if old is None:
+            continue
+        print(f"{row['target']:<8}{row['size']:>7}{old['lines_per_s']:>16,}{row['lines_per_s']:>13,}"
+              f"{row['lines_per_s'] / old['lines_per_s']:>8.2f}x"
+              f"{old['peak_rss_mb']:>8.1f} -> {row['peak_rss_mb']:<6.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the log parsers on synthetic logs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python bench/run.py
+  python bench/run.py --sizes 10k,1M,100M --targets prb,pnf --repeat 3
+  python bench/run.py --output after.json --baseline before.json
+  python bench/run.py --compare before.json after.json
+        '''
+    )
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'Comma-separated line counts, e.g. 10k,1M,100M (default: {DEFAULT_SIZES})')
+    parser.add_argument('--targets', default=','.join(TARGETS),
+                        help=f"Comma-separated targets (default: {','.join(TARGETS)})")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per measurement, the fastest is kept (default: 1)')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help=f'Where generated logs are kept between runs (default: {DEFAULT_DATA_DIR})')
+    parser.add_argument('--seed', type=int, default=0, help='Generator seed (default: 0)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Results JSON (default: bench-<commit>.json)')
+    parser.add_argument('--baseline', default=None, metavar='JSON',
+                        help='Earlier results to compare against after the run')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='Only compare two results files')
+    parser.add_argument('--child', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1:])
+        return
+
+    if args.compare:
+        before, after = (json.loads(Path(path).read_text()) for path in args.compare)
+        compare(before, after)
+        return
+
+    try:
+        sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"Unknown target(s): {', '.join(unknown)} (choose from {', '.join(TARGETS)})")
+
+    meta = run_metadata()
+    results = []
+    for n_lines in sizes:
+        for target in targets:
+            row = measure(target, n_lines, args.data_dir, args.repeat, args.seed)
+            print(f"{target:<8}{row['size']:>7}  {row['seconds']:8.3f} s  {row['lines_per_s']:>12,} lines/s  "
+                  f"{row['mb_per_s']:7.1f} MB/s  peak {row['peak_rss_mb']:.1f} MB", flush=True)
+            results.append(row)
+
+    report = {'meta': meta, 'results': results}
+    output = args.output or f"bench-{meta['commit'] or 'unknown'}.json"
+    Path(output).write_text(json.dumps(report, indent=2) + '\n')
+    print_results(results)
+    print(f'\nResults saved: {output}')
+
+    if args.baseline:
+        compare(json.loads(Path(args.baseline).read_text()), report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the nFAPI debugging scripts (PRB/, t1-t4/, t1-t5/)
+"""
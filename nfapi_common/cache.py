@@ -0,0 +1,144 @@
+"""
+Persistent on-disk cache of parsed results
+
+Entries are .npz files named by a hash of (absolute path, size, mtime,
+parser name, parser version), so editing a log or bumping a parser version
+simply misses the old entry. A hit refreshes the entry's mtime and the
+least recently used entries are evicted once the cache exceeds its size cap.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    'NFAPI_CACHE_DIR', Path.home() / '.cache' / 'nfapi-debugger'))
+DEFAULT_MAX_MB = float(os.environ.get('NFAPI_CACHE_MAX_MB', 1024))
+
+class ParseCache:
+    """
+    Cache of parsed results stored as dicts of NumPy arrays
+
+    Args:
+        cache_dir: Directory holding the .npz entries
+        max_mb: Size cap; least recently used entries are evicted beyond it
+        enabled: When False every lookup misses and nothing is written
+    """
+
+    def __init__(self, cache_dir=None, max_mb=None, enabled=True):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_bytes = int((max_mb if max_mb is not None else DEFAULT_MAX_MB) * 1024 * 1024)
+        self.enabled = enabled
+
+    def entry_path(self, path, parser, version):
+        """
+        Cache file for the current identity of path
+
+        path may also be a tuple of paths (e.g. a VNF/PNF log pair); the
+        entry then depends on every one of them
+        """
+        paths = (path,) if isinstance(path, (str, os.PathLike)) else tuple(path)
+        files = []
+        for p in paths:
+            st = os.stat(p)
+            files.append(f'{Path(p).resolve()}|{st.st_size}|{st.st_mtime_ns}')
+        identity = '|'.join(files) + f'|{parser}|{version}'
+        digest = hashlib.sha1(identity.encode('utf-8')).hexdigest()
+        return self.cache_dir / f'{parser}-{digest}.npz'
+
+    def load(self, entry):
+        """Return the arrays stored in entry, or None on a miss"""
+        try:
+            with np.load(entry, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt or truncated entry: drop it and re-parse
+            entry.unlink(missing_ok=True)
+            return None
+        os.utime(entry)
+        return arrays
+
+    def store(self, entry, arrays):
+        """Write arrays to entry atomically, then enforce the size cap"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, entry)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def cached(self, path, parser, version, parse, encode, decode):
+        """
+        Load path's parsed result from the cache, or parse and store it
+
+        Args:
+            parse: Callable returning the parsed result
+            encode: result -> dict of NumPy arrays
+            decode: dict of NumPy arrays -> result
+        """
+        if not self.enabled:
+            return parse()
+        try:
+            entry = self.entry_path(path, parser, version)
+        except OSError:
+            # Let the parser report missing/unreadable files its own way
+            return parse()
+
+        arrays = self.load(entry)
+        if arrays is not None:
+            print(f"✓ 使用快取的解析結果: {path}")
+            return decode(arrays)
+        result = parse()
+        self.store(entry, encode(result))
+        return result
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        entries = []
+        for entry in self.cache_dir.glob('*.npz'):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        """Remove every cache entry"""
+        for pattern in ('*.npz', '*.tmp'):
+            for entry in self.cache_dir.glob(pattern):
+                entry.unlink(missing_ok=True)
+        print(f"✓ 已清除快取: {self.cache_dir}")
+
+def add_cache_arguments(parser):
+    """Register --no-cache/--clear-cache/--cache-dir/--cache-max-mb on an argparse parser"""
+    group = parser.add_argument_group('解析快取')
+    group.add_argument('--no-cache', action='store_true',
+                       help='不使用解析結果快取')
+    group.add_argument('--clear-cache', action='store_true',
+                       help='執行前清除所有快取')
+    group.add_argument('--cache-dir', default=None,
+                       help=f'快取目錄 (預設: $NFAPI_CACHE_DIR 或 {DEFAULT_CACHE_DIR})')
+    group.add_argument('--cache-max-mb', type=float, default=None,
+                       help=f'快取大小上限 (MB, 超過時刪除最久未用的項目, 預設: {DEFAULT_MAX_MB:g})')
+    return group
+
+def cache_from_args(args):
+    """Build a ParseCache from the arguments added by add_cache_arguments"""
+    cache = ParseCache(args.cache_dir, args.cache_max_mb, enabled=not args.no_cache)
+    if args.clear_cache:
+        cache.clear()
+    return cache
@@ -0,0 +1,164 @@
+"""
+Clock offset and drift between two hosts, estimated from shared slots
+
+The VNF logs a monotonic-style timestamp (135014.649136) while the PNF and
+measure logs may use epoch time, so their timelines are offset by an unknown
+amount and drift apart slowly. Both sides do agree on the slot number, so
+every slot seen on both sides gives one pair of host times for (nearly) the
+same instant. A robust straight line through those pairs
+
+    dst_time - src_time = offset + drift * (src_time - ref)
+
+maps src timestamps into the dst timebase. The fit is Theil-Sen (median of
+pairwise slopes, drawn at random when there are too many pairs), so wrong
+pairings and scheduling hiccups do not pull the line.
+
+The offset absorbs the typical latency between the paired events: events that
+share a slot on different hosts happen a transport delay apart, not at once.
+"""
+import numpy as np
+
+from .slot_index import DEFAULT_MU, SFN_PERIOD, best_period_offset, slot_duration, slots_per_frame
+
+# Version of cached ClockFit results (merge.py --align-clocks and the VNF/PNF
+# parser). Bump whenever this module, slot_join.fit_pnf_clock or merge.py's
+# slot sampling changes what a fit returns, so stale fits are not reused
+CLOCK_FIT_VERSION = 4
+
+# Below this many points every pairwise slope is used; above it a random sample
+MAX_SLOPE_PAIRS = 200000
+# Fewer matched events than this are not trusted to move a whole timeline
+MIN_PAIRS = 10
+
+class ClockFit:
+    """
+    Linear mapping from src host time to dst host time
+
+    Attributes:
+        offset: dst - src at the reference time (seconds)
+        drift: Rate difference (seconds per second; 1e-6 = 1 ppm)
+        ref: Reference src time the offset is given at
+        n_pairs: Number of matched events behind the fit
+        residual_mad: Median absolute residual (seconds)
+    """
+
+    FIELDS = ('offset', 'drift', 'ref', 'n_pairs', 'residual_mad')
+
+    def __init__(self, offset=np.nan, drift=0.0, ref=0.0, n_pairs=0, residual_mad=np.nan):
+        self.offset = float(offset)
+        self.drift = float(drift)
+        self.ref = float(ref)
+        self.n_pairs = int(n_pairs)
+        self.residual_mad = float(residual_mad)
+
+    @property
+    def ok(self):
+        """True when the fit rests on at least MIN_PAIRS matched events"""
+        return self.n_pairs >= MIN_PAIRS and np.isfinite(self.offset)
+
+    def apply(self, times):
+        """src timestamps -> dst timebase (unchanged when there is no fit)"""
+        times = np.asarray(times, dtype=np.float64)
+        if not self.ok:
+            return times
+        return times + self.offset + self.drift * (times - self.ref)
+
+    def to_arrays(self):
+        """dict of NumPy arrays, for ParseCache"""
+        return {field: np.array(getattr(self, field)) for field in self.FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(**{field: arrays[field].item() for field in cls.FIELDS})
+
+    def __repr__(self):
+        if not self.ok:
+            return f'ClockFit(n={self.n_pairs}, not enough pairs)'
+        return (f'ClockFit(offset={self.offset:.6f}s, drift={self.drift * 1e6:.3f}ppm, '
+                f'n={self.n_pairs}, mad={self.residual_mad * 1e6:.1f}us)')
+
+def theil_sen(x, y, max_pairs=MAX_SLOPE_PAIRS, seed=0):
+    """
+    Robust line y = intercept + slope * x
+
+    Returns:
+        tuple: (slope, intercept); slope is 0 when x has no spread
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n * (n - 1) // 2 <= max_pairs:
+        i, j = np.triu_indices(n, k=1)
+    else:
+        i, j = np.random.default_rng(seed).integers(n, size=(2, max_pairs))
+    dx = x[j] - x[i]
+    spread = dx != 0
+    slope = float(np.median((y[j] - y[i])[spread] / dx[spread])) if spread.any() else 0.0
+    return slope, float(np.median(y - slope * x))
+
+def _first_per_slot(times, slots):
+    """Earliest time of each distinct slot, sorted by slot"""
+    if not len(slots):
+        return times, slots
+    order = np.lexsort((times, slots))
+    slots, times = slots[order], times[order]
+    first = np.r_[True, slots[1:] != slots[:-1]]
+    return times[first], slots[first]
+
+def pair_slot_times(src_times, src_slots, dst_times, dst_slots, mu=DEFAULT_MU, tolerance=0):
+    """
+    Host-time pairs for slots seen on both sides
+
+    Each side is reduced to the earliest event per absolute slot, the SFN
+    period offset between the two unwrappings is estimated, and every src slot
+    is paired with the nearest dst slot within tolerance. The dst time is
+    moved by the slot gap so both times refer to the src slot.
+
+    Returns:
+        tuple: (src_times, dst_times) arrays of equal length
+    """
+    src_times = np.asarray(src_times, dtype=np.float64)
+    dst_times = np.asarray(dst_times, dtype=np.float64)
+    src_slots = np.asarray(src_slots, dtype=np.int64)
+    dst_slots = np.asarray(dst_slots, dtype=np.int64)
+    src_valid = np.isfinite(src_times)
+    dst_valid = np.isfinite(dst_times)
+    src_times, src_slots = _first_per_slot(src_times[src_valid], src_slots[src_valid])
+    dst_times, dst_slots = _first_per_slot(dst_times[dst_valid], dst_slots[dst_valid])
+    if not len(src_slots) or not len(dst_slots):
+        return np.empty(0), np.empty(0)
+
+    src_slots = src_slots + (best_period_offset(dst_slots, src_slots, mu, tolerance)
+                             * SFN_PERIOD * slots_per_frame(mu))
+    index = np.searchsorted(dst_slots, src_slots)
+    left = np.clip(index - 1, 0, len(dst_slots) - 1)
+    right = np.clip(index, 0, len(dst_slots) - 1)
+    nearest = np.where(np.abs(dst_slots[left] - src_slots) <= np.abs(dst_slots[right] - src_slots),
+                       left, right)
+    gap = src_slots - dst_slots[nearest]
+    matched = np.abs(gap) <= tolerance
+    return (src_times[matched],
+            dst_times[nearest[matched]] + gap[matched] * slot_duration(mu))
+
+def fit_clock(src_times, dst_times, max_pairs=MAX_SLOPE_PAIRS):
+    """
+    ClockFit through paired host times (see pair_slot_times)
+
+    Returns:
+        ClockFit; ok is False with fewer than MIN_PAIRS pairs
+    """
+    src_times = np.asarray(src_times, dtype=np.float64)
+    dst_times = np.asarray(dst_times, dtype=np.float64)
+    if not len(src_times):
+        return ClockFit()
+    # Centre x so the epoch-sized values do not eat the float64 precision
+    ref = float(np.median(src_times))
+    x = src_times - ref
+    y = dst_times - src_times
+    drift, offset = theil_sen(x, y, max_pairs)
+    residual = y - offset - drift * x
+    return ClockFit(offset, drift, ref, len(x), np.median(np.abs(residual)))
+
+def fit_slot_clock(src_times, src_slots, dst_times, dst_slots, mu=DEFAULT_MU, tolerance=0):
+    """pair_slot_times followed by fit_clock"""
+    return fit_clock(*pair_slot_times(src_times, src_slots, dst_times, dst_slots, mu, tolerance))
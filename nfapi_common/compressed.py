@@ -0,0 +1,154 @@
+"""
+Transparent reading of compressed logs (.gz, .xz, .zst)
+
+Archived captures are compressed; the parsers read them as streams instead
+of requiring a decompressed copy on disk. The format is recognised by its
+magic bytes, so the file name does not matter.
+
+Decompression runs in an external tool when one is installed: pigz (a
+separate thread for reading, writing and checksumming), xz -T0 (block-parallel
+for multi-block .xz, xz >= 5.4) and zstd. It then runs in its own process,
+concurrently with the parsing, instead of adding its cost to the parser's
+core. Without the tool, Python's gzip/lzma modules (and zstandard, or
+compression.zstd on Python >= 3.14) decompress in-process.
+
+Compressed files cannot be mapped or seeked, so the mmap and byte-range paths
+use iter_blocks (line-aligned blocks) instead.
+"""
+import gzip
+import io
+import lzma
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+# Block size for iter_blocks; also the unit of work for parallel parsing of a stream
+BLOCK_SIZE = 1 << 24
+
+# format -> (magic bytes, file suffix, external decompressors in order of preference)
+FORMATS = {
+    'gzip': (b'\x1f\x8b', '.gz', (('pigz', '-dc'), ('gzip', '-dc'))),
+    'xz': (b'\xfd7zXZ\x00', '.xz', (('xz', '-T0', '-dc'),)),
+    'zstd': (b'\x28\xb5\x2f\xfd', '.zst', (('zstd', '-T0', '-dcq'),)),
+}
+SUFFIXES = tuple(suffix for _, suffix, _ in FORMATS.values())
+_MAGIC_BYTES = max(len(magic) for magic, _, _ in FORMATS.values())
+
+def compression(path):
+    """'gzip' / 'xz' / 'zstd' from the file's magic bytes, None for a plain file"""
+    with open(path, 'rb') as f:
+        head = f.read(_MAGIC_BYTES)
+    for name, (magic, _, _) in FORMATS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+def is_compressed(path):
+    return compression(path) is not None
+
+def strip_compression_suffix(name):
+    """'measure-PRB-500M.txt.gz' -> 'measure-PRB-500M.txt' (other names unchanged)"""
+    for suffix in SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def decompressor_command(fmt):
+    """First installed external decompressor for fmt, or None"""
+    for command in FORMATS[fmt][2]:
+        if shutil.which(command[0]):
+            return list(command)
+    return None
+
+def _open_in_process(path, fmt):
+    if fmt == 'gzip':
+        return gzip.open(path, 'rb')
+    if fmt == 'xz':
+        return lzma.open(path, 'rb')
+    try:
+        from compression import zstd
+        return zstd.open(path, 'rb')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise OSError(f'{path}: zstd compressed, but neither the zstd tool nor the '
+                      f'zstandard module is installed') from None
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+
+@contextmanager
+def _open_process(path, command):
+    """Read the stdout of `command path`; a failed decompression raises OSError"""
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(command + [os.fspath(path)], stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            yield proc.stdout
+        except BaseException:
+            # Reader failed or was closed (GeneratorExit): stop the tool quietly
+            proc.kill()
+            raise
+        finally:
+            # May already be closed by a TextIOWrapper around it
+            proc.stdout.close()
+            returncode = proc.wait()
+        # A reader that stops before the end makes the tool die of SIGPIPE
+        if returncode not in (0, -signal.SIGPIPE):
+            stderr.seek(0)
+            message = stderr.read().decode('utf-8', errors='replace').strip()
+            raise OSError(f'{command[0]} failed on {path} (exit {returncode}): {message}')
+
+@contextmanager
+def open_log(path):
+    """
+    Binary stream of a log, decompressed when needed
+
+    Plain files are opened directly; compressed ones are piped through the
+    external decompressor when installed, else decompressed in-process.
+    """
+    fmt = compression(path)
+    if fmt is None:
+        with open(path, 'rb') as f:
+            yield f
+        return
+    command = decompressor_command(fmt)
+    if command is None:
+        with _open_in_process(path, fmt) as f:
+            yield f
+        return
+    with _open_process(path, command) as f:
+        yield f
+
+def iter_blocks(path, block_size=BLOCK_SIZE):
+    """
+    Yield the (decompressed) log as bytes blocks that end at a line boundary
+
+    Every block starts at the beginning of a line, so line-anchored patterns
+    and line iteration give the same results per block as on the whole file.
+    A line ends at \n or a lone \r; a trailing \r is held back for the next
+    block so a \r\n pair is never split.
+    """
+    with open_log(path) as f:
+        pieces = []
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            end = len(block) - block.endswith(b'\r')
+            cut = max(block.rfind(b'\n', 0, end), block.rfind(b'\r', 0, end)) + 1
+            if cut:
+                pieces.append(block[:cut])
+                yield b''.join(pieces)
+                pieces = [block[cut:]]
+            elif pieces and pieces[-1].endswith(b'\r'):
+                # No \n follows the held-back \r: it ended a line by itself
+                yield b''.join(pieces)
+                pieces = [block]
+            else:
+                pieces.append(block)
+        tail = b''.join(pieces)
+        if tail:
+            yield tail
@@ -0,0 +1,132 @@
+"""
+Shape-preserving downsampling for time-series plots
+
+Long captures have far more samples than a figure has pixels. These helpers
+pick a bounded subset of sample indices before plotting:
+
+- minmax: split the x range into buckets (roughly one per pixel column) and
+  keep the lowest and highest sample in each, so every spike stays visible
+- lttb: Largest-Triangle-Three-Buckets, which keeps the visual shape of
+  smooth lines with one point per bucket
+
+Both return indices (in x order), so several aligned arrays can be subset at
+once, and both accept a keep mask of samples that must survive (sentinels,
+TOO LATE outliers, ...).
+"""
+import numpy as np
+
+DEFAULT_MAX_POINTS = 5000
+
+def minmax_indices(x, y, n_buckets):
+    """
+    Indices of the min and max sample in each of n_buckets equal-width x
+    buckets, plus the first and last sample
+    """
+    n = len(y)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    low, high = np.min(x), np.max(x)
+    if high > low:
+        bucket = np.minimum(((x - low) / (high - low) * n_buckets).astype(np.int64), n_buckets - 1)
+    else:
+        bucket = np.arange(n) * n_buckets // n
+    ends = np.array([0, n - 1])
+
+    if np.all(bucket[1:] >= bucket[:-1]):
+        # Time-ordered samples: buckets are contiguous runs, O(n) with reduceat
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        run = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+        picks = [ends]
+        for extreme in (np.minimum, np.maximum):
+            hit = np.flatnonzero(y == extreme.reduceat(y, starts)[run])
+            picks.append(hit[np.r_[True, run[hit][1:] != run[hit][:-1]]])
+        return np.unique(np.concatenate(picks))
+
+    order = np.lexsort((y, bucket))
+    sorted_bucket = bucket[order]
+    first = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+    last = np.r_[first[1:], n] - 1
+    return np.unique(np.concatenate((ends, order[first], order[last])))
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: n_out indices including both ends"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if end < next_end:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+def spike_mask(y, z=8.0, limit=None):
+    """
+    Samples far from the median (robust z-score on the MAD)
+
+    Args:
+        z: Threshold in robust standard deviations
+        limit: Keep at most this many, the most extreme first
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if not len(y):
+        return np.zeros(0, dtype=bool)
+    deviation = np.abs(y - np.median(y))
+    scale = 1.4826 * np.median(deviation)
+    mask = deviation > z * scale if scale > 0 else deviation > 0
+    if limit is not None and mask.sum() > limit:
+        mask = np.zeros(len(y), dtype=bool)
+        if limit > 0:
+            mask[np.argpartition(deviation, -limit)[-limit:]] = True
+    return mask
+
+def downsample_indices(x, y, max_points=DEFAULT_MAX_POINTS, method='minmax', keep=None):
+    """
+    Indices of at most ~max_points samples (plus the keep mask), in x order
+
+    NaN samples are dropped. max_points <= 0 disables downsampling. For
+    time-ordered input the result is simply sorted by index.
+
+    Args:
+        method: 'minmax' (spike preserving) or 'lttb' (shape preserving)
+        keep: Boolean mask of samples that are always included
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(x) & ~np.isnan(y))
+    if max_points <= 0 or len(valid) <= max_points:
+        return valid
+
+    # Both methods bucket along x, so work on the samples in x order
+    if np.any(x[valid][1:] < x[valid][:-1]):
+        valid = valid[np.argsort(x[valid], kind='stable')]
+    vx, vy = x[valid], y[valid]
+    if method == 'lttb':
+        chosen = lttb_indices(vx, vy, max_points)
+    elif method == 'minmax':
+        chosen = minmax_indices(vx, vy, max(1, max_points // 2))
+    else:
+        raise ValueError(f'Unknown downsampling method: {method}')
+
+    selected = valid[chosen]
+    if keep is not None:
+        forced = np.flatnonzero(np.asarray(keep, dtype=bool))
+        selected = np.union1d(selected, np.intersect1d(forced, valid))
+    return selected[np.argsort(x[selected], kind='stable')]
+
+def downsample(x, y, max_points=DEFAULT_MAX_POINTS, method='minmax', keep=None):
+    """(x, y) subset chosen by downsample_indices"""
+    index = downsample_indices(x, y, max_points, method, keep)
+    return np.asarray(x)[index], np.asarray(y)[index]
@@ -0,0 +1,71 @@
+"""
+mmap-backed scanner for the "[timestamp] frame=X slot=Y ..." log formats
+
+The whole file is mapped read-only and a single compiled bytes pattern is run
+with finditer, so fields come back as small bytes objects without decoding or
+allocating a str per line. Pages are loaded on demand by the OS, which keeps
+this usable on logs far larger than RAM.
+
+Compressed logs (.gz/.xz/.zst) cannot be mapped; they are decompressed as a
+stream and scanned in newline-aligned blocks (see compressed.py), with the
+same results.
+"""
+import mmap
+import re
+from contextlib import contextmanager
+
+from .compressed import is_compressed, iter_blocks
+
+# Lines end at \n, \r\n or a lone \r, as in text mode (universal newlines).
+# LINE_START = after \n (MULTILINE ^) or after \r; [^\S\r\n] = whitespace that
+# cannot cross a line boundary
+LINE_START = rb'(?:^|(?<=\r))'
+FRAME_SLOT_PREFIX = (LINE_START + rb'[^\S\r\n]*\[(\d+\.\d+)\][^\S\r\n]+frame=(\d+)'
+                     rb'[^\S\r\n]+slot=(\d+)[^\S\r\n]+')
+
+# Any line containing "[seconds.fraction]", used by merge.py
+TIMESTAMPED_LINE_PATTERN = re.compile(LINE_START + rb'[^\r\n]*?\[(\d+\.\d+)\][^\r\n]*', re.MULTILINE)
+
+def compile_frame_slot_pattern(tail):
+    """
+    Compile the frame/slot prefix followed by a format specific tail
+
+    Groups: (timestamp, frame, slot, *tail groups), all bytes
+    """
+    return re.compile(FRAME_SLOT_PREFIX + tail, re.MULTILINE)
+
+@contextmanager
+def map_file(path):
+    """Map a file read-only; empty files yield b'' since mmap rejects length 0"""
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b''
+            return
+        try:
+            if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            yield mapped
+        finally:
+            mapped.close()
+
+def iter_buffers(path):
+    """The whole mapped file, or line-aligned blocks of a compressed one"""
+    if is_compressed(path):
+        yield from iter_blocks(path)
+        return
+    with map_file(path) as data:
+        yield data
+
+def scan(path, pattern):
+    """Yield match.groups() for every match of pattern in the file"""
+    for data in iter_buffers(path):
+        for match in pattern.finditer(data):
+            yield match.groups()
+
+def scan_lines(path, pattern=TIMESTAMPED_LINE_PATTERN):
+    """Yield (whole line bytes, *groups) for every matching line"""
+    for data in iter_buffers(path):
+        for match in pattern.finditer(data):
+            yield (match.group(0),) + match.groups()
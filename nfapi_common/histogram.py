@@ -0,0 +1,177 @@
+"""
+HDR-style log-bucketed latency histograms
+
+Values are bucketed by magnitude: each power-of-two range (octave) is split
+into 2^sub_bits equal sub-buckets, with positive and negative values mirrored
+around a zero bucket. Recording is a constant-time array increment, the
+relative bucket width is at most 2^-sub_bits (values below 2^sub_bits are
+exact), and two histograms with the same layout merge by adding counts, so
+results from several files or runs can be combined without raw samples.
+"""
+import numpy as np
+
+DEFAULT_SUB_BITS = 7
+DEFAULT_OCTAVES = 32
+PERCENTILES = (50, 90, 99, 99.9, 99.99)
+
+class LogBuckets:
+    """
+    Signed log-bucket layout shared by LatencyHistogram and the --follow view
+
+    Index center is 0; index center +/- (octave * 2^sub_bits + sub + 1)
+    holds positive/negative magnitudes in [2^octave, 2^(octave+1)).
+    Magnitudes beyond 2^octaves saturate into the last bucket.
+    """
+
+    def __init__(self, sub_bits=DEFAULT_SUB_BITS, octaves=DEFAULT_OCTAVES):
+        self.sub_bits = sub_bits
+        self.octaves = octaves
+        self.sub_buckets = 1 << sub_bits
+        self.center = octaves * self.sub_buckets
+        self.size = 2 * self.center + 1
+
+    def index(self, value):
+        """Bucket of one value (scalar fast path, rounds half to even like indices)"""
+        value = round(value)
+        magnitude = min(abs(int(value)), (1 << self.octaves) - 1)
+        if magnitude == 0:
+            return self.center
+        octave = magnitude.bit_length() - 1
+        sub = ((magnitude << self.sub_bits) >> octave) & (self.sub_buckets - 1)
+        offset = octave * self.sub_buckets + sub + 1
+        return self.center + offset if value > 0 else self.center - offset
+
+    def indices(self, values):
+        """Bucket of every value in an array"""
+        values = np.rint(np.asarray(values, dtype=np.float64)).astype(np.int64)
+        magnitude = np.minimum(np.abs(values), (1 << self.octaves) - 1)
+        octave = np.frexp(magnitude)[1].astype(np.int64) - 1
+        sub = ((magnitude << self.sub_bits) >> np.maximum(octave, 0)) & (self.sub_buckets - 1)
+        offset = np.where(magnitude > 0, octave * self.sub_buckets + sub + 1, 0)
+        return self.center + np.sign(values) * offset
+
+    def value_at(self, index):
+        """Smallest magnitude in the bucket, with the bucket's sign"""
+        offset = index - self.center
+        if offset == 0:
+            return 0
+        octave, sub = divmod(abs(offset) - 1, self.sub_buckets)
+        magnitude = (1 << octave) + ((sub << octave) >> self.sub_bits)
+        return magnitude if offset > 0 else -magnitude
+
+class LatencyHistogram:
+    """
+    Mergeable latency histogram with exact count/min/max
+
+    Args:
+        sub_bits: Sub-buckets per octave as a power of two (precision)
+        octaves: Largest magnitude tracked is 2^octaves
+    """
+
+    def __init__(self, sub_bits=DEFAULT_SUB_BITS, octaves=DEFAULT_OCTAVES):
+        self.buckets = LogBuckets(sub_bits, octaves)
+        self.counts = np.zeros(self.buckets.size, dtype=np.int64)
+        self.min = None
+        self.max = None
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def record(self, value):
+        """Record one value"""
+        self.counts[self.buckets.index(value)] += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def record_array(self, values):
+        """Record an array of values"""
+        values = np.asarray(values)
+        if not len(values):
+            return
+        self.counts += np.bincount(self.buckets.indices(values), minlength=self.buckets.size)
+        low, high = _plain(values.min()), _plain(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def merge(self, other):
+        """Add another histogram's counts (layouts must match)"""
+        if (other.buckets.sub_bits, other.buckets.octaves) != (self.buckets.sub_bits, self.buckets.octaves):
+            raise ValueError('Cannot merge histograms with different bucket layouts')
+        self.counts += other.counts
+        for bound in (other.min, other.max):
+            if bound is not None:
+                self.min = bound if self.min is None else min(self.min, bound)
+                self.max = bound if self.max is None else max(self.max, bound)
+        return self
+
+    def percentiles(self, percentiles=PERCENTILES):
+        """Value at each percentile (0-100), clamped to the exact min/max"""
+        total = self.total
+        if not total:
+            return [None] * len(percentiles)
+        cumulative = np.cumsum(self.counts)
+        result = []
+        for p in percentiles:
+            index = int(np.searchsorted(cumulative, p / 100 * total))
+            value = self.buckets.value_at(min(index, len(cumulative) - 1))
+            result.append(min(max(value, self.min), self.max))
+        return result
+
+    def percentile(self, p):
+        return self.percentiles((p,))[0]
+
+    def cdf(self):
+        """(bucket values, cumulative fraction) over non-empty buckets"""
+        nonzero = np.flatnonzero(self.counts)
+        values = np.array([self.buckets.value_at(i) for i in nonzero], dtype=np.int64)
+        return values, np.cumsum(self.counts[nonzero]) / max(self.total, 1)
+
+    def to_arrays(self, prefix=''):
+        """Named arrays for np.savez; counts are stored sparsely"""
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            f'{prefix}layout': np.array([self.buckets.sub_bits, self.buckets.octaves]),
+            f'{prefix}index': nonzero,
+            f'{prefix}count': self.counts[nonzero],
+            f'{prefix}range': np.array([self.min, self.max], dtype=np.float64)
+                              if self.min is not None else np.empty(0),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=''):
+        """Inverse of to_arrays"""
+        sub_bits, octaves = (int(v) for v in arrays[f'{prefix}layout'])
+        histogram = cls(sub_bits, octaves)
+        histogram.counts[arrays[f'{prefix}index']] = arrays[f'{prefix}count']
+        bounds = arrays[f'{prefix}range']
+        if len(bounds):
+            histogram.min, histogram.max = (_plain(v) for v in bounds)
+        return histogram
+
+def _plain(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+def save_histograms(path, histograms):
+    """Write {name: LatencyHistogram} to one .npz file"""
+    arrays = {}
+    for name, histogram in histograms.items():
+        arrays.update(histogram.to_arrays(f'{name}::'))
+    np.savez_compressed(path, **arrays)
+
+def load_histograms(path):
+    """Read {name: LatencyHistogram} written by save_histograms"""
+    with np.load(path, allow_pickle=False) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    names = sorted({key.rsplit('::', 1)[0] for key in arrays})
+    return {name: LatencyHistogram.from_arrays(arrays, f'{name}::') for name in names}
+
+def merge_histograms(target, histograms):
+    """Merge {name: LatencyHistogram} into target in place and return it"""
+    for name, histogram in histograms.items():
+        if name in target:
+            target[name].merge(histogram)
+        else:
+            target[name] = histogram
+    return target
@@ -0,0 +1,247 @@
+"""
+Per-stage profiling for the CLIs (--profile)
+
+Each step of a run is wrapped in a stage:
+
+    profiler = profiler_from_args(args, 'script.py')
+    with profiler.stage('parse_log_file') as stage:
+        entries = parse_log_file(path)
+        stage.items = len(entries)
+
+For every stage the profiler records wall time, CPU time of this process
+and of worker processes reaped during the stage, an item count and the peak
+resident memory. When profiling is off, stage() hands back one shared no-op
+object, so an instrumented run costs a method call per stage and nothing
+else.
+
+Peak memory is per stage on Linux: the kernel's high-water mark (VmHWM) is
+reset through /proc/self/clear_refs when a stage starts and read when it
+ends; nested stages fold their peak into the enclosing stage. Elsewhere the
+process-wide ru_maxrss at the end of the stage is reported instead.
+
+The trace is written as JSON (stages in start order with their nesting) and,
+optionally, as a Chrome trace-event file for chrome://tracing or Perfetto.
+"""
+import atexit
+import datetime
+import json
+import os
+import resource
+import sys
+import time
+
+_STATUS = '/proc/self/status'
+_CLEAR_REFS = '/proc/self/clear_refs'
+
+def _read_hwm_kb():
+    """VmHWM in KB, or None where /proc is unavailable"""
+    try:
+        with open(_STATUS) as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _reset_hwm():
+    """Reset VmHWM to the current RSS; False when not supported"""
+    try:
+        with open(_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _maxrss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def _children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+class _NullStage:
+    """Stand-in returned while profiling is off; accepts and ignores everything"""
+    items = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+class Stage:
+    """
+    One timed stage
+
+    Attributes:
+        name: Stage name (usually the function it wraps)
+        items: Items processed, set by the caller (lines, samples, figures, ...)
+        depth: Nesting level (0 = top level)
+    """
+
+    def __init__(self, profiler, name, items=None):
+        self.profiler = profiler
+        self.name = name
+        self.items = items
+        self.depth = 0
+        self.start = self.wall = self.cpu = self.child_cpu = 0.0
+        self.peak_kb = 0
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._exit(self)
+        return False
+
+    def to_dict(self):
+        record = {
+            'name': self.name,
+            'depth': self.depth,
+            'start_s': round(self.start, 6),
+            'wall_s': round(self.wall, 6),
+            'cpu_s': round(self.cpu, 6),
+            'child_cpu_s': round(self.child_cpu, 6),
+            'items': self.items,
+            'items_per_s': round(self.items / self.wall, 1) if self.items and self.wall > 0 else None,
+            'peak_rss_mb': round(self.peak_kb / 1024, 1),
+        }
+        return record
+
+class Profiler:
+    """
+    Collects stages for one run
+
+    Args:
+        enabled: When False, stage() returns a shared no-op object
+        tool: Name stored in the trace (e.g. 'script.py')
+    """
+
+    def __init__(self, enabled=False, tool=None):
+        self.enabled = enabled
+        self.tool = tool
+        self.stages = []
+        self._stack = []
+        self._origin = time.perf_counter()
+        self._started = datetime.datetime.now().isoformat(timespec='seconds')
+        self._per_stage_peak = enabled and _read_hwm_kb() is not None and _reset_hwm()
+
+    def stage(self, name, items=None):
+        """Context manager timing one stage; set .items on the result to record a count"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return Stage(self, name, items)
+
+    def _memory_kb(self):
+        return _read_hwm_kb() if self._per_stage_peak else _maxrss_kb()
+
+    def _enter(self, stage):
+        if self._per_stage_peak:
+            # The enclosing stage keeps the high-water mark it reached so far
+            if self._stack:
+                parent = self._stack[-1]
+                parent.peak_kb = max(parent.peak_kb, _read_hwm_kb())
+            _reset_hwm()
+        stage.depth = len(self._stack)
+        self._stack.append(stage)
+        self.stages.append(stage)
+        stage._child_cpu = _children_cpu()
+        stage._cpu = time.process_time()
+        stage._wall = time.perf_counter()
+
+    def _exit(self, stage):
+        end = time.perf_counter()
+        stage.cpu = time.process_time() - stage._cpu
+        stage.child_cpu = _children_cpu() - stage._child_cpu
+        stage.wall = end - stage._wall
+        stage.start = stage._wall - self._origin
+        stage.peak_kb = max(stage.peak_kb, self._memory_kb())
+        self._stack.pop()
+        if self._stack:
+            parent = self._stack[-1]
+            parent.peak_kb = max(parent.peak_kb, stage.peak_kb)
+
+    def to_dict(self):
+        return {
+            'tool': self.tool,
+            'argv': sys.argv,
+            'started': self._started,
+            'pid': os.getpid(),
+            'total_wall_s': round(time.perf_counter() - self._origin, 6),
+            'peak_rss_mb': round(_maxrss_kb() / 1024, 1),
+            'per_stage_peak': self._per_stage_peak,
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+    def write_chrome_trace(self, path):
+        """Chrome trace-event format: one complete ('X') event per stage"""
+        pid = os.getpid()
+        events = [{
+            'name': stage.name,
+            'cat': self.tool or 'nfapi',
+            'ph': 'X',
+            'ts': round(stage.start * 1e6, 3),
+            'dur': round(stage.wall * 1e6, 3),
+            'pid': pid,
+            'tid': 0,
+            'args': {key: value for key, value in stage.to_dict().items()
+                     if key not in ('name', 'start_s', 'wall_s')},
+        } for stage in self.stages]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def print_table(self, file=None):
+        file = file or sys.stdout
+        print(f"\n{'stage':<44}{'wall s':>9}{'cpu s':>9}{'child s':>9}{'items':>12}{'items/s':>12}{'peak MB':>9}",
+              file=file)
+        for stage in self.stages:
+            record = stage.to_dict()
+            items = '' if record['items'] is None else f"{record['items']:,}"
+            rate = '' if record['items_per_s'] is None else f"{record['items_per_s']:,.0f}"
+            print(f"{'  ' * stage.depth + stage.name:<44}{stage.wall:>9.3f}{stage.cpu:>9.3f}"
+                  f"{stage.child_cpu:>9.3f}{items:>12}{rate:>12}{record['peak_rss_mb']:>9.1f}", file=file)
+
+def add_profile_arguments(parser):
+    """Register --profile/--profile-chrome on an argparse parser"""
+    group = parser.add_argument_group('效能分析')
+    group.add_argument('--profile', nargs='?', const='', default=None, metavar='JSON',
+                       help='記錄各階段的實際/CPU 時間、處理筆數與記憶體峰值，'
+                            '並輸出 JSON 記錄 (預設: <工具名稱>-profile.json)')
+    group.add_argument('--profile-chrome', default=None, metavar='JSON',
+                       help='另外輸出 Chrome trace-event 檔 (chrome://tracing, Perfetto)，隱含 --profile')
+    return group
+
+def profiler_from_args(args, tool):
+    """
+    Build a Profiler from the arguments added by add_profile_arguments
+
+    When enabled, the trace is written and a table printed at interpreter exit,
+    so early returns and sys.exit() in the CLI still produce it.
+    """
+    enabled = args.profile is not None or args.profile_chrome is not None
+    profiler = Profiler(enabled, tool)
+    if enabled:
+        json_path = args.profile or f'{os.path.splitext(os.path.basename(tool))[0]}-profile.json'
+
+        def finish():
+            profiler.print_table()
+            profiler.write_json(json_path)
+            print(f'✓ 已儲存效能分析記錄: {json_path}')
+            if args.profile_chrome:
+                profiler.write_chrome_trace(args.profile_chrome)
+                print(f'✓ 已儲存 Chrome trace: {args.profile_chrome}')
+        atexit.register(finish)
+    return profiler
@@ -0,0 +1,99 @@
+"""
+Rolling-window means over irregularly spaced samples
+
+One cumulative sum of the values serves every window: the mean over any run
+of samples is a difference of two prefix sums. Sample-count windows ('5')
+slide over a fixed number of samples; time windows ('10ms', '1s') cover the
+trailing duration (t - w, t] and find their start with one searchsorted over
+the sorted timestamps, so the sample count per window follows the actual
+scheduling density.
+"""
+import re
+import numpy as np
+
+DEFAULT_WINDOWS = ('5',)
+
+_UNITS = {'us': 1e-6, 'ms': 1e-3, 's': 1.0}
+_WINDOW_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)(us|ms|s)?$')
+
+class Window:
+    """
+    One rolling window, parsed from a spec such as '5', '10ms' or '1s'
+
+    Attributes:
+        spec: The original spec string
+        samples: Sample count (count windows), else None
+        seconds: Duration (time windows), else None
+    """
+
+    def __init__(self, spec):
+        match = _WINDOW_PATTERN.match(spec.strip())
+        if not match:
+            raise ValueError(f"Invalid window '{spec}' (expected e.g. 5, 500us, 10ms, 1s)")
+        number, unit = match.groups()
+        self.spec = spec.strip()
+        if unit is None:
+            if '.' in number or int(number) < 1:
+                raise ValueError(f"Sample-count window must be a positive integer: '{spec}'")
+            self.samples, self.seconds = int(number), None
+        else:
+            self.samples, self.seconds = None, float(number) * _UNITS[unit]
+            if self.seconds <= 0:
+                raise ValueError(f"Time window must be positive: '{spec}'")
+
+    @property
+    def label(self):
+        return f'{self.samples}-point' if self.samples is not None else self.spec
+
+    def __repr__(self):
+        return f'Window({self.spec!r})'
+
+def parse_windows(specs):
+    """Window objects from specs; comma-separated entries are split"""
+    return [Window(part) for spec in specs for part in spec.split(',') if part.strip()]
+
+def rolling_means(times, values, windows):
+    """
+    Trailing rolling mean for several windows from one cumulative sum
+
+    Args:
+        times: Sample times in seconds, sorted ascending
+        values: Sample values
+        windows: Window objects (or spec strings)
+
+    Returns:
+        list: (times, means) per window, only where the window is fully
+        covered (like np.convolve mode='valid'); the input is returned
+        unchanged when it is shorter than the window
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values)
+    dtype = np.int64 if np.issubdtype(values.dtype, np.integer) else np.float64
+    prefix = np.concatenate(([0], np.cumsum(values, dtype=dtype)))
+    n = len(values)
+
+    results = []
+    for window in windows:
+        if not isinstance(window, Window):
+            window = Window(window)
+        if window.samples is not None:
+            w = window.samples
+            if n < w:
+                results.append((times, values))
+                continue
+            means = (prefix[w:] - prefix[:-w]) / w
+            results.append((times[w - 1:], means))
+        else:
+            if not n or times[-1] - times[0] < window.seconds:
+                results.append((times, values))
+                continue
+            end = np.arange(1, n + 1)
+            start = np.searchsorted(times, times - window.seconds, side='right')
+            covered = times >= times[0] + window.seconds
+            means = (prefix[end] - prefix[start]) / (end - start)
+            results.append((times[covered], means[covered]))
+    return results
+
+def rolling_mean(times, values, window):
+    """Single-window convenience wrapper around rolling_means"""
+    return rolling_means(times, values, [window])[0]
@@ -0,0 +1,148 @@
+"""
+Absolute slot indexing across SFN wraparound
+
+Logs only carry the system frame number (SFN, 0..1023) and the slot within
+the frame, so (frame, slot) repeats every 10.24 s. The absolute slot index
+turns each event into a monotonically increasing int64 by counting how many
+SFN periods have elapsed, using the event timestamps to decide: between two
+consecutive events the slot counter must have advanced by roughly
+elapsed_time / slot_duration, which picks the right multiple of the SFN
+period even across gaps longer than one wrap.
+"""
+import numpy as np
+
+SFN_PERIOD = 1024
+FRAME_DURATION = 0.010
+DEFAULT_MU = 1
+
+def slots_per_frame(mu=DEFAULT_MU):
+    """Number of slots in a 10 ms frame for numerology mu (15 kHz * 2^mu SCS)"""
+    return 10 << mu
+
+def slot_duration(mu=DEFAULT_MU):
+    """Slot length in seconds for numerology mu"""
+    return FRAME_DURATION / slots_per_frame(mu)
+
+def check_slot_range(slots, mu=DEFAULT_MU):
+    """
+    Reject logged slot numbers that do not fit in a frame at numerology mu
+
+    A slot >= slots_per_frame(mu) means the capture was taken at a higher
+    numerology; unwrapping it anyway would fold it into the next frame and
+    merge it with a different (frame, slot) cell.
+
+    Raises:
+        ValueError: Some slot is out of range, naming the --mu to pass
+    """
+    slots = np.asarray(slots, dtype=np.int64)
+    spf = slots_per_frame(mu)
+    if len(slots) and int(slots.max()) >= spf:
+        highest = int(slots.max())
+        needed = mu
+        while slots_per_frame(needed) <= highest:
+            needed += 1
+        raise ValueError(f'slot {highest} does not fit in a frame at mu={mu} '
+                         f"({spf} slots per frame); pass the capture's numerology "
+                         f'with --mu (at least {needed})')
+
+def unwrap_slots(timestamps, frames, slots, mu=DEFAULT_MU):
+    """
+    Absolute slot index for every event
+
+    Args:
+        timestamps: Event times in seconds (any order)
+        frames: SFN of each event (0..1023)
+        slots: Slot within the frame
+        mu: Numerology, sets slots per frame and the slot duration
+
+    Returns:
+        int64 array aligned with the inputs; the first event in time keeps
+        its raw frame * slots_per_frame + slot value
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    n = len(timestamps)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    spf = slots_per_frame(mu)
+    period = SFN_PERIOD * spf
+    raw = np.asarray(frames, dtype=np.int64) * spf + np.asarray(slots, dtype=np.int64)
+
+    order = np.argsort(timestamps, kind='stable')
+    raw_sorted = raw[order]
+
+    # Advance between consecutive events: the raw difference plus whichever
+    # multiple of the SFN period best matches the elapsed time
+    step = np.diff(raw_sorted)
+    expected = np.diff(timestamps[order]) / slot_duration(mu)
+    wraps = np.rint((expected - step) / period).astype(np.int64)
+
+    absolute = np.empty(n, dtype=np.int64)
+    absolute[order] = raw_sorted[0] + np.concatenate(([0], np.cumsum(step + wraps * period)))
+    return absolute
+
+def split_slots(absolute, mu=DEFAULT_MU):
+    """Absolute slot index -> (SFN, slot), the values printed in the log"""
+    frame, slot = np.divmod(np.asarray(absolute, dtype=np.int64), slots_per_frame(mu))
+    return frame % SFN_PERIOD, slot
+
+def absolute_frames(absolute, mu=DEFAULT_MU):
+    """Absolute slot index -> monotonically increasing frame index"""
+    return np.asarray(absolute, dtype=np.int64) // slots_per_frame(mu)
+
+class DenseSlotIndex:
+    """
+    O(1) lookup from absolute slot to a row number
+
+    A dense int array spans [first, last] absolute slot; slots that never
+    appeared map to -1. An hour at mu=1 is 7.2M slots, i.e. ~29 MB of int32.
+    """
+
+    def __init__(self, absolute):
+        absolute = np.asarray(absolute, dtype=np.int64)
+        self.first = int(absolute.min()) if len(absolute) else 0
+        span = int(absolute.max()) - self.first + 1 if len(absolute) else 0
+        self.rows = np.full(span, -1, dtype=np.int32)
+        self.rows[absolute - self.first] = np.arange(len(absolute), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, absolute):
+        """Row of each absolute slot, -1 where the slot has no row"""
+        offset = np.asarray(absolute, dtype=np.int64) - self.first
+        inside = (offset >= 0) & (offset < len(self.rows))
+        result = np.full(offset.shape, -1, dtype=np.int32)
+        result[inside] = self.rows[offset[inside]]
+        return result
+
+# At most this many keys are sampled when estimating the SFN period offset
+PERIOD_SAMPLE = 20000
+
+def best_period_offset(ref_keys, keys, mu=DEFAULT_MU, tolerance=0):
+    """
+    SFN period shift between two independently unwrapped sets of slots
+
+    Each side numbers its absolute slots from its own first SFN period. This
+    returns the k for which the most of keys land within tolerance of some
+    ref key after adding k * SFN period, i.e. keys + k * period ~ ref_keys.
+    Ties prefer the smallest |k|.
+    """
+    if not len(ref_keys) or not len(keys):
+        return 0
+    period = SFN_PERIOD * slots_per_frame(mu)
+    ref_keys = np.sort(np.asarray(ref_keys, dtype=np.int64))
+    keys = np.asarray(keys, dtype=np.int64)
+    if len(keys) > PERIOD_SAMPLE:
+        keys = keys[np.linspace(0, len(keys) - 1, PERIOD_SAMPLE).astype(np.int64)]
+
+    low = int(np.floor((ref_keys[0] - keys.max()) / period))
+    high = int(np.ceil((ref_keys[-1] - keys.min()) / period))
+    best, best_hits = 0, -1
+    for k in sorted(range(low, high + 1), key=abs):
+        shifted = keys + k * period
+        hits = int((np.searchsorted(ref_keys, shifted + tolerance, side='right')
+                    - np.searchsorted(ref_keys, shifted - tolerance, side='left') > 0).sum())
+        if hits > best_hits:
+            best, best_hits = k, hits
+    return best
@@ -0,0 +1,207 @@
+"""
+Constant-memory streaming statistics
+
+StreamingStats keeps count, mean and variance (Welford, batches combined with
+Chan's parallel formula), exact min/max and a KLL quantile sketch. Values can
+be added one at a time while parsing; they are buffered and folded in as NumPy
+batches. Instances from parallel workers combine with merge(), and pickle
+cleanly so they can be returned from a process pool.
+
+The sketch median is approximate once it has compacted. When the whole array
+is in hand, from_array() records its exact median instead; adding or merging
+more values afterwards falls back to the sketch.
+"""
+import numpy as np
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang, Liberty 2016)
+
+    Level h holds items of weight 2^h. A full level is sorted and every other
+    item is promoted to the level above, so memory stays O(k log(n/k)) while
+    rank error stays around 1/k. The promoted half alternates between even and
+    odd positions, which keeps results reproducible run to run.
+
+    Args:
+        k: Capacity of the top level; larger is more accurate
+    """
+
+    C = 2 / 3
+
+    def __init__(self, k=200):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._offset = 0
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels)
+
+    def capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * self.C ** depth)))
+
+    def update(self, values):
+        """Add an array of values"""
+        self.levels[0] = np.concatenate((self.levels[0], np.asarray(values, dtype=np.float64)))
+        self._compress()
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate((self.levels[h], level))
+        self._compress()
+
+    def _compress(self):
+        # Lazy: only compact while the sketch as a whole is over budget, and
+        # then only the lowest full level, so levels stay as full as allowed
+        while len(self) >= sum(self.capacity(h) for h in range(len(self.levels))):
+            h = next(h for h, level in enumerate(self.levels) if len(level) >= self.capacity(h))
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            level = np.sort(self.levels[h])
+            # An odd item stays behind so the promoted weight is exact
+            keep = len(level) % 2
+            self.levels[h] = level[len(level) - keep:]
+            promoted = level[self._offset:len(level) - keep:2]
+            self._offset ^= 1
+            self.levels[h + 1] = np.concatenate((self.levels[h + 1], promoted))
+
+    def quantile(self, q):
+        """Approximate q-quantile (exact while nothing has been compacted)"""
+        if len(self.levels) == 1:
+            return float(np.quantile(self.levels[0], q)) if len(self.levels[0]) else None
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64)
+                                  for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        rank = np.searchsorted(cumulative, q * cumulative[-1])
+        return float(items[order][min(rank, len(items) - 1)])
+
+class StreamingStats:
+    """
+    Single-pass count/mean/std/min/max/median in constant memory
+
+    Args:
+        k: KLL sketch accuracy parameter
+        batch: Values buffered by add() before being folded in
+    """
+
+    def __init__(self, k=200, batch=4096):
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = None
+        self._max = None
+        self.sketch = KLLSketch(k)
+        self.batch = batch
+        self._pending = []
+        self._exact_median = None
+
+    @classmethod
+    def from_array(cls, values, k=200):
+        """Stats over a complete array, with its exact median"""
+        stats = cls(k)
+        values = np.asarray(values)
+        stats._fold(values)
+        if len(values):
+            stats._exact_median = float(np.median(values))
+        return stats
+
+    def add(self, value):
+        """Add one value"""
+        self._exact_median = None
+        self._pending.append(value)
+        if len(self._pending) >= self.batch:
+            self._flush()
+
+    def update(self, values):
+        """Add an array of values"""
+        self._exact_median = None
+        self._flush()
+        self._fold(np.asarray(values))
+
+    def merge(self, other):
+        """Combine with stats gathered elsewhere (e.g. another worker)"""
+        self._exact_median = None
+        self._flush()
+        other._flush()
+        self._combine(other._count, other._mean, other._m2, other._min, other._max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def _flush(self):
+        if self._pending:
+            pending, self._pending = self._pending, []
+            self._fold(np.asarray(pending))
+
+    def _fold(self, values):
+        if not len(values):
+            return
+        mean = values.mean(dtype=np.float64)
+        m2 = float(np.square(values - mean, dtype=np.float64).sum())
+        self._combine(len(values), float(mean), m2, values.min(), values.max())
+        self.sketch.update(values)
+
+    def _combine(self, count, mean, m2, low, high):
+        """Chan et al. pairwise update of (count, mean, M2)"""
+        if not count:
+            return
+        total = self._count + count
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta * delta * self._count * count / total
+        self._count = total
+        self._min = low if self._min is None else min(self._min, low)
+        self._max = high if self._max is None else max(self._max, high)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def count(self):
+        self._flush()
+        return self._count
+
+    @property
+    def mean(self):
+        self._flush()
+        return self._mean if self._count else float('nan')
+
+    @property
+    def min(self):
+        self._flush()
+        return self._min
+
+    @property
+    def max(self):
+        self._flush()
+        return self._max
+
+    @property
+    def variance(self):
+        """Population variance (same as np.var)"""
+        self._flush()
+        return self._m2 / self._count if self._count else float('nan')
+
+    @property
+    def std(self):
+        """Population standard deviation (same as np.std)"""
+        return float(np.sqrt(self.variance))
+
+    def quantile(self, q):
+        self._flush()
+        return self.sketch.quantile(q)
+
+    @property
+    def median(self):
+        """Exact after from_array(), otherwise the sketch estimate"""
+        if self._exact_median is not None:
+            return self._exact_median
+        return self.quantile(0.5)
+
+    def __getstate__(self):
+        self._flush()
+        return self.__dict__
@@ -1,214 +1,379 @@
 #!/usr/bin/env python3
-import re
-import json
+import os
 import sys
-import matplotlib.pyplot as plt
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from collections import defaultdict
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from nfapi_common.cache import add_cache_arguments, cache_from_args
+from nfapi_common.compressed import strip_compression_suffix
+from nfapi_common.framelog import compile_frame_slot_pattern, scan
+from nfapi_common.profiling import add_profile_arguments, profiler_from_args
+from nfapi_common.slot_index import (DEFAULT_MU, SFN_PERIOD, DenseSlotIndex,
+                                     absolute_frames, check_slot_range, slots_per_frame,
+                                     unwrap_slots)
+from timing_io import DEFAULT_TIMING_FORMAT, TIMING_FORMATS, TimingWriter, timing_path
+
+# 解析結果格式改變時遞增，避免讀到舊的快取
+PARSER_VERSION = 2
+
+# [timestamp] frame=X slot=Y tZ[-xxx]
+EVENT_LINE_PATTERN = compile_frame_slot_pattern(rb'(t\d+(?:-\w+)?)')
+
+# 排程熱圖
+HEATMAP_FRAMES_PER_PAGE = 200
+HEATMAP_MAX_WIDTH = 32
+HEATMAP_MAX_XTICKS = 100
+SCHEDULE_UL = 1
+SCHEDULE_DL = 2
+
+CATEGORIES = ['ultti', 'uldci', 'dltti', 'txdata']
+TIME_INTERVALS = ['t1-t2', 't2-t3', 't3-t4', 't4-t5', 't1-t5']
+
+class EventTable:
+    """
+    欄式的日誌條目
+    timestamp (float64), frame/slot (int64), event_code 對應 event_names
+    """
+
+    def __init__(self, timestamp, frame, slot, event_code, event_names):
+        self.timestamp = timestamp
+        self.frame = frame
+        self.slot = slot
+        self.event_code = event_code
+        self.event_names = list(event_names)
+
+    def __len__(self):
+        return len(self.timestamp)
 
 def parse_log_file(filepath):
-    """解析日誌文件並提取所有條目"""
-    entries = []
-    pattern = r'\[(\d+\.\d+)\]\s+frame=(\d+)\s+slot=(\d+)\s+(t\d+(?:-\w+)?)'
-    
-    with open(filepath, 'r') as f:
-        for line in f:
-            match = re.match(pattern, line.strip())
-            if match:
-                timestamp, frame, slot, event = match.groups()
-                entries.append({
-                    'timestamp': float(timestamp),
-                    'frame': int(frame),
-                    'slot': int(slot),
-                    'event': event
-                })
-    return entries
-
-def organize_by_frame_slot(entries):
-    """按照frame和slot組織數據"""
-    data = defaultdict(lambda: defaultdict(list))
-    
-    for entry in entries:
-        key = (entry['frame'], entry['slot'])
-        data[key][entry['event']].append(entry['timestamp'])
-    
-    return data
-
-def calculate_time_differences(data):
-    """計算時間差異"""
-    results = {
-        'ultti': defaultdict(list),
-        'uldci': defaultdict(list),
-        'dltti': defaultdict(list),
-        'txdata': defaultdict(list)
+    """解析日誌文件並提取所有條目 (mmap 掃描, 直接填入欄式陣列)"""
+    timestamps = array('d')
+    frames = array('q')
+    slots = array('q')
+    codes = array('B')
+    event_codes = {}
+    
+    for timestamp, frame, slot, event in scan(filepath, EVENT_LINE_PATTERN):
+        code = event_codes.get(event)
+        if code is None:
+            code = event_codes[event] = len(event_codes)
+        timestamps.append(float(timestamp))
+        frames.append(int(frame))
+        slots.append(int(slot))
+        codes.append(code)
+    
+    return EventTable(np.frombuffer(timestamps, dtype=np.float64),
+                      np.frombuffer(frames, dtype=np.int64),
+                      np.frombuffer(slots, dtype=np.int64),
+                      np.frombuffer(codes, dtype=np.uint8),
+                      [event.decode('ascii') for event in event_codes])
+
+def encode_entries(entries):
+    """將條目轉為欄式陣列以寫入快取"""
+    return {
+        'timestamp': entries.timestamp,
+        'frame': entries.frame,
+        'slot': entries.slot,
+        'event_code': entries.event_code,
+        'event_names': np.array(entries.event_names, dtype=str),
     }
+
+def decode_entries(arrays):
+    """由快取的欄式陣列還原條目"""
+    return EventTable(arrays['timestamp'], arrays['frame'], arrays['slot'],
+                      arrays['event_code'], arrays['event_names'].tolist())
+
+class SlotEventMatrix:
+    """
+    (slot × event) 時間戳矩陣，每列是一個絕對 slot (跨 SFN 迴繞遞增)，依時間排列
+    每格為該事件在該 slot 第一次出現的時間戳，沒有出現則為 NaN
+    frame/slot 為日誌中的原始 SFN 與 slot 編號
+    """
+
+    def __init__(self, abs_slot, frame, slot, timestamps, event_names, mu=DEFAULT_MU):
+        self.abs_slot = abs_slot
+        self.frame = frame
+        self.slot = slot
+        self.timestamps = timestamps
+        self.event_names = list(event_names)
+        self.mu = mu
+        self.index = DenseSlotIndex(abs_slot)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def column(self, event):
+        """某事件的時間戳欄位，日誌中沒有此事件時回傳全 NaN"""
+        if event in self.event_names:
+            return self.timestamps[:, self.event_names.index(event)]
+        return np.full(len(self), np.nan)
+
+    def has(self, event):
+        """每個 slot 是否出現過某事件"""
+        return ~np.isnan(self.column(event))
+
+    def rows(self, abs_slot):
+        """絕對 slot 對應的列號 (O(1) 查表)，沒有資料的 slot 為 -1"""
+        return self.index.lookup(abs_slot)
+
+class IntervalSamples:
+    """單一 (類別, 區間) 的量測結果，以平行陣列保存"""
+
+    def __init__(self, frame, slot, duration_us, abs_slot):
+        self.frame = frame
+        self.slot = slot
+        self.duration_us = duration_us
+        self.abs_slot = abs_slot
+
+    def __len__(self):
+        return len(self.duration_us)
+
+    def to_records(self):
+        """轉為 [{'frame', 'slot', 'duration_us'}, ...] (JSON 輸出格式)"""
+        return [{'frame': frame, 'slot': slot, 'duration_us': duration}
+                for frame, slot, duration in zip(self.frame.tolist(),
+                                                 self.slot.tolist(),
+                                                 self.duration_us.tolist())]
+
+def organize_by_frame_slot(entries, mu=DEFAULT_MU):
+    """
+    按照絕對 slot 組織數據：轉置為 (slot × event) 時間戳矩陣
+    frame 每 1024 個迴繞一次，以時間戳展開為遞增的絕對 slot，
+    避免超過 10.24 秒的日誌把不同時間的 slot 合併在一起
     
-    for (frame, slot), events in data.items():
-        # 獲取時間戳
-        t1 = events.get('t1', [None])[0]
-        t2 = events.get('t2', [None])[0]
-        t3 = events.get('t3', [None])[0]
-        t5 = events.get('t5', [None])[0]
-        
-        t4_ultti = events.get('t4-ultti', [None])[0]
-        t4_uldci = events.get('t4-uldci', [None])[0]
-        t4_dltti = events.get('t4-dltti', [None])[0]
-        t4_txdata = events.get('t4-txdata', [None])[0]
+    Raises:
+        ValueError: 日誌中的 slot 超出 mu 對應的每 frame slot 數 (需指定 --mu)
+    """
+    check_slot_range(entries.slot, mu)
+    abs_slots = unwrap_slots(entries.timestamp, entries.frame, entries.slot, mu)
+    slot_ids, first_row, rows = np.unique(abs_slots, return_index=True, return_inverse=True)
+    rows = rows.ravel()
+    
+    # 每個 (slot, event) 只保留第一次出現的時間戳
+    n_events = len(entries.event_names)
+    cells = rows * n_events + entries.event_code
+    _, first_cell = np.unique(cells, return_index=True)
+    timestamps = np.full((len(slot_ids), n_events), np.nan)
+    timestamps.flat[cells[first_cell]] = entries.timestamp[first_cell]
+    
+    # frame/slot 沿用日誌中的原始值
+    return SlotEventMatrix(slot_ids, entries.frame[first_row], entries.slot[first_row],
+                           timestamps, entries.event_names, mu)
+
+def iter_time_differences(data):
+    """
+    計算時間差異 (向量化)，逐個 (類別, 區間) 產生結果以便邊算邊寫出
+    每個類別只計算有對應 t4 事件的 slot，5 個區間皆為整欄陣列相減
+    
+    Yields:
+        tuple: (category, interval, IntervalSamples)，只包含有資料的區間
+    """
+    t1 = data.column('t1')
+    t2 = data.column('t2')
+    t3 = data.column('t3')
+    t5 = data.column('t5')
+    
+    for category in CATEGORIES:
+        t4 = data.column(f't4-{category}')
+        scheduled = ~np.isnan(t4)
+        spans = {
+            't1-t2': (t1, t2),
+            't2-t3': (t2, t3),
+            't3-t4': (t3, t4),
+            't4-t5': (t4, t5),
+            't1-t5': (t1, t5),
+        }
         
-        # 計算ultti的時間差
-        if t4_ultti:
-            if t1 and t2:
-                results['ultti']['t1-t2'].append({'frame': frame, 'slot': slot, 'duration_us': (t2 - t1) * 1e6})
-            if t2 and t3:
-                results['ultti']['t2-t3'].append({'frame': frame, 'slot': slot, 'duration_us': (t3 - t2) * 1e6})
-            if t3 and t4_ultti:
-                results['ultti']['t3-t4'].append({'frame': frame, 'slot': slot, 'duration_us': (t4_ultti - t3) * 1e6})
-            if t4_ultti and t5:
-                results['ultti']['t4-t5'].append({'frame': frame, 'slot': slot, 'duration_us': (t5 - t4_ultti) * 1e6})
-            if t1 and t5:
-                results['ultti']['t1-t5'].append({'frame': frame, 'slot': slot, 'duration_us': (t5 - t1) * 1e6})
+        for interval in TIME_INTERVALS:
+            start, end = spans[interval]
+            valid = scheduled & ~np.isnan(start) & ~np.isnan(end)
+            if valid.any():
+                yield category, interval, IntervalSamples(
+                    data.frame[valid], data.slot[valid], (end[valid] - start[valid]) * 1e6,
+                    data.abs_slot[valid])
+
+def calculate_time_differences(data, writer=None):
+    """
+    計算時間差異，writer (timing_io.TimingWriter) 不為 None 時同時寫出
+    
+    Returns:
+        dict: {category: {interval: IntervalSamples}}，只包含有資料的區間
+    """
+    results = {category: {} for category in CATEGORIES}
+    for category, interval, samples in iter_time_differences(data):
+        if writer is not None:
+            writer.write(category, interval, samples)
+        results[category][interval] = samples
+    return results
+
+COMPARISON_COLORS = ['red', 'blue']
+COMPARISON_MAX_US = 100
+
+def build_comparison_jobs(all_results, file_labels):
+    """
+    每張比較圖一個工作: (輸出檔名, 標題, [(標籤, 顏色, 已過濾的 duration 陣列), ...])
+    在主進程先過濾超過 100us 的數據，worker 只收到 NumPy 陣列
+    """
+    jobs = []
+    for category in CATEGORIES:
+        for interval in TIME_INTERVALS:
+            series = []
+            for idx, (file_key, file_label) in enumerate(file_labels):
+                samples = all_results[file_key][category].get(interval)
+                durations = samples.duration_us if samples else np.empty(0)
+                series.append((file_label, COMPARISON_COLORS[idx % len(COMPARISON_COLORS)],
+                               durations[durations <= COMPARISON_MAX_US]))
+            jobs.append((f'comparison-{category}-{interval}.png',
+                         f'Comparison - {category} - {interval}', series))
+    return jobs
+
+def load_pyplot():
+    """延遲載入 matplotlib (Agg backend)；--no-plot 時完全不載入，省下約 0.8 s 啟動時間"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def render_comparison_figures(jobs):
+    """
+    Worker: 以同一個 figure 依序繪製多張比較圖
+    只更新 scatter 的資料、標題與圖例，不重建 figure/axes
+    
+    Returns:
+        list: [(輸出檔名, 秒數), ...]
+    """
+    plt = load_pyplot()
+    fig, ax = plt.subplots(figsize=(14, 6))
+    ax.set_xlabel('Measurement Index')
+    ax.set_ylabel('Duration (μs)')
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(0, 110)
+    # 先放入標題再 tight_layout，保留標題的空間
+    title = ax.set_title(jobs[0][1])
+    n_series = max(len(series) for _, _, series in jobs)
+    scatters = [ax.scatter([], [], color=COMPARISON_COLORS[idx % len(COMPARISON_COLORS)],
+                           s=20, alpha=0.6) for idx in range(n_series)]
+    fig.tight_layout()
+    
+    timings = []
+    for output_file, figure_title, series in jobs:
+        start = time.perf_counter()
+        title.set_text(figure_title)
         
-        # 計算uldci的時間差
-        if t4_uldci:
-            if t1 and t2:
-                results['uldci']['t1-t2'].append({'frame': frame, 'slot': slot, 'duration_us': (t2 - t1) * 1e6})
-            if t2 and t3:
-                results['uldci']['t2-t3'].append({'frame': frame, 'slot': slot, 'duration_us': (t3 - t2) * 1e6})
-            if t3 and t4_uldci:
-                results['uldci']['t3-t4'].append({'frame': frame, 'slot': slot, 'duration_us': (t4_uldci - t3) * 1e6})
-            if t4_uldci and t5:
-                results['uldci']['t4-t5'].append({'frame': frame, 'slot': slot, 'duration_us': (t5 - t4_uldci) * 1e6})
-            if t1 and t5:
-                results['uldci']['t1-t5'].append({'frame': frame, 'slot': slot, 'duration_us': (t5 - t1) * 1e6})
+        handles = []
+        n_points = 0
+        for scatter, (label, color, durations) in zip(scatters, series):
+            scatter.set_offsets(np.column_stack((np.arange(len(durations)), durations)))
+            scatter.set_color(color)
+            if len(durations):
+                scatter.set_label(label)
+                handles.append(scatter)
+                n_points = max(n_points, len(durations))
         
-        # 計算dltti的時間差
-        if t4_dltti:
-            if t1 and t2:
-                results['dltti']['t1-t2'].append({'frame': frame, 'slot': slot, 'duration_us': (t2 - t1) * 1e6})
-            if t2 and t3:
-                results['dltti']['t2-t3'].append({'frame': frame, 'slot': slot, 'duration_us': (t3 - t2) * 1e6})
-            if t3 and t4_dltti:
-                results['dltti']['t3-t4'].append({'frame': frame, 'slot': slot, 'duration_us': (t4_dltti - t3) * 1e6})
-            if t4_dltti and t5:
-                results['dltti']['t4-t5'].append({'frame': frame, 'slot': slot, 'duration_us': (t5 - t4_dltti) * 1e6})
-            if t1 and t5:
-                results['dltti']['t1-t5'].append({'frame': frame, 'slot': slot, 'duration_us': (t5 - t1) * 1e6})
+        # 與 autoscale 相同的 5% 邊界
+        margin = 0.05 * (n_points - 1) if n_points > 1 else 0.5
+        ax.set_xlim(-margin, max(n_points - 1, 0) + margin)
+        legend = ax.legend(handles=handles, loc='upper right') if handles else None
         
-        # 計算txdata的時間差
-        if t4_txdata:
-            if t1 and t2:
-                results['txdata']['t1-t2'].append({'frame': frame, 'slot': slot, 'duration_us': (t2 - t1) * 1e6})
-            if t2 and t3:
-                results['txdata']['t2-t3'].append({'frame': frame, 'slot': slot, 'duration_us': (t3 - t2) * 1e6})
-            if t3 and t4_txdata:
-                results['txdata']['t3-t4'].append({'frame': frame, 'slot': slot, 'duration_us': (t4_txdata - t3) * 1e6})
-            if t4_txdata and t5:
-                results['txdata']['t4-t5'].append({'frame': frame, 'slot': slot, 'duration_us': (t5 - t4_txdata) * 1e6})
-            if t1 and t5:
-                results['txdata']['t1-t5'].append({'frame': frame, 'slot': slot, 'duration_us': (t5 - t1) * 1e6})
+        fig.savefig(output_file, dpi=150)
+        if legend is not None:
+            legend.remove()
+        timings.append((output_file, time.perf_counter() - start))
     
-    return results
+    plt.close(fig)
+    return timings
 
-def plot_time_differences(all_results, file_labels):
-    """繪製時間差異比較圖"""
-    categories = ['ultti', 'uldci', 'dltti', 'txdata']
-    time_intervals = ['t1-t2', 't2-t3', 't3-t4', 't4-t5', 't1-t5']
-    colors = ['red', 'blue']
+def plot_time_differences(all_results, file_labels, jobs=None):
+    """
+    繪製時間差異比較圖 (4 類別 × 5 區間)
+    圖表分配給多個進程 (Agg backend) 平行繪製，最後列出每張圖的繪製時間
+    """
+    figure_jobs = build_comparison_jobs(all_results, file_labels)
+    # 先在主進程載入，fork 出的 worker 直接沿用，不必各自重新 import
+    load_pyplot()
+    n_workers = max(1, min(jobs or os.cpu_count() or 1, len(figure_jobs)))
+    batches = [figure_jobs[i::n_workers] for i in range(n_workers)]
     
-    for category in categories:
-        for interval in time_intervals:
-            plt.figure(figsize=(14, 6))
-            
-            for idx, (file_key, file_label) in enumerate(file_labels):
-                data_list = all_results[file_key][category][interval]
-                if not data_list:
-                    continue
-                
-                # 過濾超過100us的數據
-                filtered_data = [d for d in data_list if d['duration_us'] <= 100]
-                
-                if not filtered_data:
-                    continue
-                
-                indices = list(range(len(filtered_data)))
-                durations = [d['duration_us'] for d in filtered_data]
-                
-                color = colors[idx % len(colors)]
-                plt.scatter(indices, durations, color=color, s=20, alpha=0.6, label=file_label)
-            
-            plt.title(f'Comparison - {category} - {interval}')
-            plt.xlabel('Measurement Index')
-            plt.ylabel('Duration (μs)')
-            plt.grid(True, alpha=0.3)
-            plt.ylim(0, 110)
-            plt.legend(loc='upper right')
-            plt.tight_layout()
-            
-            output_file = f'comparison-{category}-{interval}.png'
-            plt.savefig(output_file, dpi=150)
-            plt.close()
-            
-            print(f'已生成比較圖表: {output_file}')
-
-def plot_scheduling_heatmap(data, file_label):
-    """繪製排程熱圖 - Y軸20個slot, X軸Frame"""
-    # 收集所有frame和slot的t4事件
-    scheduling_data = defaultdict(lambda: defaultdict(lambda: {'ultti': False, 'uldci': False, 'dltti': False, 'txdata': False}))
-    
-    frames = set()
-    for (frame, slot), events in data.items():
-        frames.add(frame)
-        if 't4-ultti' in events:
-            scheduling_data[frame][slot]['ultti'] = True
-        if 't4-uldci' in events:
-            scheduling_data[frame][slot]['uldci'] = True
-        if 't4-dltti' in events:
-            scheduling_data[frame][slot]['dltti'] = True
-        if 't4-txdata' in events:
-            scheduling_data[frame][slot]['txdata'] = True
-    
-    if not frames:
-        print(f'警告: {file_label} 沒有找到任何t4事件')
-        return
+    start = time.perf_counter()
+    if n_workers == 1:
+        timings = render_comparison_figures(figure_jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            timings = [t for batch in pool.map(render_comparison_figures, batches) for t in batch]
+    wall = time.perf_counter() - start
+    
+    for output_file, _, _ in figure_jobs:
+        print(f'已生成比較圖表: {output_file}')
+    
+    print(f'\n繪圖時間 ({n_workers} 個進程):')
+    for output_file, seconds in sorted(timings, key=lambda t: -t[1]):
+        print(f'  {output_file:<40} {seconds:6.3f} s')
+    print(f'  共 {len(timings)} 張, 累計 {sum(s for _, s in timings):.3f} s, 實際耗時 {wall:.3f} s')
+
+def build_schedule_grid(data):
+    """
+    將 t4 事件編碼為整數格點 (slot × frame)，frame 為跨迴繞遞增的絕對 frame
+    0: 無 t4, 1: UL (ultti/uldci), 2: DL (dltti/txdata), 3: UL+DL
+    
+    Returns:
+        tuple: (排序後的絕對 frame 陣列, int8 格點)
+    """
+    n_slots = slots_per_frame(data.mu)
+    data_frames = absolute_frames(data.abs_slot, data.mu)
+    frames = np.unique(data_frames)
+    grid = np.zeros((n_slots, len(frames)), dtype=np.int8)
+    
+    code = (SCHEDULE_UL * (data.has('t4-ultti') | data.has('t4-uldci'))
+            + SCHEDULE_DL * (data.has('t4-dltti') | data.has('t4-txdata'))).astype(np.int8)
+    columns = np.searchsorted(frames, data_frames)
+    np.bitwise_or.at(grid, (data.slot, columns), code)
+    return frames, grid
+
+def render_heatmap_page(frames, grid, title, output_file):
+    """以單一 imshow 繪製一頁熱圖；UL+DL 的格子下半部紅色、上半部藍色"""
+    plt = load_pyplot()
+    from matplotlib.colors import ListedColormap
+    from matplotlib.patches import Patch
+    n_slots, n_frames = grid.shape
     
-    frames = sorted(frames)
-    slots = list(range(20))
-    
-    # 創建圖表
-    fig, ax = plt.subplots(figsize=(max(16, len(frames) * 0.3), 10))
-    
-    # 繪製每個slot和frame的狀態
-    for frame_idx, frame in enumerate(frames):
-        for slot in slots:
-            has_ul = scheduling_data[frame][slot]['ultti'] or scheduling_data[frame][slot]['uldci']
-            has_dl = scheduling_data[frame][slot]['dltti'] or scheduling_data[frame][slot]['txdata']
-            
-            if has_ul and has_dl:
-                # 上半部紅色，下半部藍色
-                ax.add_patch(plt.Rectangle((frame_idx, slot), 1, 0.5, facecolor='red', edgecolor='gray', linewidth=0.5))
-                ax.add_patch(plt.Rectangle((frame_idx, slot + 0.5), 1, 0.5, facecolor='blue', edgecolor='gray', linewidth=0.5))
-            elif has_ul:
-                ax.add_patch(plt.Rectangle((frame_idx, slot), 1, 1, facecolor='red', edgecolor='gray', linewidth=0.5))
-            elif has_dl:
-                ax.add_patch(plt.Rectangle((frame_idx, slot), 1, 1, facecolor='blue', edgecolor='gray', linewidth=0.5))
-            else:
-                ax.add_patch(plt.Rectangle((frame_idx, slot), 1, 1, facecolor='white', edgecolor='gray', linewidth=0.5))
+    # 每個 slot 拆成上下兩列像素: 下半部顯示 UL, 上半部顯示 DL
+    image = np.zeros((n_slots * 2, n_frames), dtype=np.int8)
+    ul = (grid & SCHEDULE_UL) != 0
+    dl = (grid & SCHEDULE_DL) != 0
+    image[0::2] = np.where(ul, 1, np.where(dl, 2, 0))
+    image[1::2] = np.where(dl, 2, np.where(ul, 1, 0))
+    
+    fig, ax = plt.subplots(figsize=(min(max(16, n_frames * 0.3), HEATMAP_MAX_WIDTH), 10))
+    ax.imshow(image, cmap=ListedColormap(['white', 'red', 'blue']), vmin=0, vmax=2,
+              origin='lower', extent=(0, n_frames, 0, n_slots),
+              aspect='auto', interpolation='nearest')
+    
+    # 格線
+    ax.set_xticks(np.arange(n_frames + 1), minor=True)
+    ax.set_yticks(np.arange(n_slots + 1), minor=True)
+    ax.grid(which='minor', color='gray', linewidth=0.5)
+    ax.tick_params(which='minor', length=0)
     
     # 設置座標軸
-    ax.set_xlim(0, len(frames))
-    ax.set_ylim(0, 20)
+    ax.set_xlim(0, n_frames)
+    ax.set_ylim(0, n_slots)
     ax.set_xlabel('Frame')
     ax.set_ylabel('Slot')
-    ax.set_title(f'Scheduling Heatmap - {file_label} (Red: UL, Blue: DL)')
+    ax.set_title(title)
     
-    # 設置刻度
-    ax.set_xticks(np.arange(len(frames)) + 0.5)
-    ax.set_xticklabels(frames, rotation=90, fontsize=8)
-    ax.set_yticks(np.arange(20) + 0.5)
-    ax.set_yticklabels(range(20))
+    # 設置刻度 (frame 太多時間隔標示)
+    step = max(1, int(np.ceil(n_frames / HEATMAP_MAX_XTICKS)))
+    ax.set_xticks(np.arange(0, n_frames, step) + 0.5)
+    ax.set_xticklabels(frames[::step], rotation=90, fontsize=8)
+    ax.set_yticks(np.arange(n_slots) + 0.5)
+    ax.set_yticklabels(range(n_slots))
     
     # 添加圖例
-    from matplotlib.patches import Patch
     legend_elements = [
         Patch(facecolor='red', edgecolor='gray', label='UL (ultti/uldci)'),
         Patch(facecolor='blue', edgecolor='gray', label='DL (dltti/txdata)'),
@@ -217,20 +382,70 @@ def plot_scheduling_heatmap(data, file_label):
     ax.legend(handles=legend_elements, loc='upper right')
     
     plt.tight_layout()
-    
-    output_file = f'heatmap-{file_label}.png'
     plt.savefig(output_file, dpi=150, bbox_inches='tight')
-    plt.close()
+    plt.close(fig)
+
+def plot_scheduling_heatmap(data, file_label, frames_per_page=HEATMAP_FRAMES_PER_PAGE):
+    """
+    繪製排程熱圖 - Y軸為每個 frame 的 slot (mu=1 時 20 個), X軸Frame (標示 SFN)
+    超過 frames_per_page 個 frame 時分頁輸出 heatmap-<label>-pNNN.png，
+    讓每張圖的寬度與繪製時間固定
+    """
+    frames, grid = build_schedule_grid(data)
     
-    print(f'已生成排程熱圖: {output_file}')
+    if not len(frames):
+        print(f'警告: {file_label} 沒有找到任何t4事件')
+        return
+    
+    n_pages = int(np.ceil(len(frames) / frames_per_page))
+    for page in range(n_pages):
+        start = page * frames_per_page
+        end = start + frames_per_page
+        
+        title = f'Scheduling Heatmap - {file_label} (Red: UL, Blue: DL)'
+        if n_pages == 1:
+            output_file = f'heatmap-{file_label}.png'
+        else:
+            title += f' [{page + 1}/{n_pages}]'
+            output_file = f'heatmap-{file_label}-p{page + 1:03d}.png'
+        
+        render_heatmap_page(frames[start:end] % SFN_PERIOD, grid[:, start:end], title, output_file)
+        print(f'已生成排程熱圖: {output_file}')
 
 def main():
-    if len(sys.argv) != 3:
-        print(f'使用方法: {sys.argv[0]} <log_file1> <log_file2>')
-        print(f'範例: {sys.argv[0]} ./measure-nfapi.txt ./measure-monolithic.txt')
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='比較兩個日誌的 t1..t5 時間差並繪製排程熱圖',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+範例:
+  python script.py ./measure-nfapi.txt ./measure-monolithic.txt
+  python script.py ./measure-nfapi.txt ./measure-monolithic.txt --no-cache
+  python script.py ./measure-nfapi.txt ./measure-monolithic.txt --timing-format npz
+  python script.py ./measure-nfapi.txt ./measure-monolithic.txt --timing-format npz --no-plot
+  python script.py ./measure-nfapi.txt ./measure-monolithic.txt --profile --profile-chrome trace.json
+  python script.py ./measure-nfapi.txt.gz ./measure-monolithic.txt.zst --no-plot
+        '''
+    )
+    parser.add_argument('log_files', nargs=2, metavar='log_file', help='日誌檔案 (兩個)')
+    parser.add_argument('--heatmap-frames-per-page', type=int, default=HEATMAP_FRAMES_PER_PAGE,
+                        help=f'排程熱圖每頁的 frame 數 (預設: {HEATMAP_FRAMES_PER_PAGE})')
+    parser.add_argument('--mu', type=int, default=DEFAULT_MU,
+                        help=f'numerology，決定每個 frame 的 slot 數與 slot 長度 (預設: {DEFAULT_MU})')
+    parser.add_argument('--plot-jobs', type=int, default=None,
+                        help='平行繪製比較圖的進程數 (預設: CPU 核心數)')
+    parser.add_argument('--timing-format', choices=sorted(TIMING_FORMATS), default=DEFAULT_TIMING_FORMAT,
+                        help='timing-<label> 輸出格式: json (舊格式), columnar (平行陣列 JSON), '
+                             f'ndjson (逐區間串流), npz (二進位)；讀取見 timing_io.py (預設: {DEFAULT_TIMING_FORMAT})')
+    parser.add_argument('--no-plot', action='store_true',
+                        help='不繪製比較圖與排程熱圖 (不載入 matplotlib)，只輸出 timing 檔與統計')
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
     
-    log_files = sys.argv[1:3]
+    args = parser.parse_args()
+    cache = cache_from_args(args)
+    profiler = profiler_from_args(args, 'script.py')
+    
+    log_files = args.log_files
     all_results = {}
     all_data = {}
     file_labels = []
@@ -239,46 +454,60 @@ def main():
     for log_file in log_files:
         print(f'\n解析日誌文件: {log_file}')
         
-        entries = parse_log_file(log_file)
-        print(f'解析到 {len(entries)} 條日誌')
-        
-        data = organize_by_frame_slot(entries)
-        results = calculate_time_differences(data)
-        
-        # 提取檔名標籤
-        import os
-        basename = os.path.basename(log_file)
+        # 提取檔名標籤 (壓縮檔去掉 .gz/.xz/.zst)
+        basename = strip_compression_suffix(os.path.basename(log_file))
         if basename.startswith('measure-') and basename.endswith('.txt'):
             suffix = basename.replace('measure-', '').replace('.txt', '')
         else:
             suffix = basename.replace('.txt', '')
         
+        with profiler.stage(f'parse_log_file [{suffix}]') as stage:
+            entries = cache.cached(log_file, 't1-t5-events', PARSER_VERSION,
+                                   lambda: parse_log_file(log_file),
+                                   encode_entries, decode_entries)
+            stage.items = len(entries)
+        print(f'解析到 {len(entries)} 條日誌')
+        
+        with profiler.stage(f'organize_by_frame_slot [{suffix}]', items=len(entries)):
+            try:
+                data = organize_by_frame_slot(entries, args.mu)
+            except ValueError as e:
+                print(f'錯誤: {log_file}: {e}')
+                sys.exit(1)
+        
+        # 計算時間差並同時保存 timing 檔
+        timing_file = timing_path(suffix, args.timing_format)
+        with profiler.stage(f'calculate_time_differences [{suffix}]') as stage, \
+                TimingWriter(timing_file, args.timing_format, CATEGORIES) as writer:
+            results = calculate_time_differences(data, writer)
+            stage.items = sum(len(samples) for category in results.values() for samples in category.values())
+        print(f'已保存 timing ({args.timing_format}): {timing_file}')
+        
         all_results[suffix] = results
         all_data[suffix] = data
         file_labels.append((suffix, suffix))
         
-        # 保存JSON
-        json_file = f'timing-{suffix}.json'
-        with open(json_file, 'w') as f:
-            json.dump({cat: {interval: data_list for interval, data_list in intervals.items()} 
-                      for cat, intervals in results.items()}, f, indent=2)
-        print(f'已保存JSON: {json_file}')
-        
         # 輸出統計
         print(f'統計資訊:')
-        for category in ['ultti', 'uldci', 'dltti', 'txdata']:
+        for category in CATEGORIES:
             total = sum(len(v) for v in results[category].values())
             if total > 0:
                 print(f'  {category}: {total} 個測量點')
     
+    if args.no_plot:
+        print('\n完成! (--no-plot, 略過繪圖)')
+        return
+    
     # 繪製時間差異比較圖
     print(f'\n開始繪製時間差異比較圖...')
-    plot_time_differences(all_results, file_labels)
+    with profiler.stage('plot_time_differences'):
+        plot_time_differences(all_results, file_labels, args.plot_jobs)
     
     # 繪製排程熱圖
     print(f'\n開始繪製排程熱圖...')
     for file_key, file_label in file_labels:
-        plot_scheduling_heatmap(all_data[file_key], file_label)
+        with profiler.stage(f'plot_scheduling_heatmap [{file_label}]', items=len(all_data[file_key])):
+            plot_scheduling_heatmap(all_data[file_key], file_label, args.heatmap_frames_per_page)
     
     print(f'\n完成!')
 
@@ -4,89 +4,94 @@
 """
 
 import sys
-import re
 import argparse
 from collections import defaultdict
 import numpy as np
-import matplotlib.pyplot as plt
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from nfapi_common.framelog import compile_frame_slot_pattern, scan
+from nfapi_common.profiling import add_profile_arguments, profiler_from_args
+from nfapi_common.slot_index import DEFAULT_MU, check_slot_range, unwrap_slots
+
+# 解析格式: [timestamp] frame=X slot=Y tZ
+EVENT_LINE_PATTERN = compile_frame_slot_pattern(rb'(t\d+)')
 
 def parse_log_file(log_path):
     """
     解析 log 文件，提取 timestamp、frame、slot 和 event type
+    以 mmap 掃描整個檔案，不逐行建立字串
     """
     entries = []
+    event_names = {}
     try:
-        with open(log_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # 解析格式: [timestamp] frame=X slot=Y tZ
-                match = re.match(r'\[(\d+\.\d+)\]\s+frame=(\d+)\s+slot=(\d+)\s+(t\d+)', line)
-                if match:
-                    timestamp = float(match.group(1))
-                    frame = int(match.group(2))
-                    slot = int(match.group(3))
-                    event_type = match.group(4)
-                    
-                    entries.append({
-                        'timestamp': timestamp,
-                        'frame': frame,
-                        'slot': slot,
-                        'event': event_type
-                    })
+        for timestamp, frame, slot, event in scan(log_path, EVENT_LINE_PATTERN):
+            event_type = event_names.get(event)
+            if event_type is None:
+                event_type = event_names[event] = event.decode('ascii')
+            
+            entries.append({
+                'timestamp': float(timestamp),
+                'frame': int(frame),
+                'slot': int(slot),
+                'event': event_type
+            })
     except FileNotFoundError:
         print(f"錯誤: 找不到文件 {log_path}")
         sys.exit(1)
     
     return entries
 
-def extract_t1_slots(entries):
+def extract_t1_slots(entries, mu=DEFAULT_MU):
     """
     提取每個 slot 的 T1 timestamp（固定參考 T1）
-    """
-    t1_slots = {}
+    以絕對 slot 為鍵 (frame 每 1024 個迴繞一次，依時間戳展開)，
+    同一 slot 有多個 T1 時保留最後一個
     
-    for entry in entries:
-        if entry['event'] == 't1':
-            slot_id = (entry['frame'], entry['slot'])
-            t1_slots[slot_id] = entry['timestamp']
+    Returns:
+        tuple: (依絕對 slot 排序的 slot 陣列, 對應的 T1 timestamp 陣列,
+                日誌中原始的 frame 陣列, 原始的 slot 陣列)
     
-    return t1_slots
+    Raises:
+        ValueError: 日誌中的 slot 超出 mu 對應的每 frame slot 數 (需指定 --mu)
+    """
+    t1 = [entry for entry in entries if entry['event'] == 't1']
+    timestamps = np.array([entry['timestamp'] for entry in t1], dtype=np.float64)
+    frames = np.array([entry['frame'] for entry in t1], dtype=np.int64)
+    slots = np.array([entry['slot'] for entry in t1], dtype=np.int64)
+    check_slot_range(slots, mu)
+    abs_slots = unwrap_slots(timestamps, frames, slots, mu)
+    
+    # 反轉後取第一次出現 = 原順序的最後一次
+    slot_ids, last = np.unique(abs_slots[::-1], return_index=True)
+    return slot_ids, timestamps[::-1][last], frames[::-1][last], slots[::-1][last]
 
 def calculate_intervals(t1_slots):
     """
     計算相鄰 slot 間的時間間隔
     返回 slot 編號和對應的時間間隔（毫秒）
     """
-    if len(t1_slots) < 2:
+    slot_ids, timestamps, frames, slots = t1_slots
+    if len(slot_ids) < 2:
         print("警告: 沒有足夠的 T1 數據來計算間隔")
         return [], []
     
     # 按時間順序排序
-    sorted_slots = sorted(t1_slots.items(), key=lambda x: x[1])
-    
-    slot_labels = []
-    intervals_ms = []
-    
-    for i in range(1, len(sorted_slots)):
-        prev_slot, prev_time = sorted_slots[i-1]
-        curr_slot, curr_time = sorted_slots[i]
-        
-        interval = (curr_time - prev_time) * 1000  # 轉換為毫秒
-        intervals_ms.append(interval)
-        
-        # 創建槽位標籤
-        label = f"F{curr_slot[0]}_S{curr_slot[1]}"
-        slot_labels.append(label)
+    order = np.argsort(timestamps, kind='stable')
+    frames, slots = frames[order], slots[order]
+    
+    intervals_ms = (np.diff(timestamps[order]) * 1000).tolist()  # 轉換為毫秒
+    
+    # 創建槽位標籤
+    slot_labels = [f"F{frame}_S{slot}" for frame, slot in zip(frames[1:].tolist(), slots[1:].tolist())]
     
     return slot_labels, intervals_ms
 
 def plot_intervals(slot_labels, intervals_ms, output_path=None):
     """
-    繪製時間間隔圖表
+    繪製時間間隔圖表 (matplotlib 在此才載入，--no-plot 時不需要)
     """
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(14, 6))
     
     # 繪製柱狀圖
@@ -144,6 +149,8 @@ def main():
 使用範例:
   python slot_interval_analyzer.py log.txt
   python slot_interval_analyzer.py log.txt -o output.png
+  python slot_interval_analyzer.py log.txt --no-plot
+  python slot_interval_analyzer.py log.txt --profile --profile-chrome trace.json
   python slot_interval_analyzer.py --help
         '''
     )
@@ -151,26 +158,42 @@ def main():
     parser.add_argument('log_file', help='輸入的 log 文件路徑')
     parser.add_argument('-o', '--output', default=None,
                        help='輸出圖表的保存路徑（默認: 不保存）')
+    parser.add_argument('--mu', type=int, default=DEFAULT_MU,
+                       help=f'numerology，決定每個 frame 的 slot 數與 slot 長度（默認: {DEFAULT_MU}）')
+    parser.add_argument('--no-plot', action='store_true',
+                       help='只輸出統計，不繪製圖表（不載入 matplotlib）')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
+    profiler = profiler_from_args(args, 'slot_analyzer.py')
     
     print(f"📖 正在解析 log 文件: {args.log_file}")
-    entries = parse_log_file(args.log_file)
+    with profiler.stage('parse_log_file') as stage:
+        entries = parse_log_file(args.log_file)
+        stage.items = len(entries)
     print(f"✓ 解析成功，共找到 {len(entries)} 條記錄")
     
     print("🔍 提取 T1 事件...")
-    t1_slots = extract_t1_slots(entries)
-    print(f"✓ 找到 {len(t1_slots)} 個 T1 event")
+    with profiler.stage('extract_t1_slots', items=len(entries)):
+        try:
+            t1_slots = extract_t1_slots(entries, args.mu)
+        except ValueError as e:
+            print(f"錯誤: {e}")
+            sys.exit(1)
+    print(f"✓ 找到 {len(t1_slots[0])} 個 T1 event")
     
     print("📊 計算時間間隔...")
-    slot_labels, intervals_ms = calculate_intervals(t1_slots)
+    with profiler.stage('calculate_intervals', items=len(t1_slots[0])):
+        slot_labels, intervals_ms = calculate_intervals(t1_slots)
     
     # 打印統計信息
     print_statistics(intervals_ms)
     
     # 繪製圖表
-    print("🎨 正在繪製圖表...")
-    plot_intervals(slot_labels, intervals_ms, output_path=args.output)
+    if not args.no_plot:
+        print("🎨 正在繪製圖表...")
+        with profiler.stage('plot_intervals', items=len(intervals_ms)):
+            plot_intervals(slot_labels, intervals_ms, output_path=args.output)
     
     print("✅ 分析完成！")
 
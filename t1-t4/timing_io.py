@@ -0,0 +1,187 @@
+"""
+timing-<label>.* 的輸出與讀取
+
+格式:
+  json      舊格式: {類別: {區間: [{'frame', 'slot', 'duration_us'}, ...]}} (indent=2)
+  columnar  {類別: {區間: {'frame': [...], 'slot': [...], 'duration_us': [...], 'abs_slot': [...]}}}
+  ndjson    每個 (類別, 區間) 一行，計算完即寫出；讀取時只解析需要的那一行
+  npz       NumPy 陣列，鍵為 '類別/區間/欄位'；np.load 只在存取時讀取該陣列
+
+讀取範例 (notebook):
+  from timing_io import load_interval
+  samples = load_interval('timing-nfapi.npz', 'dltti', 't1-t5')
+  samples['duration_us'].mean()
+"""
+import json
+import numpy as np
+
+TIMING_FORMATS = {
+    'json': '.json',
+    'columnar': '.json',
+    'ndjson': '.ndjson',
+    'npz': '.npz',
+}
+DEFAULT_TIMING_FORMAT = 'json'
+
+FIELDS = ('frame', 'slot', 'duration_us', 'abs_slot')
+FIELD_DTYPES = {
+    'frame': np.int64,
+    'slot': np.int64,
+    'duration_us': np.float64,
+    'abs_slot': np.int64,
+}
+
+def timing_path(label, fmt=DEFAULT_TIMING_FORMAT):
+    """輸出檔名: timing-<label><副檔名>"""
+    return f'timing-{label}{TIMING_FORMATS[fmt]}'
+
+def _columns(samples):
+    return {field: getattr(samples, field) for field in FIELDS}
+
+class TimingWriter:
+    """
+    逐個 (類別, 區間) 寫出量測結果
+    ndjson 立即寫入檔案；其餘格式在 close() 時一次寫出
+    categories 依序預先建立，json/columnar 中沒有資料的類別仍寫出 {} (與舊格式相同)
+
+    用法:
+        with TimingWriter(path, 'ndjson', CATEGORIES) as writer:
+            writer.write('dltti', 't1-t5', samples)
+    """
+
+    def __init__(self, path, fmt=DEFAULT_TIMING_FORMAT, categories=()):
+        if fmt not in TIMING_FORMATS:
+            raise ValueError(f'不支援的輸出格式: {fmt}')
+        self.path = path
+        self.fmt = fmt
+        self._pending = {category: {} for category in categories}
+        self._stream = open(path, 'w') if fmt == 'ndjson' else None
+
+    def write(self, category, interval, samples):
+        if self.fmt == 'ndjson':
+            # category/interval 放在行首，讀取時可先比對前綴再解析
+            record = {'category': category, 'interval': interval}
+            record.update({field: values.tolist() for field, values in _columns(samples).items()})
+            self._stream.write(json.dumps(record, separators=(',', ':')) + '\n')
+        else:
+            self._pending.setdefault(category, {})[interval] = samples
+
+    def close(self):
+        if self.fmt == 'ndjson':
+            self._stream.close()
+        elif self.fmt == 'npz':
+            np.savez(self.path, **{f'{category}/{interval}/{field}': values
+                                   for category, intervals in self._pending.items()
+                                   for interval, samples in intervals.items()
+                                   for field, values in _columns(samples).items()})
+        elif self.fmt == 'columnar':
+            # json.dumps 一次寫出比 json.dump 逐段寫入快
+            with open(self.path, 'w') as f:
+                f.write(json.dumps({category: {interval: {field: values.tolist()
+                                                          for field, values in _columns(samples).items()}
+                                               for interval, samples in intervals.items()}
+                                    for category, intervals in self._pending.items()},
+                                   separators=(',', ':')))
+        else:
+            with open(self.path, 'w') as f:
+                f.write(json.dumps({category: {interval: samples.to_records()
+                                               for interval, samples in intervals.items()}
+                                    for category, intervals in self._pending.items()}, indent=2))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _as_arrays(columns):
+    """欄位 list → NumPy 陣列 (依 FIELD_DTYPES)"""
+    return {field: np.asarray(values, dtype=FIELD_DTYPES.get(field))
+            for field, values in columns.items()}
+
+def _from_json_value(value):
+    """json / columnar 中單一區間的值 → 欄位陣列"""
+    if isinstance(value, dict):
+        return _as_arrays(value)
+    return _as_arrays({field: [record[field] for record in value]
+                       for field in ('frame', 'slot', 'duration_us')})
+
+def _iter_ndjson(path, category=None, interval=None):
+    prefix = None
+    if category is not None and interval is not None:
+        prefix = json.dumps({'category': category, 'interval': interval},
+                            separators=(',', ':'))[:-1] + ','
+    with open(path) as f:
+        for line in f:
+            if prefix is not None and not line.startswith(prefix):
+                continue
+            record = json.loads(line)
+            if category is not None and record['category'] != category:
+                continue
+            yield record.pop('category'), record.pop('interval'), _as_arrays(record)
+
+def list_intervals(path):
+    """檔案中所有 (類別, 區間)"""
+    if path.endswith('.npz'):
+        with np.load(path) as npz:
+            return sorted({tuple(key.split('/')[:2]) for key in npz.files})
+    if path.endswith('.ndjson'):
+        pairs = []
+        with open(path) as f:
+            for line in f:
+                # 只解析行首的 category/interval
+                head = json.loads(line[:line.index(',"frame"')] + '}')
+                pairs.append((head['category'], head['interval']))
+        return pairs
+    with open(path) as f:
+        data = json.load(f)
+    return [(category, interval) for category, intervals in data.items() for interval in intervals]
+
+def load_interval(path, category, interval):
+    """
+    讀取單一 (類別, 區間)
+
+    Returns:
+        dict: {欄位: NumPy 陣列}；json 舊格式沒有 abs_slot
+
+    Raises:
+        KeyError: 檔案中沒有該區間
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as npz:
+            keys = [key for key in npz.files if key.startswith(f'{category}/{interval}/')]
+            if not keys:
+                raise KeyError(f'{category}/{interval}')
+            return {key.rsplit('/', 1)[1]: npz[key] for key in keys}
+    if path.endswith('.ndjson'):
+        for _, _, columns in _iter_ndjson(path, category, interval):
+            return columns
+        raise KeyError(f'{category}/{interval}')
+    with open(path) as f:
+        return _from_json_value(json.load(f)[category][interval])
+
+def load_timing(path, category=None):
+    """
+    讀取整個檔案 (或單一類別)
+
+    Returns:
+        dict: {類別: {區間: {欄位: NumPy 陣列}}}
+    """
+    results = {}
+    if path.endswith('.npz'):
+        with np.load(path) as npz:
+            for key in npz.files:
+                cat, interval, field = key.split('/')
+                if category is None or cat == category:
+                    results.setdefault(cat, {}).setdefault(interval, {})[field] = npz[key]
+        return results
+    if path.endswith('.ndjson'):
+        for cat, interval, columns in _iter_ndjson(path, category):
+            results.setdefault(cat, {})[interval] = columns
+        return results
+    with open(path) as f:
+        data = json.load(f)
+    for cat, intervals in data.items():
+        if category is None or cat == category:
+            results[cat] = {interval: _from_json_value(value) for interval, value in intervals.items()}
+    return results
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+VNF/PNF 即時追蹤模式 (--follow)
+- 只讀取日誌新增的位元組，不會重新讀取整個檔案
+- 支援 log rotation (檔案被替換或截斷)
+- 以固定記憶體的時間環狀緩衝統計最近 1s/10s/60s 的次數與百分位數
+- 每個訊息類型分開統計: VNF 每個 slot 的 delay 樣本與 High DL_TTI/TxData 警告，
+  PNF 的 TOO LATE 與 TOO EARLY
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from nfapi_common.histogram import LogBuckets
+
+# 顯示順序: (訊息類型, 類別)；VNF 的 delay 為每個 slot 的樣本，HIGH 為高延遲警告，
+# PNF 的類別為 timing_status
+SERIES = (
+    ('DL_TTI', 'delay'), ('UL_TTI', 'delay'), ('ULDCI', 'delay'), ('TX_DATA', 'delay'),
+    ('DL_TTI', 'HIGH'), ('TX_DATA', 'HIGH'),
+    ('DL_TTI', 'TOO LATE'), ('UL_TTI', 'TOO LATE'), ('TX_DATA', 'TOO LATE'),
+    ('DL_TTI', 'TOO EARLY'), ('UL_TTI', 'TOO EARLY'), ('TX_DATA', 'TOO EARLY'),
+)
+
+# 解析結果 type -> 類別；PNF 記錄沒有列在這裡，以 timing_status 為類別
+ROW_KINDS = {
+    'vnf-jitterdelay': 'delay',
+    'vnf-dltti': 'HIGH',
+    'vnf-txdata': 'HIGH',
+}
+
+# 解析結果 -> [(訊息類型, 欄位)]
+ROW_FIELDS = {
+    'vnf-jitterdelay': [('DL_TTI', 'dl_delay'), ('UL_TTI', 'ul_delay'),
+                        ('ULDCI', 'uldci_delay'), ('TX_DATA', 'txdata_delay')],
+    'vnf-dltti': [('DL_TTI', 'dl_delay')],
+    'vnf-txdata': [('TX_DATA', 'txdata_delay')],
+    'pnf-dltti': [('DL_TTI', 'delta_us')],
+    'pnf-txdata': [('TX_DATA', 'delta_us')],
+    'pnf-ultti': [('UL_TTI', 'delta_us')],
+}
+
+MAX_READ_BYTES = 8 << 20
+
+class LogTail:
+    """
+    追蹤成長中的日誌檔案，每次 poll() 只回傳新增的完整行
+    檔案 inode 改變 (rotation) 或大小變小 (截斷) 時會重新從頭讀取
+    """
+
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.file = None
+        self.inode = None
+        self.partial = b''
+        # 啟動時已存在的檔案依 from_start 決定位置；之後才出現的檔案一律從頭讀
+        self._open(from_start)
+
+    def _open(self, from_start):
+        try:
+            self.file = open(self.path, 'rb')
+        except FileNotFoundError:
+            self.file = None
+            return
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.partial = b''
+        if not from_start:
+            self.file.seek(0, os.SEEK_END)
+
+    def _rotated(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return st.st_ino != self.inode
+
+    def poll(self):
+        """回傳自上次呼叫後新增的完整行 (str)"""
+        if self.file is None:
+            self._open(True)
+            if self.file is None:
+                return []
+
+        if os.fstat(self.file.fileno()).st_size < self.file.tell():
+            # copytruncate 類型的 rotation
+            self.file.seek(0)
+            self.partial = b''
+
+        lines = self._read_lines()
+
+        if not lines and self._rotated():
+            # 舊檔已讀完，切換到新檔
+            self.file.close()
+            self.file = None
+            self._open(True)
+            if self.file is not None:
+                lines += self._read_lines()
+        return lines
+
+    def _read_lines(self):
+        """最多讀取 MAX_READ_BYTES，讓每次 poll 的記憶體用量有上限"""
+        chunk = self.file.read(MAX_READ_BYTES)
+        if not chunk:
+            return []
+        complete, _, self.partial = (self.partial + chunk).rpartition(b'\n')
+        if not complete:
+            return []
+        return complete.decode('utf-8', errors='ignore').split('\n')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+# 固定大小的對數分桶 (正負值分開)，每個 2 倍區間切成 8 份
+# 百分位數誤差約在 1/8 個 2 倍區間內
+BUCKETS = LogBuckets(sub_bits=3)
+
+class RollingWindow:
+    """
+    以固定數量的時間桶組成的環狀緩衝，記憶體與事件數量無關
+    每個時間桶保存最大值與對數分桶計數 (BUCKETS)
+    """
+
+    def __init__(self, span, bucket_width):
+        self.bucket_width = bucket_width
+        self.n_buckets = int(np.ceil(span / bucket_width)) + 1
+        self.bucket_ids = np.full(self.n_buckets, -1, dtype=np.int64)
+        self.counts = np.zeros((self.n_buckets, BUCKETS.size), dtype=np.int32)
+        self.maxima = np.full(self.n_buckets, -np.inf)
+
+    def _slot(self, now):
+        bucket_id = int(now // self.bucket_width)
+        slot = bucket_id % self.n_buckets
+        if self.bucket_ids[slot] != bucket_id:
+            self.bucket_ids[slot] = bucket_id
+            self.counts[slot] = 0
+            self.maxima[slot] = -np.inf
+        return slot
+
+    def add(self, now, value):
+        slot = self._slot(now)
+        self.counts[slot, BUCKETS.index(value)] += 1
+        self.maxima[slot] = max(self.maxima[slot], value)
+
+    def summary(self, now, window):
+        """最近 window 秒的 (次數, p50, p99, 最大值)"""
+        current = int(now // self.bucket_width)
+        oldest = current - int(np.ceil(window / self.bucket_width)) + 1
+        live = (self.bucket_ids >= oldest) & (self.bucket_ids <= current)
+        hist = self.counts[live].sum(axis=0)
+        total = int(hist.sum())
+        if total == 0:
+            return 0, None, None, None
+        cumulative = np.cumsum(hist)
+        p50 = BUCKETS.value_at(int(np.searchsorted(cumulative, 0.50 * total)))
+        p99 = BUCKETS.value_at(int(np.searchsorted(cumulative, 0.99 * total)))
+        return total, p50, p99, self.maxima[live].max()
+
+class LiveStats:
+    """
+    每個 (來源, 訊息類型, 類別) 一組 RollingWindow，第一次出現時建立
+    TOO LATE 與 TOO EARLY、delay 樣本與 HIGH 警告分開計數與計算百分位數
+    """
+
+    def __init__(self, sources, windows, bucket_width):
+        self.sources = list(sources)
+        self.windows = windows
+        self.bucket_width = bucket_width
+        self.stats = {}
+
+    def add_row(self, source, row, now):
+        kind = row.get('type')
+        category = ROW_KINDS.get(kind, row.get('timing_status'))
+        if category is None:
+            return
+        for msg, field in ROW_FIELDS.get(kind, []):
+            value = row.get(field)
+            if value is None:
+                continue
+            key = (source, msg, category)
+            window = self.stats.get(key)
+            if window is None:
+                window = self.stats[key] = RollingWindow(max(self.windows), self.bucket_width)
+            window.add(now, value)
+
+    def _order(self, key):
+        source, msg, category = key
+        series = (msg, category)
+        return (self.sources.index(source) if source in self.sources else len(self.sources),
+                SERIES.index(series) if series in SERIES else len(SERIES), key)
+
+    def render(self, now):
+        header = f"{'SOURCE':<8}{'TYPE':<9}{'KIND':<11}" + ''.join(
+            f"{f'n/{w:g}s':>10}{'p50':>10}{'p99':>10}{'max':>12}" for w in self.windows)
+        lines = [header, '-' * len(header)]
+        for key in sorted(self.stats, key=self._order):
+            source, msg, category = key
+            window = self.stats[key]
+            row = f"{source:<8}{msg:<9}{category:<11}"
+            for w in self.windows:
+                count, p50, p99, peak = window.summary(now, w)
+                if count:
+                    row += f"{count:>10}{p50:>10}{p99:>10}{peak:>12.0f}"
+                else:
+                    row += f"{0:>10}{'-':>10}{'-':>10}{'-':>12}"
+            lines.append(row)
+        return '\n'.join(lines)
+
+def follow_logs(logs, parse_line, windows=(1, 10, 60), refresh=1.0,
+                bucket_width=0.5, from_start=False, clock=time.monotonic):
+    """
+    追蹤多個日誌並定期刷新終端摘要，直到 Ctrl-C
+
+    Args:
+        logs: {來源名稱: 日誌路徑}
+        parse_line: 單行解析函式 (VNFPNFLogParser.parse_line)
+        windows: 統計視窗長度 (秒)
+        refresh: 終端刷新週期 (秒)
+    """
+    tails = {source: LogTail(path, from_start) for source, path in logs.items()}
+    live = LiveStats(list(logs), windows, bucket_width)
+    next_refresh = clock()
+
+    try:
+        while True:
+            busy = False
+            for source, tail in tails.items():
+                lines = tail.poll()
+                busy = busy or bool(lines)
+                now = clock()
+                for line in lines:
+                    row = parse_line(line)
+                    if row:
+                        live.add_row(source, row, now)
+
+            now = clock()
+            if now >= next_refresh:
+                sys.stdout.write('\x1b[H\x1b[2J')
+                sys.stdout.write(f"追蹤中: {', '.join(f'{s}={p}' for s, p in logs.items())}  (Ctrl-C 結束)\n\n")
+                sys.stdout.write(live.render(now) + '\n')
+                sys.stdout.flush()
+                next_refresh = now + refresh
+
+            if not busy:
+                time.sleep(min(0.2, refresh))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for tail in tails.values():
+            tail.close()
@@ -1,35 +1,379 @@
 #!/usr/bin/env python3
 import sys
+import heapq
+import argparse
+import tempfile
+from array import array
+from pathlib import Path
 
-def merge_and_sort_files(file1, file2, output_file):
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from nfapi_common.cache import add_cache_arguments, cache_from_args
+from nfapi_common.clock_align import CLOCK_FIT_VERSION, ClockFit, fit_slot_clock
+from nfapi_common.framelog import compile_frame_slot_pattern, scan, scan_lines
+from nfapi_common.slot_index import DEFAULT_MU, SFN_PERIOD, slots_per_frame, unwrap_slots
+
+# --align-clocks 每個檔案最多保留的 (timestamp, slot) 取樣數，記憶體與檔案大小無關
+CLOCK_SAMPLES = 1 << 18
+FRAME_SLOT_PATTERN = compile_frame_slot_pattern(rb'')
+# 串流合併時每個輸入的重排視窗 (行數)：位置偏差在視窗內的亂序行直接在記憶體中排好
+DEFAULT_REORDER_WINDOW = 10_000
+# 外部排序同時開啟的暫存檔上限，超過時先合併成一個
+MAX_OPEN_SPILLS = 64
+# 串流合併時已寫出行的 (timestamp, 輸入編號) 每段筆數
+WRITTEN_KEYS_BLOCK = 1 << 16
+
+def merge_and_sort_files(file1, file2, output_file, fits=None):
     lines = []
-    timestamp_pattern = r'\[(\d+\.\d+)\]'
-    import re
 
-    # 收集所有行和其timestamp
+    # 收集所有行和其timestamp (mmap 掃描, 以 bytes 處理)
     for filename in [file1, file2]:
-        with open(filename, 'r') as f:
-            for line in f:
-                match = re.search(timestamp_pattern, line)
-                if match:
-                    ts = float(match.group(1))
-                    lines.append((ts, line.rstrip('\n')))
-    
+        lines.extend(iter_timestamped_lines(filename, (fits or {}).get(filename)))
+
     # 按timestamp排序
     lines.sort(key=lambda x: x[0])
-    
+
     # 寫入新檔案
-    with open(output_file, 'w') as f:
+    with open(output_file, 'wb') as f:
         for ts, line in lines:
-            f.write(f"{line}\n")
-    
+            f.write(line + b'\n')
+
     print(f"已合併並排序到: {output_file}")
 
-if __name__ == '__main__':
-    if len(sys.argv) != 4:
-        print(f"使用方法: {sys.argv[0]} ./measure.txt ./measure-VNF.txt ./measure-nfapi.txt")
+def iter_timestamped_lines(filename, fit=None):
+    """
+    產生 (timestamp, line bytes)，略過沒有timestamp的行
+    有 fit (ClockFit) 時 timestamp 換算到參考檔案的時間軸，行內的 [timestamp] 一併改寫
+    """
+    if fit is None or not fit.ok:
+        for line, ts in scan_lines(filename):
+            yield float(ts), line
+        return
+    offset, drift, ref = fit.offset, fit.drift, fit.ref
+    for line, ts in scan_lines(filename):
+        aligned = float(ts) + offset + drift * (float(ts) - ref)
+        decimals = len(ts) - ts.index(b'.') - 1
+        yield aligned, line.replace(b'[%s]' % ts, b'[%.*f]' % (decimals, aligned), 1)
+
+def slot_times(filename, mu=DEFAULT_MU, max_samples=CLOCK_SAMPLES):
+    """
+    檔案中 "[timestamp] frame=X slot=Y" 行的 (timestamp, 絕對 slot) 取樣
+
+    只保留 (frame * slots_per_frame + slot) % stride == 0 的行；取樣數超過
+    max_samples 時 stride 加倍並丟棄不再符合的取樣，因此記憶體有上限。
+    stride 是 SFN 週期的因數，各檔案取到的是相同的 slot，配對不受影響
+
+    Returns:
+        tuple: (timestamps, 絕對 slot, stride)
+    """
+    spf = slots_per_frame(mu)
+    period = SFN_PERIOD * spf
+    max_stride = period & -period  # 能整除 SFN 週期的最大 2 的冪次
+    times, keys = array('d'), array('q')
+    stride = 1
+    for ts, frame, slot in scan(filename, FRAME_SLOT_PATTERN):
+        key = int(frame) * spf + int(slot)
+        if key % stride:
+            continue
+        times.append(float(ts))
+        keys.append(key)
+        if len(keys) > max_samples and stride < max_stride:
+            stride *= 2
+            keep = np.frombuffer(keys, dtype=np.int64) % stride == 0
+            kept_times = np.frombuffer(times, dtype=np.float64)[keep]
+            kept_keys = np.frombuffer(keys, dtype=np.int64)[keep]
+            times, keys = array('d', kept_times.tobytes()), array('q', kept_keys.tobytes())
+
+    timestamps = np.frombuffer(times, dtype=np.float64)
+    keys = np.frombuffer(keys, dtype=np.int64)
+    return timestamps, unwrap_slots(timestamps, keys // spf, keys % spf, mu), stride
+
+def estimate_clock_fits(input_files, mu=DEFAULT_MU, cache=None):
+    """
+    以第一個輸入為參考時間軸，估計其餘輸入的時鐘偏移/漂移 (同一 slot 的事件配對)
+    每對檔案的結果存入快取
+
+    Returns:
+        dict: {檔名: ClockFit}
+    """
+    reference = input_files[0]
+    ref_times = None
+    fits = {}
+    for filename in input_files[1:]:
+        def fit_pair():
+            nonlocal ref_times
+            if ref_times is None:
+                ref_times = slot_times(reference, mu)
+            src_times, src_slots, src_stride = slot_times(filename, mu)
+            dst_times, dst_slots, dst_stride = ref_times
+            # 兩邊取樣間隔不同時，以較大者重新取樣，確保取到相同的 slot
+            stride = max(src_stride, dst_stride)
+            src = src_slots % stride == 0
+            dst = dst_slots % stride == 0
+            return fit_slot_clock(src_times[src], src_slots[src], dst_times[dst], dst_slots[dst], mu)
+        if cache is not None:
+            fit = cache.cached((filename, reference), f'clock-fit-mu{mu}', CLOCK_FIT_VERSION,
+                               fit_pair, ClockFit.to_arrays, ClockFit.from_arrays)
+        else:
+            fit = fit_pair()
+        fits[filename] = fit
+        if fit.ok:
+            print(f"時鐘對齊 {filename} -> {reference}: 偏移 {fit.offset:.6f} s, "
+                  f"漂移 {fit.drift * 1e6:.3f} ppm, 殘差中位數 {fit.residual_mad * 1e6:.1f} µs "
+                  f"({fit.n_pairs} 個共同 slot)")
+        else:
+            print(f"時鐘對齊 {filename}: 與 {reference} 的共同 slot 只有 {fit.n_pairs} 個, 維持原始時間戳")
+    return fits
+
+class OutOfOrder(Exception):
+    """輸入的亂序超出重排視窗"""
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.filename = filename
+
+class ReorderedStream:
+    """
+    以最多 window 筆的 heap 修正局部亂序，依 (timestamp, 原順序) 輸出 (穩定排序)
+    有一行比已輸出的行更早 (亂序超出視窗) 時拋出 OutOfOrder，
+    之後 remainder() 依原順序回傳尚未輸出的行 (heap 中的行、該行與其餘輸入)
+    """
+
+    def __init__(self, records, window, filename):
+        self.filename = filename
+        self._records = iter(records)
+        self._window = window
+        self._heap = []
+        self._seq = 0
+        self._last = float('-inf')
+        self._late = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        for ts, line in self._records:
+            seq = self._seq
+            self._seq += 1
+            if ts < self._last:
+                self._late = (ts, line)
+                raise OutOfOrder(self.filename)
+            if len(self._heap) < self._window:
+                heapq.heappush(self._heap, (ts, seq, line))
+                continue
+            self._last, _, line = heapq.heappushpop(self._heap, (ts, seq, line))
+            return self._last, line
+        if self._heap:
+            ts, _, line = heapq.heappop(self._heap)
+            return ts, line
+        raise StopIteration
+
+    def remainder(self):
+        for ts, _, line in sorted(self._heap, key=lambda x: x[1]):
+            yield ts, line
+        yield self._late
+        yield from self._records
+
+def _spill_run(run, tmp_dir):
+    """將一段已排序的行寫入暫存檔"""
+    run.sort(key=lambda x: x[0])
+    spill = tempfile.TemporaryFile(mode='w+b', dir=tmp_dir)
+    for ts, line in run:
+        spill.write(b'%r\t%s\n' % (ts, line))
+    spill.seek(0)
+    return spill
+
+def _iter_spilled_run(spill):
+    """讀回暫存檔中的 (timestamp, line)"""
+    for record in spill:
+        ts, line = record.rstrip(b'\n').split(b'\t', 1)
+        yield float(ts), line
+
+def _merge_spills(spills, tmp_dir):
+    """將多個暫存檔合併為一個 (相同timestamp維持暫存檔順序) 並關閉原檔"""
+    merged = tempfile.TemporaryFile(mode='w+b', dir=tmp_dir)
+    for ts, line in heapq.merge(*(_iter_spilled_run(spill) for spill in spills), key=lambda x: x[0]):
+        merged.write(b'%r\t%s\n' % (ts, line))
+    for spill in spills:
+        spill.close()
+    merged.seek(0)
+    return merged
+
+def external_sort(records, chunk_lines, tmp_dir=None):
+    """
+    外部排序 (timestamp, line): 每 chunk_lines 行排序後寫入暫存檔, 再以 k-way merge 讀回
+    同時開啟的暫存檔超過 MAX_OPEN_SPILLS 時先合併為一個
+    回傳 (iterator, spills)，呼叫端需在使用完畢後關閉 spills
+    """
+    spills = []
+    run = []
+    for record in records:
+        run.append(record)
+        if len(run) >= chunk_lines:
+            spills.append(_spill_run(run, tmp_dir))
+            run = []
+            if len(spills) >= MAX_OPEN_SPILLS:
+                spills = [_merge_spills(spills, tmp_dir)]
+    if run:
+        spills.append(_spill_run(run, tmp_dir))
+    runs = [_iter_spilled_run(spill) for spill in spills]
+    return heapq.merge(*runs, key=lambda x: x[0]), spills
+
+class WrittenKeys:
+    """
+    已寫出各行的 (timestamp, 輸入編號)，分段寫入暫存檔，記憶體固定
+    亂序輸入的剩餘行要插回已寫出的結果時，以此決定順序 (含相同timestamp)
+    """
+
+    def __init__(self, tmp_dir=None):
+        self._file = tempfile.TemporaryFile(mode='w+b', dir=tmp_dir)
+        self._ts = array('d')
+        self._idx = array('H')
+        self._flushed = 0
+
+    def append(self, ts, idx):
+        self._ts.append(ts)
+        self._idx.append(idx)
+        if len(self._ts) >= WRITTEN_KEYS_BLOCK:
+            self._flush()
+
+    def _flush(self):
+        self._ts.tofile(self._file)
+        self._idx.tofile(self._file)
+        self._flushed += len(self._ts)
+        self._ts = array('d')
+        self._idx = array('H')
+
+    def __iter__(self):
+        """依寫出順序產生 (timestamp, 輸入編號)"""
+        self._flush()
+        self._file.seek(0)
+        for start in range(0, self._flushed, WRITTEN_KEYS_BLOCK):
+            n = min(WRITTEN_KEYS_BLOCK, self._flushed - start)
+            ts = array('d')
+            idx = array('H')
+            ts.fromfile(self._file, n)
+            idx.fromfile(self._file, n)
+            yield from zip(ts, idx)
+
+    def close(self):
+        self._file.close()
+
+def merge_sorted_streams(input_files, output_file, chunk_lines=1_000_000, tmp_dir=None, fits=None,
+                         window=DEFAULT_REORDER_WINDOW):
+    """
+    串流 k-way merge，記憶體用量與輸入大小無關，每個輸入只讀一次
+    - 每個輸入經過 window 行的重排 heap 後直接 lazy merge
+    - 亂序超出視窗的輸入: 尚未輸出的行 (heap 中的行與其餘輸入) 改為外部排序，
+      其他輸入繼續合併；最後將這些行與已寫出的結果再合併一次 (只重讀輸出檔)
+    相同timestamp的行維持輸入檔案順序, 結果與 merge_and_sort_files 相同
+    fits: {檔名: ClockFit}，該檔案的 timestamp 先換算到參考時間軸
+    """
+    fits = fits or {}
+    streams = [ReorderedStream(iter_timestamped_lines(filename, fits.get(filename)), window, filename)
+               for filename in input_files]
+    late = []
+    spills = []
+    written = WrittenKeys(tmp_dir)
+    try:
+        heap = []
+
+        def pull(idx):
+            try:
+                ts, line = next(streams[idx])
+            except StopIteration:
+                return
+            except OutOfOrder as e:
+                print(f"亂序超出重排視窗 ({window} 行), 其餘部分改用外部排序: {e.filename}")
+                run, run_spills = external_sort(streams[idx].remainder(), chunk_lines, tmp_dir)
+                spills.extend(run_spills)
+                late.append((idx, run))
+                return
+            heapq.heappush(heap, (ts, idx, line))
+
+        with open(output_file, 'wb') as f:
+            for idx in range(len(streams)):
+                pull(idx)
+            while heap:
+                ts, idx, line = heapq.heappop(heap)
+                f.write(line + b'\n')
+                written.append(ts, idx)
+                pull(idx)
+
+        if late:
+            _merge_late_lines(output_file, written, late, tmp_dir)
+    finally:
+        written.close()
+        for spill in spills:
+            spill.close()
+
+    print(f"已合併並排序到: {output_file}")
+
+def _tag_run(run, idx):
+    for ts, line in run:
+        yield ts, idx, line
+
+def _merge_late_lines(output_file, written, late, tmp_dir):
+    """
+    將亂序輸入外部排序後的剩餘行插回已寫出的結果
+    依 (timestamp, 輸入編號) 合併；完全相同時已寫出的行在前 (同一輸入中較早的行)
+    """
+    output = Path(output_file)
+    with open(output, 'rb') as f, \
+            tempfile.NamedTemporaryFile(mode='wb', dir=output.parent, prefix=output.name, delete=False) as out:
+        done = ((ts, idx, line[:-1]) for (ts, idx), line in zip(written, f))
+        runs = [_tag_run(run, idx) for idx, run in late]
+        for _, _, line in heapq.merge(done, *runs, key=lambda x: x[:2]):
+            out.write(line + b'\n')
+    Path(out.name).replace(output)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='依 timestamp 合併多個日誌檔案',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+使用範例:
+  python merge.py ./measure.txt ./measure-VNF.txt ./measure-nfapi.txt
+  python merge.py a.txt b.txt c.txt merged.txt --stream
+  python merge.py a.txt b.txt merged.txt --stream --chunk-lines 500000
+  python merge.py measure-VNF.txt measure-nfapi.txt merged.txt --align-clocks
+  python merge.py measure-VNF.txt.gz measure-nfapi.txt.xz merged.txt --stream
+        '''
+    )
+    parser.add_argument('inputs', nargs='+', help='輸入日誌檔案 (至少兩個)')
+    parser.add_argument('output', help='輸出檔案')
+    parser.add_argument('--stream', action='store_true',
+                        help='串流 k-way merge (常數記憶體, 支援 N 個輸入)')
+    parser.add_argument('--chunk-lines', type=int, default=1_000_000,
+                        help='外部排序每段的行數 (預設: 1000000)')
+    parser.add_argument('--reorder-window', type=int, default=DEFAULT_REORDER_WINDOW,
+                        help=f'--stream 時每個輸入的重排視窗行數，亂序超出視窗才使用外部排序 (預設: {DEFAULT_REORDER_WINDOW})')
+    parser.add_argument('--tmp-dir', default=None,
+                        help='外部排序暫存檔目錄 (預設: 系統暫存目錄)')
+    parser.add_argument('--align-clocks', action='store_true',
+                        help='以共同 frame/slot 估計各檔案的時鐘偏移/漂移，換算到第一個輸入的時間軸後再合併')
+    parser.add_argument('--mu', type=int, default=DEFAULT_MU,
+                        help=f'numerology，用於展開 SFN 迴繞 (預設: {DEFAULT_MU})')
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+
+    if len(args.inputs) < 2:
+        parser.error('至少需要兩個輸入檔案')
+
+    fits = None
+    if args.align_clocks:
+        fits = estimate_clock_fits(args.inputs, args.mu, cache_from_args(args))
+
+    if args.stream:
+        merge_sorted_streams(args.inputs, args.output, args.chunk_lines, args.tmp_dir, fits,
+                             max(1, args.reorder_window))
+    elif len(args.inputs) == 2:
+        merge_and_sort_files(args.inputs[0], args.inputs[1], args.output, fits)
+    else:
+        print("超過兩個輸入檔案時請使用 --stream")
         sys.exit(1)
-    file1 = sys.argv[1]
-    file2 = sys.argv[2]
-    output_file = sys.argv[3]
-    merge_and_sort_files(file1, file2, output_file)
+
+if __name__ == '__main__':
+    main()
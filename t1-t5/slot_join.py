@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+VNF↔PNF 以 slot 對齊的 join engine
+- 兩側的 frame.slot 先正規化為整數，再依 SFN 迴繞展開為遞增的絕對 slot (int64)
+- PNF: 有時間戳的記錄以時間展開；PHY [PNF-DELAY] 行沒有時間戳，另外依日誌順序展開
+- VNF: Jitter/Delays 行本身沒有 slot，以 merge_asof 找時間最近的 vnf-sync
+  記錄 (from F.S) 當錨點，再以經過的時間推算 slot
+- 各組各自從第一筆記錄的 SFN 週期開始編號，以鍵的重疊數決定與 VNF 相差幾個週期
+- 最後以 merge_asof (direction='nearest') 在排序後的 int64 鍵上對齊，
+  全程為欄式運算，不建立 Python dict；pandas 在函式內才載入，
+  vnf_pnf_log_parser 的 --summary-only/--follow 路徑不需要它
+- 兩台主機的時鐘: PNF 記錄若帶時間戳，以同一 slot 的 PNF 記錄與 vnf-sync 錨點
+  做穩健直線擬合 (Theil-Sen)，估計偏移與漂移後把 PNF 時間戳換算到 VNF 時間軸
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from nfapi_common.clock_align import MIN_PAIRS, fit_slot_clock
+from nfapi_common.slot_index import (DEFAULT_MU, SFN_PERIOD, best_period_offset, slot_duration,
+                                     slots_per_frame, unwrap_slots)
+
+# PNF 訊息 type -> 對應的 VNF 延遲欄位
+JOIN_FIELDS = {
+    'pnf-dltti': 'dl_delay',
+    'pnf-txdata': 'txdata_delay',
+    'pnf-ultti': 'ul_delay',
+}
+VNF_DELAY_TYPES = ('vnf-jitterdelay', 'vnf-dltti', 'vnf-txdata')
+
+# 對齊容許的 slot 差 (VNF slot 由時間推算，允許少許誤差)
+DEFAULT_TOLERANCE = 2
+
+JOIN_COLUMNS = ['abs_slot', 'frame', 'slot', 'type', 'timing_status', 'pnf_delta_us',
+                'vnf_field', 'vnf_delay_us', 'diff_us', 'slot_gap',
+                'pnf_timestamp', 'vnf_timestamp']
+
+def split_slotnum(text):
+    """'392.10' -> (392, 10)；以字串切分，避免 float 把 392.10 與 392.1 視為相同"""
+    frame, _, slot = text.partition('.')
+    return int(frame), int(slot or 0)
+
+def pnf_slot_keys(pnf_df, mu=DEFAULT_MU):
+    """
+    PNF 時序記錄 (JOIN_FIELDS 中的 type) 加上絕對 slot 欄位 abs_slot
+    有時間戳的記錄以時間展開；缺時間戳的記錄另外依日誌順序展開，兩組各自編號
+    """
+    import pandas as pd
+    rows = pnf_df[pnf_df['type'].isin(list(JOIN_FIELDS))] if 'frame' in pnf_df else pnf_df.iloc[:0]
+    if rows.empty:
+        return pd.DataFrame(columns=['abs_slot', 'frame', 'slot', 'type', 'timing_status',
+                                     'delta_us', 'timestamp'])
+    timestamps = rows['timestamp'].to_numpy(dtype=np.float64)
+    frames = rows['frame'].to_numpy(dtype=np.int64)
+    slots = rows['slot'].to_numpy(dtype=np.int64)
+    untimed = np.isnan(timestamps)
+    abs_slot = np.empty(len(rows), dtype=np.int64)
+    for part, times in ((~untimed, timestamps), (untimed, np.zeros(len(rows)))):
+        if part.any():
+            abs_slot[part] = unwrap_slots(times[part], frames[part], slots[part], mu)
+    return pd.DataFrame({
+        'abs_slot': abs_slot,
+        'frame': rows['frame'].to_numpy(dtype=np.int64),
+        'slot': rows['slot'].to_numpy(dtype=np.int64),
+        'type': rows['type'].to_numpy(),
+        'timing_status': rows['timing_status'].to_numpy(),
+        'delta_us': rows['delta_us'].to_numpy(dtype=np.float64),
+        'timestamp': rows['timestamp'].to_numpy(dtype=np.float64),
+    })
+
+def vnf_sync_anchors(vnf_df, mu=DEFAULT_MU):
+    """
+    vnf-sync 記錄的 (timestamp, 絕對 slot)，依時間排序
+
+    Returns:
+        tuple: (timestamps, abs_slots)；沒有 sync 記錄時為空陣列
+    """
+    if 'frame' not in vnf_df:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    sync = vnf_df[(vnf_df['type'] == 'vnf-sync') & vnf_df['frame'].notna()]
+    timestamps = sync['timestamp'].to_numpy(dtype=np.float64)
+    abs_slot = unwrap_slots(timestamps, sync['frame'].to_numpy(dtype=np.int64),
+                            sync['slot'].to_numpy(dtype=np.int64), mu)
+    order = np.argsort(timestamps, kind='stable')
+    return timestamps[order], abs_slot[order]
+
+def vnf_slot_keys(vnf_df, mu=DEFAULT_MU, anchors=None):
+    """
+    VNF 延遲記錄加上推算的絕對 slot 欄位 abs_slot
+
+    Args:
+        anchors: (timestamps, abs_slots) 錨點；預設為 vnf_sync_anchors
+    """
+    import pandas as pd
+    anchor_time, anchor_slot = anchors if anchors is not None else vnf_sync_anchors(vnf_df, mu)
+    rows = vnf_df[vnf_df['type'].isin(VNF_DELAY_TYPES)]
+    if rows.empty or not len(anchor_time):
+        return rows.iloc[:0].assign(abs_slot=np.empty(0, dtype=np.int64))
+
+    rows = rows.sort_values('timestamp', kind='stable')
+    matched = pd.merge_asof(rows, pd.DataFrame({'timestamp': anchor_time,
+                                                '_anchor_time': anchor_time,
+                                                '_anchor_slot': anchor_slot}),
+                            on='timestamp', direction='nearest')
+    elapsed = matched['timestamp'].to_numpy() - matched['_anchor_time'].to_numpy()
+    matched['abs_slot'] = (matched['_anchor_slot'].to_numpy()
+                           + np.rint(elapsed / slot_duration(mu)).astype(np.int64))
+    return matched.drop(columns=['_anchor_time', '_anchor_slot'])
+
+def join_vnf_pnf(vnf_df, pnf_df, mu=DEFAULT_MU, tolerance=DEFAULT_TOLERANCE, anchors=None,
+                 pnf_untimed=None):
+    """
+    每筆 PNF 時序記錄對上同一 slot 的 VNF 延遲
+
+    Args:
+        tolerance: 允許的 slot 差，超過則 VNF 欄位為 NaN
+        anchors: VNF slot 錨點 (見 vnf_slot_keys)
+        pnf_untimed: 沒有時間戳的 PNF 記錄 (split_untimed)，一併對齊
+
+    Returns:
+        DataFrame: JOIN_COLUMNS，依 abs_slot (VNF 編號) 排序；
+        diff_us = PNF delta - VNF delay
+    """
+    import pandas as pd
+    if pnf_untimed is not None and len(pnf_untimed):
+        pnf_df = pd.concat([pnf_df, pnf_untimed], ignore_index=True)
+    pnf = pnf_slot_keys(pnf_df, mu)
+    vnf = vnf_slot_keys(vnf_df, mu, anchors)
+    if pnf.empty:
+        return pd.DataFrame(columns=JOIN_COLUMNS)
+
+    # 有/沒有時間戳的兩組各自展開，分別決定與 VNF 相差的 SFN 週期
+    vnf_keys = vnf['abs_slot'].to_numpy()
+    abs_slot = pnf['abs_slot'].to_numpy().copy()
+    untimed = pnf['timestamp'].isna().to_numpy()
+    for part in (~untimed, untimed):
+        if part.any():
+            k = best_period_offset(vnf_keys, abs_slot[part], mu, tolerance)
+            abs_slot[part] += k * SFN_PERIOD * slots_per_frame(mu)
+    pnf['abs_slot'] = abs_slot
+    pnf = pnf.sort_values('abs_slot', kind='stable')
+    vnf = vnf.sort_values('abs_slot', kind='stable')
+
+    parts = []
+    for kind, field in JOIN_FIELDS.items():
+        side = pnf[pnf['type'] == kind]
+        if side.empty:
+            continue
+        other = pd.DataFrame({
+            'vnf_abs_slot': vnf['abs_slot'].to_numpy(),
+            'vnf_delay_us': vnf[field].to_numpy(dtype=np.float64) if field in vnf else np.nan,
+            'vnf_timestamp': vnf['timestamp'].to_numpy(dtype=np.float64),
+        })
+        other = other[other['vnf_delay_us'].notna()]
+        joined = pd.merge_asof(side, other, left_on='abs_slot', right_on='vnf_abs_slot',
+                               direction='nearest', tolerance=tolerance)
+        joined['vnf_field'] = field
+        parts.append(joined)
+
+    joined = pd.concat(parts, ignore_index=True).sort_values('abs_slot', kind='stable')
+    joined = joined.rename(columns={'delta_us': 'pnf_delta_us', 'timestamp': 'pnf_timestamp'})
+    joined['diff_us'] = joined['pnf_delta_us'] - joined['vnf_delay_us']
+    joined['slot_gap'] = joined['abs_slot'] - joined['vnf_abs_slot']
+    return joined[JOIN_COLUMNS].reset_index(drop=True)
+
+def print_join_summary(joined):
+    """每種訊息的配對數與 PNF delta / VNF delay / 差值的中位數"""
+    print('\n' + '=' * 60)
+    print('VNF↔PNF slot 對齊')
+    print('=' * 60)
+    if joined.empty:
+        print('  沒有可對齊的 PNF 時序記錄 (或 VNF 沒有 vnf-sync 錨點)')
+        return
+    for kind, group in joined.groupby('type', sort=True):
+        matched = group[group['vnf_delay_us'].notna()]
+        print(f'  {kind}: {len(matched)}/{len(group)} 筆配對成功')
+        if len(matched):
+            print(f'    PNF delta 中位數: {matched["pnf_delta_us"].median():.1f} µs, '
+                  f'VNF delay 中位數: {matched["vnf_delay_us"].median():.1f} µs, '
+                  f'差值中位數: {matched["diff_us"].median():.1f} µs')
+
+def fit_pnf_clock(vnf_df, pnf_df, mu=DEFAULT_MU, tolerance=DEFAULT_TOLERANCE):
+    """
+    PNF 時鐘 -> VNF 時鐘的偏移與漂移 (ClockFit)
+    以帶時間戳的 PNF 時序記錄與 vnf-sync 錨點中相同 slot 者配對；
+    PNF 記錄沒有時間戳 (PHY [PNF-DELAY]) 而配對不足時 fit.ok 為 False
+    結果會被快取：改變配對或擬合方式時須遞增 clock_align.CLOCK_FIT_VERSION
+    """
+    pnf = pnf_slot_keys(pnf_df, mu)
+    anchor_time, anchor_slot = vnf_sync_anchors(vnf_df, mu)
+    return fit_slot_clock(pnf['timestamp'].to_numpy(dtype=np.float64),
+                          pnf['abs_slot'].to_numpy(dtype=np.int64),
+                          anchor_time, anchor_slot, mu, tolerance)
+
+def apply_pnf_clock(pnf_df, fit):
+    """PNF 時間戳換算到 VNF 時間軸；原始值保留在 host_timestamp 欄位"""
+    if not fit.ok:
+        return pnf_df
+    pnf_df = pnf_df.copy()
+    pnf_df['host_timestamp'] = pnf_df['timestamp']
+    pnf_df['timestamp'] = fit.apply(pnf_df['timestamp'].to_numpy(dtype=np.float64))
+    return pnf_df
+
+def print_clock_fit(fit):
+    """時鐘偏移擬合結果"""
+    print('\n' + '=' * 60)
+    print('PNF ↔ VNF 時鐘對齊')
+    print('=' * 60)
+    if not fit.ok:
+        print(f'  同時帶時間戳與 slot 的 PNF/VNF 配對只有 {fit.n_pairs} 筆 (至少需 {MIN_PAIRS})，維持原始時間戳')
+        return
+    print(f'  配對數: {fit.n_pairs}')
+    print(f'  偏移 (VNF - PNF): {fit.offset:.6f} s (於 PNF 時間 {fit.ref:.6f})')
+    print(f'  漂移: {fit.drift * 1e6:.3f} ppm')
+    print(f'  殘差中位數: {fit.residual_mad * 1e6:.1f} µs')
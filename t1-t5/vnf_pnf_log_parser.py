@@ -5,161 +5,504 @@ VNF+PNF Log Comparative Analyzer v2
 - 支援 VNF Delays 的正負值
 - 支援 PNF 的 TOO EARLY/TOO LATE 格式
 - 自動過濾 ANSI 色碼
+- 支援多進程分段解析大型日誌 (--jobs)
+- 即時追蹤模式，滾動統計最近 1s/10s/60s (--follow)
+- 常數記憶體的串流統計摘要 (--summary-only)
+- 對數分桶延遲直方圖: 百分位數表與 CDF 圖，可跨檔案/執行合併 (--histograms-in)
+- 以共同 slot 估計 PNF/VNF 時鐘偏移與漂移，PNF 時間戳換算到 VNF 時間軸 (--no-clock-align)
+- pandas/matplotlib 只在需要時才載入: --summary-only、--follow 不載入兩者，--no-plot 不載入 matplotlib
+- 直接讀取 .gz/.xz/.zst 壓縮日誌 (串流解壓，--jobs 時以換行對齊的區塊平行解析)
 """
+import io
+import os
 import re
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import numpy as np
 import sys
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from nfapi_common.cache import add_cache_arguments, cache_from_args
+from nfapi_common.clock_align import CLOCK_FIT_VERSION, ClockFit
+from nfapi_common.compressed import is_compressed, iter_blocks, open_log
+from nfapi_common.downsample import DEFAULT_MAX_POINTS, downsample_indices, spike_mask
+from nfapi_common.histogram import (PERCENTILES, LatencyHistogram, load_histograms,
+                                    merge_histograms, save_histograms)
+from nfapi_common.profiling import add_profile_arguments, profiler_from_args
+from nfapi_common.rolling import Window
+from nfapi_common.slot_index import DEFAULT_MU, slot_duration
+from nfapi_common.stats import StreamingStats
+from slot_join import (DEFAULT_TOLERANCE, apply_pnf_clock, fit_pnf_clock, join_vnf_pnf,
+                       print_clock_fit, print_join_summary, split_slotnum)
+
+# 解析結果格式改變時遞增，避免讀到舊的快取
+PARSER_VERSION = 2
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+TIMESTAMP_PATTERN = re.compile(r'^([\d.]+)')
+
+# VNF Jitter/Delay (支援正負值)
+JITTER_DELAY_PATTERN = re.compile(
+    r'Jitter\(DL=(-?\d+)\s+UL=(-?\d+)\s+ULDCI=(-?\d+)\s+TxData=(-?\d+)\s*µ?s?\)'
+    r'.*?Delays\(DL=(-?\d+)\s+UL=(-?\d+)\s+ULDCI=(-?\d+)\s+TxData=(-?\d+)\s*µ?s?\)')
+# VNF 高延遲警告 (舊格式保留)
+DLTTI_WARN_PATTERN = re.compile(r'High DL_TTI delay=(\d+)µs')
+TXDATA_WARN_PATTERN = re.compile(r'High TxData delay=(\d+)µs')
+# VNF 時槽同步調整
+SYNC_PATTERN = re.compile(r'adjustment: (-?\d+) \(from ([\d.]+)\)')
+# PNF 時序: [PNF-TIMING] (MAC, "Message X ... delta: N") 與 [PNF-DELAY] (PHY, "X ... delta=N") 兩種格式
+PNF_TIMING_PATTERN = re.compile(
+    r'(DL_TTI|TX_DATA|TX_Data|UL_TTI) for ([\d.]+) arrived (TOO LATE|TOO EARLY) \(delta(?:: |=)(-?\d+) µs\)')
+
+PNF_MESSAGE_TYPES = {
+    'DL_TTI': 'pnf-dltti',
+    'TX_DATA': 'pnf-txdata',
+    'TX_Data': 'pnf-txdata',
+    'UL_TTI': 'pnf-ultti',
+}
+
+ABNORMAL_DELAY = 2147483647
+
+# 延遲直方圖的欄位 (type -> 欄位)；PNF 另依 timing_status 分開統計 delta_us
+LATENCY_FIELDS = {
+    'vnf-jitterdelay': ('dl_delay', 'ul_delay', 'uldci_delay', 'txdata_delay',
+                        'dl_jitter', 'ul_jitter', 'uldci_jitter', 'txdata_jitter'),
+    'vnf-dltti': ('dl_delay',),
+    'vnf-txdata': ('txdata_delay',),
+}
+
+# print_summary 統計的欄位 (type -> 欄位)
+SUMMARY_FIELDS = {
+    'vnf-jitterdelay': ('txdata_delay', 'dl_delay', 'ul_delay'),
+    'vnf-sync': ('sync_adjustment',),
+}
+
 def strip_ansi(line):
     """去除 ANSI 色碼控制字元"""
-    ansi_escape = re.compile(r'\x1b\[[0-9;]*m')
-    return ansi_escape.sub('', line)
+    return ANSI_ESCAPE.sub('', line)
+
+def _parse_jitter_delay(line, result):
+    match = JITTER_DELAY_PATTERN.search(line)
+    if not match:
+        return None
+    vals = [int(v) for v in match.groups()]
+    result.update({
+        'type': 'vnf-jitterdelay',
+        'dl_jitter': vals[0],
+        'ul_jitter': vals[1],
+        'uldci_jitter': vals[2],
+        'txdata_jitter': vals[3],
+        'dl_delay': vals[4],
+        'ul_delay': vals[5],
+        'uldci_delay': vals[6],
+        'txdata_delay': vals[7],
+        'abnormal': max(abs(v) for v in vals) >= ABNORMAL_DELAY
+    })
+    return result
+
+def _parse_dltti_warning(line, result):
+    match = DLTTI_WARN_PATTERN.search(line)
+    if not match:
+        return None
+    delay = int(match.group(1))
+    result.update({
+        'type': 'vnf-dltti',
+        'dl_delay': delay,
+        'abnormal': delay >= ABNORMAL_DELAY
+    })
+    return result
+
+def _parse_txdata_warning(line, result):
+    match = TXDATA_WARN_PATTERN.search(line)
+    if not match:
+        return None
+    delay = int(match.group(1))
+    result.update({
+        'type': 'vnf-txdata',
+        'txdata_delay': delay,
+        'abnormal': delay >= ABNORMAL_DELAY
+    })
+    return result
+
+def _parse_sync(line, result):
+    match = SYNC_PATTERN.search(line)
+    if not match:
+        return None
+    frame, slot = split_slotnum(match.group(2))
+    result.update({
+        'type': 'vnf-sync',
+        'sync_adjustment': int(match.group(1)),
+        'vnf_slotnum': float(match.group(2)),
+        'frame': frame,
+        'slot': slot,
+    })
+    return result
+
+def _parse_pnf_timing(line, result):
+    match = PNF_TIMING_PATTERN.search(line)
+    if not match:
+        return None
+    frame, slot = split_slotnum(match.group(2))
+    result.update({
+        'type': PNF_MESSAGE_TYPES[match.group(1)],
+        'slotnum': float(match.group(2)),
+        'frame': frame,
+        'slot': slot,
+        'timing_status': match.group(3),
+        'delta_us': int(match.group(4))
+    })
+    return result
+
+# 關鍵字 -> (解析函式, 是否需要時間戳)；依序檢查，只有含關鍵字的行才會執行對應的 regex
+# PHY 的 [PNF-DELAY] 行沒有時間戳，但帶有 frame.slot；keep_untimed 時保留下來 (timestamp 為 NaN)，
+# 只用於 slot 對齊，見 split_untimed
+LINE_DISPATCH = (
+    ('Jitter(', _parse_jitter_delay, True),
+    ('High DL_TTI', _parse_dltti_warning, True),
+    ('High TxData', _parse_txdata_warning, True),
+    ('adjustment:', _parse_sync, True),
+    ('arrived TOO', _parse_pnf_timing, False),
+)
 
 class VNFPNFLogParser:
-    def __init__(self, log_file):
+    def __init__(self, log_file, keep_untimed=False):
         self.log_file = log_file
+        self.keep_untimed = keep_untimed
         self.data = []
 
-    def parse(self):
-        """解析整個日誌檔案"""
-        with open(self.log_file, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
+    def parse(self, jobs=1):
+        """解析整個日誌檔案；jobs > 1 時以多進程分段解析"""
+        if jobs > 1:
+            return self.parse_parallel(jobs)
+        with open_log(self.log_file) as f:
+            for line in io.TextIOWrapper(f, encoding='utf-8', errors='ignore'):
                 d = self.parse_line(line)
                 if d:
                     self.data.append(d)
+        import pandas as pd
         df = pd.DataFrame(self.data)
         return df
 
+    def parse_parallel(self, jobs):
+        """
+        將檔案切成以換行對齊的位元組區段，於 process pool 中平行解析
+        各區段回傳欄式批次，依檔案順序合併為與 parse() 相同格式的 DataFrame
+        壓縮檔無法 seek: 改為串流解壓，將換行對齊的區塊依序送往 worker
+        """
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            if is_compressed(self.log_file):
+                batches = list(map_blocks(pool, partial(_parse_chunk, keep_untimed=self.keep_untimed),
+                                          iter_blocks(self.log_file), jobs))
+            else:
+                ranges = split_byte_ranges(self.log_file, jobs * CHUNKS_PER_JOB)
+                batches = list(pool.map(_parse_byte_range,
+                                        [self.log_file] * len(ranges),
+                                        [start for start, _ in ranges],
+                                        [end for _, end in ranges],
+                                        [self.keep_untimed] * len(ranges)))
+        return concat_batches(batches)
+
     def parse_line(self, line):
-        """解析單行日誌"""
-        line = strip_ansi(line)
-        
-        # 提取時間戳
-        timestamp_match = re.match(r'^([\d.]+)', line)
-        timestamp = float(timestamp_match.group(1)) if timestamp_match else None
-        if not timestamp:
-            return None
-
-        result = {'timestamp': timestamp}
-
-        # ========== VNF Jitter/Delay (支援正負值) ==========
-        jitter_pattern = r'Jitter\(DL=(-?\d+)\s+UL=(-?\d+)\s+ULDCI=(-?\d+)\s+TxData=(-?\d+)\s*µ?s?\)'
-        delay_pattern  = r'Delays\(DL=(-?\d+)\s+UL=(-?\d+)\s+ULDCI=(-?\d+)\s+TxData=(-?\d+)\s*µ?s?\)'
-        jitter_match = re.search(jitter_pattern, line)
-        delay_match  = re.search(delay_pattern, line)
-        
-        if jitter_match and delay_match:
-            vals = [int(jitter_match.group(i)) for i in range(1,5)] \
-                + [int(delay_match.group(i)) for i in range(1,5)]
-            result.update({
-                'type': 'vnf-jitterdelay',
-                'dl_jitter': int(jitter_match.group(1)),
-                'ul_jitter': int(jitter_match.group(2)),
-                'uldci_jitter': int(jitter_match.group(3)),
-                'txdata_jitter': int(jitter_match.group(4)),
-                'dl_delay': int(delay_match.group(1)),
-                'ul_delay': int(delay_match.group(2)),
-                'uldci_delay': int(delay_match.group(3)),
-                'txdata_delay': int(delay_match.group(4)),
-                'abnormal': max([abs(v) for v in vals]) >= 2147483647
-            })
-            return result
-
-        # ========== VNF 高延遲警告 (舊格式保留) ==========
-        tti_warn = re.search(r'High DL_TTI delay=(\d+)µs', line)
-        if tti_warn:
-            result.update({
-                'type': 'vnf-dltti',
-                'dl_delay': int(tti_warn.group(1)),
-                'abnormal': int(tti_warn.group(1)) >= 2147483647
-            })
-            return result
-        
-        txdata_warn = re.search(r'High TxData delay=(\d+)µs', line)
-        if txdata_warn:
-            result.update({
-                'type': 'vnf-txdata',
-                'txdata_delay': int(txdata_warn.group(1)),
-                'abnormal': int(txdata_warn.group(1)) >= 2147483647
-            })
-            return result
-
-        # ========== VNF 時槽同步調整 ==========
-        sync = re.search(r'adjustment: (-?\d+) \(from ([\d.]+)\)', line)
-        if sync:
-            result.update({
-                'type': 'vnf-sync',
-                'sync_adjustment': int(sync.group(1)),
-                'vnf_slotnum': float(sync.group(2)),
-            })
-            return result
-
-        # ========== PNF DL_TTI (支援 TOO LATE 和 TOO EARLY) ==========
-        # [PNF-TIMING] 格式
-        pnf_dltti_timing = re.search(
-            r'Message DL_TTI for ([\d.]+) arrived (TOO LATE|TOO EARLY) \(delta: (-?\d+) µs\)', line)
-        if pnf_dltti_timing:
-            result.update({
-                'type': 'pnf-dltti',
-                'slotnum': float(pnf_dltti_timing.group(1)),
-                'timing_status': pnf_dltti_timing.group(2),
-                'delta_us': int(pnf_dltti_timing.group(3))
-            })
-            return result
-        
-        # [PNF-DELAY] 格式（PHY 層）
-        pnf_dltti_phy = re.search(
-            r'DL_TTI for ([\d.]+) arrived (TOO LATE|TOO EARLY) \(delta=(-?\d+) µs\)', line)
-        if pnf_dltti_phy:
-            result.update({
-                'type': 'pnf-dltti',
-                'slotnum': float(pnf_dltti_phy.group(1)),
-                'timing_status': pnf_dltti_phy.group(2),
-                'delta_us': int(pnf_dltti_phy.group(3))
-            })
-            return result
-
-        # ========== PNF TX_DATA (支援 TOO LATE 和 TOO EARLY) ==========
-        pnf_txdata_timing = re.search(
-            r'Message TX_DATA for ([\d.]+) arrived (TOO LATE|TOO EARLY) \(delta: (-?\d+) µs\)', line)
-        if pnf_txdata_timing:
-            result.update({
-                'type': 'pnf-txdata',
-                'slotnum': float(pnf_txdata_timing.group(1)),
-                'timing_status': pnf_txdata_timing.group(2),
-                'delta_us': int(pnf_txdata_timing.group(3))
-            })
-            return result
-        
-        pnf_txdata_phy = re.search(
-            r'TX_Data for ([\d.]+) arrived (TOO LATE|TOO EARLY) \(delta=(-?\d+) µs\)', line)
-        if pnf_txdata_phy:
-            result.update({
-                'type': 'pnf-txdata',
-                'slotnum': float(pnf_txdata_phy.group(1)),
-                'timing_status': pnf_txdata_phy.group(2),
-                'delta_us': int(pnf_txdata_phy.group(3))
-            })
-            return result
-
-        # ========== PNF UL_TTI ==========
-        pnf_ultti = re.search(
-            r'Message UL_TTI for ([\d.]+) arrived (TOO LATE|TOO EARLY) \(delta: (-?\d+) µs\)', line)
-        if pnf_ultti:
-            result.update({
-                'type': 'pnf-ultti',
-                'slotnum': float(pnf_ultti.group(1)),
-                'timing_status': pnf_ultti.group(2),
-                'delta_us': int(pnf_ultti.group(3))
-            })
-            return result
+        """
+        解析單行日誌
+        先以關鍵字快速篩選，大部分雜訊行不會執行任何 regex
+        """
+        timestamp = None
+        for marker, handler, needs_timestamp in LINE_DISPATCH:
+            if marker not in line:
+                continue
+
+            if timestamp is None:
+                line = strip_ansi(line)
 
+                # 提取時間戳 (沒有時為 NaN)
+                timestamp_match = TIMESTAMP_PATTERN.match(line)
+                timestamp = float(timestamp_match.group(1)) if timestamp_match else np.nan
+            if (needs_timestamp or not self.keep_untimed) and not timestamp > 0:
+                return None
+
+            result = handler(line, {'timestamp': timestamp})
+            if result:
+                return result
         return None
 
-def plot_compare_vnf_pnf(vnf_df, pnf_df, prefix='vnf_pnf'):
-    """比較 VNF 和 PNF 延遲"""
+CHUNKS_PER_JOB = 4
+MIN_CHUNK_BYTES = 1 << 20
+
+def split_byte_ranges(log_file, n_chunks):
+    """將檔案切成最多 n_chunks 個 [start, end) 區段，每段都從行首開始"""
+    size = os.path.getsize(log_file)
+    n_chunks = max(1, min(n_chunks, size // MIN_CHUNK_BYTES))
+    boundaries = [0]
+    with open(log_file, 'rb') as f:
+        for i in range(1, n_chunks):
+            f.seek(size * i // n_chunks)
+            f.readline()
+            pos = f.tell()
+            if boundaries[-1] < pos < size:
+                boundaries.append(pos)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def _to_column_array(values):
+    """數值欄位轉為 NumPy 陣列，其餘 (字串/布林/混合缺值) 保留為 object 陣列"""
+    if all(type(v) is int for v in values):
+        return np.array(values, dtype=np.int64)
+    if all(type(v) in (int, float) for v in values):
+        return np.array(values, dtype=np.float64)
+    return np.array(values, dtype=object)
+
+def map_blocks(pool, worker, blocks, jobs):
+    """
+    依序回傳 worker(block) 的結果；同時在途的區塊最多 2 * jobs 個，
+    解壓後的資料不會整份堆在記憶體中
+    """
+    pending = deque()
+    for block in blocks:
+        pending.append(pool.submit(worker, block))
+        if len(pending) >= 2 * jobs:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _parse_byte_range(log_file, start, end, keep_untimed=False):
+    """Worker: 解析 [start, end) 區段 (見 _parse_chunk)"""
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        return _parse_chunk(f.read(end - start), keep_untimed)
+
+def _parse_chunk(chunk, keep_untimed=False):
+    """
+    Worker: 解析一段以行首開始的 bytes，回傳欄式批次 (欄位順序, {欄位: 陣列}, 列數)
+    缺少的欄位以 NaN 補齊，與 pd.DataFrame(list_of_dicts) 的行為一致
+    """
+    parser = VNFPNFLogParser(None, keep_untimed)
+    columns = {}
+    n_rows = 0
+    for line in io.TextIOWrapper(io.BytesIO(chunk), encoding='utf-8', errors='ignore'):
+        d = parser.parse_line(line)
+        if not d:
+            continue
+        for key, value in d.items():
+            if key not in columns:
+                columns[key] = [np.nan] * n_rows
+            columns[key].append(value)
+        n_rows += 1
+        for values in columns.values():
+            if len(values) < n_rows:
+                values.append(np.nan)
+
+    return list(columns), {k: _to_column_array(v) for k, v in columns.items()}, n_rows
+
+def split_untimed(df):
+    """
+    拆出沒有時間戳的記錄 (keep_untimed 解析的 PHY [PNF-DELAY] 行)
+
+    Returns:
+        tuple: (有時間戳的記錄, 沒有時間戳的記錄)；後者只供 slot 對齊使用，
+        不進入摘要、CSV 與時間序列圖
+    """
+    if 'timestamp' not in df:
+        return df, df.iloc[:0]
+    untimed = df['timestamp'].isna()
+    if not untimed.any():
+        return df, df.iloc[:0]
+    return df[~untimed].reset_index(drop=True), df[untimed].reset_index(drop=True)
+
+def concat_batches(batches):
+    """依檔案順序合併 worker 批次為單一 DataFrame"""
+    order = []
+    for names, _, _ in batches:
+        for name in names:
+            if name not in order:
+                order.append(name)
+
+    merged = {}
+    for name in order:
+        parts = []
+        for _, columns, n_rows in batches:
+            if name in columns:
+                parts.append(columns[name])
+            elif n_rows:
+                parts.append(np.full(n_rows, np.nan))
+        merged[name] = np.concatenate(parts)
+
+    import pandas as pd
+    return pd.DataFrame(merged, columns=order).infer_objects()
+
+class LogSummary:
+    """
+    print_summary 所需的統計量: 各 type 的筆數與每個欄位的 StreamingStats
+    PNF 時序另以 (type, timing_status) 統計 delta_us
+    可逐列累積、由 DataFrame 建立，或合併多個 worker 的結果
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.stats = defaultdict(StreamingStats)
+
+    def add_row(self, row):
+        kind = row['type']
+        self.counts[kind] += 1
+        for field in SUMMARY_FIELDS.get(kind, ()):
+            self.stats[(kind, field)].add(row[field])
+        status = row.get('timing_status')
+        if status is not None:
+            self.counts[(kind, status)] += 1
+            self.stats[(kind, status)].add(row['delta_us'])
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        for key, stats in other.stats.items():
+            self.stats[key].merge(stats)
+        return self
+
+    @classmethod
+    def from_frame(cls, df):
+        """由已解析的 DataFrame 建立 (向量化，中位數為精確值)"""
+        summary = cls()
+        if 'type' not in df:
+            return summary
+        for kind, group in df.groupby('type', sort=False):
+            summary.counts[kind] = len(group)
+            for field in SUMMARY_FIELDS.get(kind, ()):
+                summary.stats[(kind, field)] = StreamingStats.from_array(group[field].dropna().to_numpy())
+            if 'timing_status' in group:
+                for status, subset in group.groupby('timing_status', sort=False):
+                    summary.counts[(kind, status)] = len(subset)
+                    summary.stats[(kind, status)] = StreamingStats.from_array(subset['delta_us'].to_numpy())
+        return summary
+
+    def count(self, *key):
+        return self.counts[key if len(key) > 1 else key[0]]
+
+    def get(self, *key):
+        """沒有資料時回傳空的 StreamingStats"""
+        return self.stats.get(key, StreamingStats())
+
+def _iter_byte_range_lines(log_file, start, end):
+    """
+    逐行讀取 [start, end) 區段，不整段載入記憶體
+    單獨的 \r 也視為換行，與文字模式 (parse()) 的分行一致
+    """
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        pos = start
+        for raw in f:
+            if pos >= end:
+                break
+            pos += len(raw)
+            line = raw.decode('utf-8', errors='ignore')
+            if '\r' in line:
+                yield from line.replace('\r\n', '\n').replace('\r', '\n').splitlines(keepends=True)
+            else:
+                yield line
+
+def _summarize_lines(lines):
+    """逐行解析並累積為 LogSummary"""
+    parser = VNFPNFLogParser(None)
+    summary = LogSummary()
+    for line in lines:
+        d = parser.parse_line(line)
+        if d:
+            summary.add_row(d)
+    return summary
+
+def _summarize_byte_range(log_file, start, end):
+    """Worker: 串流解析 [start, end) 區段並回傳 LogSummary"""
+    return _summarize_lines(_iter_byte_range_lines(log_file, start, end))
+
+def _summarize_chunk(chunk):
+    """Worker: 統計一段以行首開始的 bytes (壓縮檔的解壓區塊)"""
+    return _summarize_lines(io.TextIOWrapper(io.BytesIO(chunk), encoding='utf-8', errors='ignore'))
+
+def summarize_log(log_file, jobs=1):
+    """
+    --summary-only: 不建立 DataFrame，單次掃描累積 print_summary 所需的統計量
+    記憶體用量與日誌大小無關；jobs > 1 時各區段平行統計後合併
+    壓縮檔以串流解壓，jobs > 1 時解壓區塊依序送往 worker
+    """
+    compressed = is_compressed(log_file)
+    if jobs <= 1:
+        if compressed:
+            with open_log(log_file) as f:
+                return _summarize_lines(io.TextIOWrapper(f, encoding='utf-8', errors='ignore'))
+        return _summarize_byte_range(log_file, 0, os.path.getsize(log_file))
+
+    summary = LogSummary()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        if compressed:
+            parts = map_blocks(pool, _summarize_chunk, iter_blocks(log_file), jobs)
+        else:
+            ranges = split_byte_ranges(log_file, jobs * CHUNKS_PER_JOB)
+            parts = pool.map(_summarize_byte_range,
+                             [log_file] * len(ranges),
+                             [start for start, _ in ranges],
+                             [end for _, end in ranges])
+        for part in parts:
+            summary.merge(part)
+    return summary
+
+def encode_frame(df):
+    """
+    將 DataFrame 轉為可存入 npz 的欄式陣列 (不使用 pickle)
+    數值欄位直接存放；字串與布林欄位另存缺值遮罩
+    """
+    arrays = {'__columns__': np.array(df.columns, dtype=str)}
+    kinds = []
+    for name in df.columns:
+        col = df[name]
+        if col.dtype.kind in 'iuf':
+            kinds.append('num')
+            arrays[name] = col.to_numpy()
+            continue
+        mask = col.isna().to_numpy()
+        present = col[~mask]
+        if present.map(type).eq(bool).all() and len(present):
+            kinds.append('bool')
+            arrays[name] = col.where(~mask, False).to_numpy(dtype=bool)
+        else:
+            kinds.append('str')
+            arrays[name] = col.where(~mask, '').to_numpy(dtype=str)
+        arrays[f'{name}__mask'] = mask
+    arrays['__kinds__'] = np.array(kinds, dtype=str)
+    return arrays
+
+def decode_frame(arrays):
+    """encode_frame 的反向轉換"""
+    columns = arrays['__columns__'].tolist()
+    merged = {}
+    for name, kind in zip(columns, arrays['__kinds__'].tolist()):
+        values = arrays[name]
+        if kind != 'num':
+            values = values.astype(object)
+            values[arrays[f'{name}__mask']] = np.nan
+        merged[name] = values
+    import pandas as pd
+    return pd.DataFrame(merged, columns=columns).infer_objects()
+
+def reduce_series(df, x, y, max_points=DEFAULT_MAX_POINTS):
+    """
+    繪圖前降採樣一條時間序列: 每個時間區間保留最小/最大值，
+    2147483647 哨兵值與離群值 (如 TOO LATE 尖峰) 一律保留
+    
+    Returns:
+        tuple: (x 陣列, y 陣列)，最多約 max_points 點 (max_points <= 0 不降採樣)
+    """
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    keep = None
+    if 0 < max_points < len(ys):
+        keep = (ys >= ABNORMAL_DELAY) | spike_mask(ys, limit=max_points // 4)
+    index = downsample_indices(xs, ys, max_points, keep=keep)
+    return xs[index], ys[index]
+
+def plot_compare_vnf_pnf(vnf_df, pnf_df, prefix='vnf_pnf', max_points=DEFAULT_MAX_POINTS):
+    """比較 VNF 和 PNF 延遲 (時間序列先降採樣至每條最多約 max_points 點)"""
+    import matplotlib.pyplot as plt
     
     # ========== 圖1: TxData 延遲對比 ==========
     vnf_txdata = vnf_df[vnf_df['type'] == 'vnf-jitterdelay'][['timestamp', 'txdata_delay']].copy()
@@ -167,10 +510,10 @@ def plot_compare_vnf_pnf(vnf_df, pnf_df, prefix='vnf_pnf'):
     
     plt.figure(figsize=(16, 6))
     if not vnf_txdata.empty:
-        plt.plot(vnf_txdata['timestamp'], vnf_txdata['txdata_delay'], 'b-o', 
+        plt.plot(*reduce_series(vnf_txdata, 'timestamp', 'txdata_delay', max_points), 'b-o', 
                 label='VNF TxData Delay (µs)', linewidth=2, markersize=4, alpha=0.7)
     if not pnf_txdata.empty:
-        plt.plot(pnf_txdata['timestamp'], pnf_txdata['delta_us'], 'r--s', 
+        plt.plot(*reduce_series(pnf_txdata, 'timestamp', 'delta_us', max_points), 'r--s', 
                 label='PNF TxData Delay (µs)', linewidth=2, markersize=4, alpha=0.7)
     
     plt.xlabel('Timestamp (s)', fontsize=12)
@@ -190,10 +533,10 @@ def plot_compare_vnf_pnf(vnf_df, pnf_df, prefix='vnf_pnf'):
     
     plt.figure(figsize=(16, 6))
     if not vnf_dltti.empty:
-        plt.plot(vnf_dltti['timestamp'], vnf_dltti['dl_delay'], 'g-o', 
+        plt.plot(*reduce_series(vnf_dltti, 'timestamp', 'dl_delay', max_points), 'g-o', 
                 label='VNF DL Delay (µs)', linewidth=2, markersize=4, alpha=0.7)
     if not pnf_dltti.empty:
-        plt.plot(pnf_dltti['timestamp'], pnf_dltti['delta_us'], 'orange', marker='^', 
+        plt.plot(*reduce_series(pnf_dltti, 'timestamp', 'delta_us', max_points), 'orange', marker='^', 
                 linestyle='--', label='PNF DL_TTI Delay (µs)', linewidth=2, markersize=4, alpha=0.7)
     
     plt.xlabel('Timestamp (s)', fontsize=12)
@@ -213,26 +556,26 @@ def plot_compare_vnf_pnf(vnf_df, pnf_df, prefix='vnf_pnf'):
     fig.suptitle('VNF Delay Distribution (All)', fontsize=14, fontweight='bold')
     
     if not vnf_all.empty:
-        axes[0, 0].plot(vnf_all['timestamp'], vnf_all['dl_delay'], 'b-', alpha=0.7)
+        axes[0, 0].plot(*reduce_series(vnf_all, 'timestamp', 'dl_delay', max_points), 'b-', alpha=0.7)
         axes[0, 0].set_title('DL Delay')
         axes[0, 0].set_ylabel('Delay (µs)')
         axes[0, 0].grid(True, alpha=0.3)
         axes[0, 0].axhline(y=0, color='r', linestyle='--', alpha=0.3)
         
-        axes[0, 1].plot(vnf_all['timestamp'], vnf_all['ul_delay'], 'g-', alpha=0.7)
+        axes[0, 1].plot(*reduce_series(vnf_all, 'timestamp', 'ul_delay', max_points), 'g-', alpha=0.7)
         axes[0, 1].set_title('UL Delay')
         axes[0, 1].set_ylabel('Delay (µs)')
         axes[0, 1].grid(True, alpha=0.3)
         axes[0, 1].axhline(y=0, color='r', linestyle='--', alpha=0.3)
         
-        axes[1, 0].plot(vnf_all['timestamp'], vnf_all['txdata_delay'], 'm-', alpha=0.7)
+        axes[1, 0].plot(*reduce_series(vnf_all, 'timestamp', 'txdata_delay', max_points), 'm-', alpha=0.7)
         axes[1, 0].set_title('TxData Delay')
         axes[1, 0].set_xlabel('Timestamp (s)')
         axes[1, 0].set_ylabel('Delay (µs)')
         axes[1, 0].grid(True, alpha=0.3)
         axes[1, 0].axhline(y=0, color='r', linestyle='--', alpha=0.3)
         
-        axes[1, 1].plot(vnf_all['timestamp'], vnf_all['txdata_jitter'], 'c-', alpha=0.7)
+        axes[1, 1].plot(*reduce_series(vnf_all, 'timestamp', 'txdata_jitter', max_points), 'c-', alpha=0.7)
         axes[1, 1].set_title('TxData Jitter')
         axes[1, 1].set_xlabel('Timestamp (s)')
         axes[1, 1].set_ylabel('Jitter (µs)')
@@ -279,91 +622,346 @@ def plot_compare_vnf_pnf(vnf_df, pnf_df, prefix='vnf_pnf'):
     plt.close()
     print(f'✓ 已繪製 PNF 時序統計圖: {prefix}_pnf_timing_stats.png')
 
-def print_summary(vnf_df, pnf_df):
-    """列印統計摘要"""
+def build_latency_histograms(df):
+    """
+    每個延遲序列建立一個 LatencyHistogram
+    序列名稱: VNF 為 '<type>/<欄位>'，PNF 為 '<type>/<TOO LATE|TOO EARLY>'
+    """
+    histograms = {}
+    if 'type' not in df:
+        return histograms
+    for kind, group in df.groupby('type', sort=False):
+        for field in LATENCY_FIELDS.get(kind, ()):
+            histogram = histograms[f'{kind}/{field}'] = LatencyHistogram()
+            histogram.record_array(group[field].dropna().to_numpy())
+        if 'timing_status' in group:
+            for status, subset in group.groupby('timing_status', sort=False):
+                histogram = histograms[f'{kind}/{status}'] = LatencyHistogram()
+                histogram.record_array(subset['delta_us'].to_numpy())
+    return histograms
+
+def write_percentile_table(histograms, output_file, percentiles=PERCENTILES):
+    """輸出每個序列的 count/min/百分位數/max (µs) 為 CSV"""
+    import pandas as pd
+    rows = []
+    for name in sorted(histograms):
+        histogram = histograms[name]
+        row = {'series': name, 'count': histogram.total, 'min': histogram.min}
+        row.update({f'p{p:g}': v for p, v in zip(percentiles, histogram.percentiles(percentiles))})
+        row['max'] = histogram.max
+        rows.append(row)
+    columns = ['series', 'count', 'min'] + [f'p{p:g}' for p in percentiles] + ['max']
+    pd.DataFrame(rows, columns=columns).to_csv(output_file, index=False)
+    print(f'✓ 已儲存延遲百分位數表: {output_file}')
+
+def plot_latency_cdf(histograms, prefix='vnf_pnf'):
+    """
+    由直方圖繪製 VNF/PNF 延遲 CDF (上) 與尾端 1-CDF 對數圖 (下)
+    不需要原始樣本
+    """
+    import matplotlib.pyplot as plt
+    groups = [('VNF', [n for n in sorted(histograms) if n.startswith('vnf-')]),
+              ('PNF', [n for n in sorted(histograms) if n.startswith('pnf-')])]
+    
+    fig, axes = plt.subplots(2, 2, figsize=(16, 10))
+    fig.suptitle('Latency CDF (log-bucketed histograms)', fontsize=14, fontweight='bold')
+    
+    for col, (label, names) in enumerate(groups):
+        for name in names:
+            histogram = histograms[name]
+            if not histogram.total:
+                continue
+            values, fraction = histogram.cdf()
+            axes[0, col].step(values, fraction, where='post', label=name)
+            tail = 1 - fraction
+            keep = tail > 0
+            axes[1, col].step(values[keep], tail[keep], where='post', label=name)
+        
+        axes[0, col].set_title(f'{label} CDF')
+        axes[0, col].set_ylabel('Fraction ≤ x')
+        axes[1, col].set_title(f'{label} Tail (1 - CDF)')
+        axes[1, col].set_ylabel('Fraction > x')
+        axes[1, col].set_yscale('log')
+        for row in range(2):
+            ax = axes[row, col]
+            ax.set_xscale('symlog', linthresh=100)
+            ax.set_xlabel('Delay (µs)')
+            ax.grid(True, alpha=0.3)
+            if names:
+                ax.legend(fontsize=8, loc='best')
+    
+    plt.tight_layout()
+    plt.savefig(f'{prefix}_latency_cdf.png', dpi=300, bbox_inches='tight')
+    plt.close()
+    print(f'✓ 已繪製延遲 CDF 圖: {prefix}_latency_cdf.png')
+
+def _plain(value):
+    """整數值不顯示小數點 (DataFrame 欄位含 NaN 時為 float)"""
+    return int(value) if float(value).is_integer() else value
+
+def print_summary(vnf, pnf):
+    """
+    列印統計摘要
+    vnf/pnf 可為解析後的 DataFrame 或 summarize_log() 的 LogSummary
+    """
+    if not isinstance(vnf, LogSummary):
+        vnf = LogSummary.from_frame(vnf)
+    if not isinstance(pnf, LogSummary):
+        pnf = LogSummary.from_frame(pnf)
+
     print('\n' + '='*60)
     print('VNF LOG 統計摘要'.center(60))
     print('='*60)
     
-    vnf_jitterdelay = vnf_df[vnf_df['type'] == 'vnf-jitterdelay']
-    print(f'\n[VNF-JITTERDELAY] 記錄數: {len(vnf_jitterdelay)}')
+    print(f'\n[VNF-JITTERDELAY] 記錄數: {vnf.count("vnf-jitterdelay")}')
     
-    if not vnf_jitterdelay.empty:
-        print(f'  - TxData Delay: 平均={vnf_jitterdelay["txdata_delay"].mean():.2f} µs, '
-              f'最大={vnf_jitterdelay["txdata_delay"].max()} µs, '
-              f'最小={vnf_jitterdelay["txdata_delay"].min()} µs')
-        print(f'  - DL Delay:    平均={vnf_jitterdelay["dl_delay"].mean():.2f} µs, '
-              f'最大={vnf_jitterdelay["dl_delay"].max()} µs, '
-              f'最小={vnf_jitterdelay["dl_delay"].min()} µs')
-        print(f'  - UL Delay:    平均={vnf_jitterdelay["ul_delay"].mean():.2f} µs, '
-              f'最大={vnf_jitterdelay["ul_delay"].max()} µs, '
-              f'最小={vnf_jitterdelay["ul_delay"].min()} µs')
+    if vnf.count('vnf-jitterdelay'):
+        for label, field in (('TxData Delay:', 'txdata_delay'),
+                             ('DL Delay:   ', 'dl_delay'),
+                             ('UL Delay:   ', 'ul_delay')):
+            stats = vnf.get('vnf-jitterdelay', field)
+            print(f'  - {label} 平均={stats.mean:.2f} µs, '
+                  f'中位數={stats.median:.2f} µs, '
+                  f'最大={_plain(stats.max)} µs, '
+                  f'最小={_plain(stats.min)} µs')
     
-    vnf_sync = vnf_df[vnf_df['type'] == 'vnf-sync']
-    print(f'\n[VNF-SYNC] 同步調整記錄數: {len(vnf_sync)}')
-    if not vnf_sync.empty:
-        print(f'  - 調整值: 平均={vnf_sync["sync_adjustment"].mean():.2f} slots, '
-              f'最大={vnf_sync["sync_adjustment"].max()} slots, '
-              f'最小={vnf_sync["sync_adjustment"].min()} slots')
+    print(f'\n[VNF-SYNC] 同步調整記錄數: {vnf.count("vnf-sync")}')
+    if vnf.count('vnf-sync'):
+        stats = vnf.get('vnf-sync', 'sync_adjustment')
+        print(f'  - 調整值: 平均={stats.mean:.2f} slots, '
+              f'中位數={stats.median:.2f} slots, '
+              f'最大={_plain(stats.max)} slots, '
+              f'最小={_plain(stats.min)} slots')
 
     print('\n' + '='*60)
     print('PNF LOG 統計摘要'.center(60))
     print('='*60)
     
-    pnf_dltti = pnf_df[pnf_df['type'] == 'pnf-dltti']
-    pnf_txdata = pnf_df[pnf_df['type'] == 'pnf-txdata']
+    for label, kind in (('PNF-DL_TTI', 'pnf-dltti'), ('PNF-TX_DATA', 'pnf-txdata')):
+        if not pnf.count(kind):
+            continue
+        late = pnf.get(kind, 'TOO LATE')
+        early = pnf.get(kind, 'TOO EARLY')
+        print(f'\n[{label}] 記錄數: {pnf.count(kind)}')
+        print(f'  - TOO LATE 數: {late.count}, '
+              f'平均延遲={late.mean:.2f} µs' if late.count else '')
+        print(f'  - TOO EARLY 數: {early.count}, '
+              f'平均提前={early.mean:.2f} µs' if early.count else '')
     
-    if not pnf_dltti.empty:
-        dltti_late = pnf_dltti[pnf_dltti['timing_status'] == 'TOO LATE']
-        dltti_early = pnf_dltti[pnf_dltti['timing_status'] == 'TOO EARLY']
-        print(f'\n[PNF-DL_TTI] 記錄數: {len(pnf_dltti)}')
-        print(f'  - TOO LATE 數: {len(dltti_late)}, '
-              f'平均延遲={dltti_late["delta_us"].mean():.2f} µs' if not dltti_late.empty else '')
-        print(f'  - TOO EARLY 數: {len(dltti_early)}, '
-              f'平均提前={dltti_early["delta_us"].mean():.2f} µs' if not dltti_early.empty else '')
+    print('\n' + '='*60 + '\n')
+
+def plot_slot_join(joined, prefix='vnf_pnf', mu=DEFAULT_MU, max_points=DEFAULT_MAX_POINTS):
+    """同一 slot 的 PNF delta 與 VNF delay: 差值時間序列與兩者散佈圖"""
+    import matplotlib.pyplot as plt
+    matched = joined[joined['vnf_delay_us'].notna()]
+    if matched.empty:
+        return None
+    start = matched['abs_slot'].min()
+    colors = {'pnf-dltti': 'orange', 'pnf-txdata': 'red', 'pnf-ultti': 'green'}
     
-    if not pnf_txdata.empty:
-        txdata_late = pnf_txdata[pnf_txdata['timing_status'] == 'TOO LATE']
-        txdata_early = pnf_txdata[pnf_txdata['timing_status'] == 'TOO EARLY']
-        print(f'\n[PNF-TX_DATA] 記錄數: {len(pnf_txdata)}')
-        print(f'  - TOO LATE 數: {len(txdata_late)}, '
-              f'平均延遲={txdata_late["delta_us"].mean():.2f} µs' if not txdata_late.empty else '')
-        print(f'  - TOO EARLY 數: {len(txdata_early)}, '
-              f'平均提前={txdata_early["delta_us"].mean():.2f} µs' if not txdata_early.empty else '')
+    fig, axes = plt.subplots(2, 1, figsize=(16, 10))
+    fig.suptitle('VNF↔PNF Slot-Aligned Comparison', fontsize=14, fontweight='bold')
+    for kind, group in matched.groupby('type', sort=True):
+        slot_time = (group['abs_slot'].to_numpy() - start) * slot_duration(mu)
+        diff = group['diff_us'].to_numpy(dtype=np.float64)
+        index = downsample_indices(slot_time, diff, max_points)
+        axes[0].plot(slot_time[index], diff[index], '.', markersize=3, alpha=0.6,
+                     color=colors.get(kind), label=f'{kind} - {group["vnf_field"].iloc[0]}')
+        
+        index = downsample_indices(group['vnf_delay_us'].to_numpy(), group['pnf_delta_us'].to_numpy(),
+                                   max_points)
+        axes[1].scatter(group['vnf_delay_us'].to_numpy()[index], group['pnf_delta_us'].to_numpy()[index],
+                        s=6, alpha=0.5, color=colors.get(kind), label=kind)
     
-    print('\n' + '='*60 + '\n')
+    axes[0].set_xlabel('Slot time (s)')
+    axes[0].set_ylabel('PNF delta - VNF delay (µs)')
+    axes[0].axhline(y=0, color='k', linestyle='--', alpha=0.3)
+    axes[0].legend(fontsize=9)
+    axes[0].grid(True, alpha=0.3)
+    axes[1].set_xlabel('VNF delay (µs)')
+    axes[1].set_ylabel('PNF delta (µs)')
+    axes[1].legend(fontsize=9)
+    axes[1].grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    output_file = f'{prefix}_slot_join.png'
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
+    plt.close()
+    print(f'✓ 已繪製 slot 對齊圖: {output_file}')
+    return output_file
+
+def parse_follow_windows(text):
+    """
+    --windows: 逗號分隔的視窗長度，沒有單位時為秒 (也接受 500ms 等)
+
+    Returns:
+        tuple: 各視窗的秒數
+
+    Raises:
+        ValueError: 空白、非數值或不為正的視窗
+    """
+    windows = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            raise ValueError(f"--windows 含空白項目: '{text}'")
+        windows.append(Window(part if part[-1].isalpha() else f'{part}s').seconds)
+    return tuple(windows)
 
 def main():
-    if len(sys.argv) < 3:
-        print("用法: python vnf_pnf_parser_v2.py <vnf_log> <pnf_log> [output_prefix]")
-        sys.exit(1)
-    
-    vnf_log = sys.argv[1]
-    pnf_log = sys.argv[2]
-    prefix = sys.argv[3] if len(sys.argv) > 3 else 'vnf_pnf'
+    parser = argparse.ArgumentParser(
+        description='VNF+PNF Log Comparative Analyzer',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+使用範例:
+  python vnf_pnf_log_parser.py vnf.log pnf.log
+  python vnf_pnf_log_parser.py vnf.log pnf.log my_prefix
+  python vnf_pnf_log_parser.py vnf.log pnf.log --jobs 16
+  python vnf_pnf_log_parser.py vnf.log pnf.log --no-cache
+  python vnf_pnf_log_parser.py vnf.log pnf.log --summary-only --jobs 8
+  python vnf_pnf_log_parser.py vnf.log pnf.log --no-plot
+  python vnf_pnf_log_parser.py vnf.log pnf.log run2 --histograms-in run1_latency_hist.npz
+  python vnf_pnf_log_parser.py vnf.log pnf.log --follow --windows 1,10,60
+  python vnf_pnf_log_parser.py vnf.log pnf.log --profile --profile-chrome trace.json
+  python vnf_pnf_log_parser.py vnf.log.zst pnf.log.xz --jobs 8
+        '''
+    )
+    parser.add_argument('vnf_log', help='VNF 日誌檔案')
+    parser.add_argument('pnf_log', help='PNF 日誌檔案')
+    parser.add_argument('prefix', nargs='?', default='vnf_pnf', help='輸出檔名前綴 (預設: vnf_pnf)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='平行解析的進程數 (0 = CPU 核心數, 預設: 1)')
+    parser.add_argument('--summary-only', action='store_true',
+                        help='只以串流統計列印摘要 (常數記憶體, 不輸出 CSV/圖表, 不使用快取)')
+    parser.add_argument('--no-plot', action='store_true',
+                        help='不繪製圖表 (不載入 matplotlib)，仍輸出 CSV、百分位數表與直方圖')
+    parser.add_argument('--histograms-in', nargs='+', default=[], metavar='NPZ',
+                        help='合併先前輸出的 <prefix>_latency_hist.npz 後再輸出百分位數表與 CDF')
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS,
+                        help=f'時間序列圖每條曲線最多繪製的點數，保留尖峰與哨兵值 (0 = 不降採樣, 預設: {DEFAULT_MAX_POINTS})')
+    parser.add_argument('--join-tolerance', type=int, default=DEFAULT_TOLERANCE,
+                        help=f'VNF↔PNF slot 對齊容許的 slot 差 (預設: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--mu', type=int, default=DEFAULT_MU,
+                        help=f'numerology，決定每個 frame 的 slot 數與 slot 長度 (預設: {DEFAULT_MU})')
+    parser.add_argument('--no-clock-align', action='store_true',
+                        help='不估計 PNF/VNF 時鐘偏移，保留 PNF 原始時間戳')
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    follow_group = parser.add_argument_group('即時追蹤')
+    follow_group.add_argument('--follow', action='store_true',
+                              help='即時追蹤成長中的 VNF/PNF 日誌並顯示滾動統計')
+    follow_group.add_argument('--windows', default='1,10,60',
+                              help='滾動統計視窗 (秒, 逗號分隔, 也接受 500ms 等單位, 預設: 1,10,60)')
+    follow_group.add_argument('--refresh', type=float, default=1.0,
+                              help='終端刷新週期 (秒, 預設: 1.0)')
+    follow_group.add_argument('--from-start', action='store_true',
+                              help='追蹤時從檔案開頭讀取 (預設: 只讀新增內容)')
+
+    args = parser.parse_args()
+
+    if args.follow:
+        from follow import follow_logs
+        if any(Path(path).exists() and is_compressed(path) for path in (args.vnf_log, args.pnf_log)):
+            parser.error('--follow 只能追蹤未壓縮的日誌')
+        try:
+            windows = parse_follow_windows(args.windows)
+        except ValueError as e:
+            parser.error(str(e))
+        follow_logs({'VNF': args.vnf_log, 'PNF': args.pnf_log},
+                    VNFPNFLogParser(args.vnf_log).parse_line,
+                    windows=windows, refresh=args.refresh, from_start=args.from_start)
+        return
+
+    vnf_log = args.vnf_log
+    pnf_log = args.pnf_log
+    prefix = args.prefix
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    cache = cache_from_args(args)
+    profiler = profiler_from_args(args, 'vnf_pnf_log_parser.py')
 
     if not Path(vnf_log).exists() or not Path(pnf_log).exists():
         print(f"❌ 找不到指定日誌檔案")
         sys.exit(1)
 
+    if args.summary_only:
+        print(f"📖 正在串流統計 VNF LOG: {vnf_log}")
+        with profiler.stage('summarize_log [vnf]'):
+            vnf_summary = summarize_log(vnf_log, jobs)
+        print(f"📖 正在串流統計 PNF LOG: {pnf_log}")
+        with profiler.stage('summarize_log [pnf]'):
+            pnf_summary = summarize_log(pnf_log, jobs)
+        print_summary(vnf_summary, pnf_summary)
+        return
+
+    # 快取的解析結果包含沒有時間戳的記錄，拆出後只用於 slot 對齊
     print(f"📖 正在解析 VNF LOG: {vnf_log}")
-    vnf = VNFPNFLogParser(vnf_log).parse()
+    with profiler.stage('parse [vnf]') as stage:
+        vnf = cache.cached(vnf_log, 'vnf-pnf', PARSER_VERSION,
+                           lambda: VNFPNFLogParser(vnf_log, keep_untimed=True).parse(jobs=jobs),
+                           encode_frame, decode_frame)
+        vnf, _ = split_untimed(vnf)
+        stage.items = len(vnf)
     
     print(f"📖 正在解析 PNF LOG: {pnf_log}")
-    pnf = VNFPNFLogParser(pnf_log).parse()
+    with profiler.stage('parse [pnf]') as stage:
+        pnf = cache.cached(pnf_log, 'vnf-pnf', PARSER_VERSION,
+                           lambda: VNFPNFLogParser(pnf_log, keep_untimed=True).parse(jobs=jobs),
+                           encode_frame, decode_frame)
+        pnf, pnf_untimed = split_untimed(pnf)
+        stage.items = len(pnf) + len(pnf_untimed)
+    if len(pnf_untimed):
+        print(f"   另有 {len(pnf_untimed)} 筆沒有時間戳的 PNF 記錄 (PHY [PNF-DELAY])，只用於 slot 對齊")
+
+    # 兩台主機時鐘不同: 以共同 slot 擬合偏移/漂移 (每對日誌快取一次)，PNF 時間戳換算到 VNF 時間軸
+    if not args.no_clock_align:
+        with profiler.stage('fit_pnf_clock') as stage:
+            fit = cache.cached((vnf_log, pnf_log), f'clock-fit-mu{args.mu}-tol{args.join_tolerance}',
+                               CLOCK_FIT_VERSION, lambda: fit_pnf_clock(vnf, pnf, args.mu, args.join_tolerance),
+                               ClockFit.to_arrays, ClockFit.from_arrays)
+            pnf = apply_pnf_clock(pnf, fit)
+            stage.items = fit.n_pairs
+        print_clock_fit(fit)
 
     # 儲存 CSV
-    vnf.to_csv(f'{prefix}_vnf.csv', index=False)
-    pnf.to_csv(f'{prefix}_pnf.csv', index=False)
+    with profiler.stage('to_csv', items=len(vnf) + len(pnf)):
+        vnf.to_csv(f'{prefix}_vnf.csv', index=False)
+        pnf.to_csv(f'{prefix}_pnf.csv', index=False)
     print(f'✓ 已儲存解析結果: {prefix}_vnf.csv, {prefix}_pnf.csv')
 
     # 列印統計摘要
     print_summary(vnf, pnf)
 
+    # 延遲直方圖: 百分位數表、CDF 圖，並保存以便之後合併
+    with profiler.stage('build_latency_histograms', items=len(vnf) + len(pnf)):
+        histograms = merge_histograms(build_latency_histograms(vnf), build_latency_histograms(pnf))
+        for path in args.histograms_in:
+            merge_histograms(histograms, load_histograms(path))
+        save_histograms(f'{prefix}_latency_hist.npz', histograms)
+    print(f'✓ 已儲存延遲直方圖: {prefix}_latency_hist.npz')
+    write_percentile_table(histograms, f'{prefix}_latency_percentiles.csv')
+    if not args.no_plot:
+        with profiler.stage('plot_latency_cdf'):
+            plot_latency_cdf(histograms, prefix)
+
+    # VNF↔PNF 以 slot 對齊: 同一 slot 的 VNF delay、PNF delta 與差值
+    with profiler.stage('join_vnf_pnf') as stage:
+        joined = join_vnf_pnf(vnf, pnf, args.mu, args.join_tolerance, pnf_untimed=pnf_untimed)
+        stage.items = len(joined)
+    print_join_summary(joined)
+    joined.to_csv(f'{prefix}_slot_join.csv', index=False)
+    print(f'✓ 已儲存 slot 對齊表: {prefix}_slot_join.csv')
+
+    if args.no_plot:
+        print(f'\n✅ 分析完成！結果已儲存至 {prefix}_*.csv 和 {prefix}_latency_hist.npz (--no-plot)')
+        return
+
     # 繪製圖表
-    plot_compare_vnf_pnf(vnf, pnf, prefix)
+    with profiler.stage('plot_slot_join', items=len(joined)):
+        plot_slot_join(joined, prefix, args.mu, args.max_points)
+    with profiler.stage('plot_compare_vnf_pnf', items=len(vnf) + len(pnf)):
+        plot_compare_vnf_pnf(vnf, pnf, prefix, args.max_points)
     
-    print(f'\n✅ 分析完成！結果已儲存至 {prefix}_*.png 和 {prefix}_*.csv')
+    print(f'\n✅ 分析完成！結果已儲存至 {prefix}_*.png、{prefix}_*.csv 和 {prefix}_latency_hist.npz')
 
 if __name__ == '__main__':
     main()